@@ -0,0 +1,107 @@
+##### FastAPI 요청 계측 / Prometheus 노출 #####
+
+"""
+main.py / integrated_server.py 가 공유하는 요청 계측과 /metrics
+
+- timing_middleware: 요청마다 단계별 시간(metrics.span: codemap, kiwoom, decode, prompt, llm_queue, llm ...)을 모아
+  Server-Timing 헤더로 응답하고, 라우트별 처리 시간을 http_request_seconds 히스토그램에 기록
+  (SSE 는 헤더를 보낼 때까지의 시간. 이후 토큰 생성은 llm / llm_first_token 단계 히스토그램에만 기록)
+- metrics_response: Prometheus 텍스트 형식
+  앱 계측 + LLM 캐시 / single-flight / 키움 커넥션 풀 / 실시간 허브 상태
+  + 브릿지 STATUS (TR 큐 대기 / 처리 / 왕복 히스토그램, TR 캐시 적중, 조회 제한 대기)
+"""
+
+import os
+import time
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from kiwoom_client import kiwoom, KiwoomError
+from llm_cache import llm_cache
+from metrics import registry, start_timings, server_timing, render_families, prefixed
+from quote_hub import quote_hub
+from single_flight import flights
+
+METRICS_PREFIX = os.getenv("METRICS_PREFIX", "kiwoomy_")
+METRICS_BRIDGE_TIMEOUT = float(os.getenv("METRICS_BRIDGE_TIMEOUT", "2"))  # 스크랩 중 브릿지 STATUS 대기(초)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+http_request_seconds = registry.histogram(
+    "http_request_seconds", "라우트별 응답 시간(초, SSE 는 헤더 전송까지)", ("method", "route", "status")
+)
+
+
+async def timing_middleware(request: Request, call_next):
+    timings = start_timings()
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        elapsed = time.perf_counter() - started
+        route = getattr(request.scope.get("route"), "path", "unmatched")  # /price/{code} 처럼 경로 틀 단위
+        http_request_seconds.observe(elapsed, method=request.method, route=route, status=status)
+    response.headers["Server-Timing"] = server_timing(timings, elapsed)
+    return response
+
+
+def _family(name, type, help, samples) -> dict:
+    """samples: [(라벨 dict, 값)]"""
+    return {"name": name, "type": type, "help": help, "samples": [("", labels, value) for labels, value in samples]}
+
+
+def _local_families() -> list:
+    cache = llm_cache.stats()
+    single_flight = flights.stats()
+    pool = kiwoom.health()
+    hub = quote_hub.stats()
+    return [
+        _family("llm_cache_hits_total", "counter", "LLM 응답 캐시 적중", [({"tier": "memory"}, cache["hits"]), ({"tier": "disk"}, cache["disk_hits"])]),
+        _family("llm_cache_misses_total", "counter", "LLM 응답 캐시 미적중", [({}, cache["misses"])]),
+        _family("llm_cache_evictions_total", "counter", "LLM 응답 캐시 LRU 제거", [({}, cache["evictions"])]),
+        _family("llm_cache_entries", "gauge", "LLM 응답 캐시 항목 수", [({}, cache["size"])]),
+        _family("single_flight_leaders_total", "counter", "실제로 시작한 작업 수", [({}, single_flight["leaders"])]),
+        _family("single_flight_shared_total", "counter", "진행 중인 작업에 합류한 요청 수", [({}, single_flight["shared"])]),
+        _family("single_flight_in_flight", "gauge", "진행 중인 작업 수", [({}, single_flight["in_flight"])]),
+        _family("kiwoom_requests_total", "counter", "브릿지로 보낸 요청 수", [({}, pool["total_requests"])]),
+        _family("kiwoom_failures_total", "counter", "브릿지 요청 실패 수", [({}, pool["total_failures"])]),
+        _family("kiwoom_connections", "gauge", "브릿지 연결 수", [({}, pool["open_connections"])]),
+        _family("kiwoom_in_flight", "gauge", "브릿지 응답 대기 중인 요청 수", [({}, pool["in_flight"])]),
+        _family("kiwoom_waiting", "gauge", "동시 요청 제한으로 대기 중인 요청 수", [({}, pool["waiting"])]),
+        _family("quote_clients", "gauge", "실시간 시세 WebSocket 클라이언트 수", [({}, hub["clients"])]),
+        _family("quote_codes", "gauge", "실시간 구독 종목 수", [({}, hub["codes"])]),
+        _family("quote_ticks_received_total", "counter", "브릿지에서 받은 실시간 틱 수", [({}, hub["ticks_received"])]),
+    ]
+
+
+async def _bridge_families() -> list:
+    """브릿지 STATUS → bridge_* (연결 실패면 bridge_up 0 만)"""
+    try:
+        status = await kiwoom.request("STATUS", timeout=METRICS_BRIDGE_TIMEOUT)
+    except KiwoomError:
+        return [_family("bridge_up", "gauge", "브릿지 STATUS 응답 여부", [({}, 0)])]
+
+    budget = status.get("tr_budget", {})
+    families = [
+        _family("bridge_up", "gauge", "브릿지 STATUS 응답 여부", [({}, 1)]),
+        _family("bridge_queue_depth", "gauge", "TR 큐에 대기 중인 명령 수",
+                [({"priority": name}, depth) for name, depth in status.get("queue_depth", {}).items()]),
+        _family("bridge_tr_submitted_total", "counter", "TR 큐에 들어온 요청 수", [({}, status.get("submitted", 0))]),
+        _family("bridge_tr_coalesced_total", "counter", "큐에서 합쳐진 요청 수", [({}, status.get("coalesced", 0))]),
+        _family("bridge_tr_processed_total", "counter", "처리한 TR 명령 수", [({}, status.get("processed", 0))]),
+        _family("bridge_tr_failed_total", "counter", "실패한 TR 명령 수", [({}, status.get("failed", 0))]),
+        _family("bridge_tr_throttled_seconds_total", "counter", "조회 제한으로 기다린 시간(초)", [({}, budget.get("throttled_seconds", 0))]),
+        _family("bridge_tr_cache_hits_total", "counter", "TR 캐시 적중",
+                [({"tr": name}, counts.get("hits", 0)) for name, counts in (status.get("tr_cache") or {}).items()]),
+        _family("bridge_tr_cache_misses_total", "counter", "TR 캐시 미적중",
+                [({"tr": name}, counts.get("misses", 0)) for name, counts in (status.get("tr_cache") or {}).items()]),
+    ]
+    return families + prefixed(status.get("metrics") or [], "bridge_")
+
+
+async def metrics_response() -> Response:
+    families = registry.families() + _local_families() + await _bridge_families()
+    return Response(render_families(prefixed(families, METRICS_PREFIX)), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,151 @@
+##### 공통 TR 수집기 #####
+
+"""
+모든 수집기가 공유하는 TR 요청/대기 로직
+
+- CommRqData 후 QEventLoop 로 대기하다가 KiwoomApp._on_receive_tr_data 가
+  이 수집기의 핸들러를 호출하면 즉시 깨어남 (100ms 폴링 없음)
+- 요청별 타임아웃, CommRqData 실패 코드와 응답 처리 중 예외를 호출자에게 전달
+- 요청마다 RQName 에 순번을 붙여("opt10081_req#12") 보냄 → 시간 초과 뒤 늦게 온 응답은
+  다음 요청의 결과로 파싱하지 않고 버림
+- CommRqData 전마다 KiwoomApp.acquire_tr() 로 TR 조회 제한을 지킴
+- CommRqData → 응답 처리 완료까지 왕복 시간을 TR 코드별 히스토그램(tr_round_trip)에 기록 (조회 제한 대기 제외)
+- read_rows(): 반복 데이터 전체를 GetCommDataEx 한 번으로 꺼내 schema(TrSchema)대로 변환.
+  GetCommDataEx 결과가 스키마와 맞지 않으면 필드별 GetCommData 로 대체
+"""
+
+import os
+import time
+
+from PyQt5.QtCore import QEventLoop, QTimer
+
+from metrics import Histogram
+
+TR_TIMEOUT = float(os.getenv("TR_TIMEOUT", "15"))
+
+RQNAME_SEP = "#"  # 요청별 RQName = 수집기 RQName + RQNAME_SEP + 순번 (KiwoomApp 은 앞부분으로 핸들러를 찾음)
+
+# 페이지 1번의 왕복 (server.py STATUS 의 metrics 로 노출)
+tr_round_trip = Histogram("tr_round_trip_seconds", "CommRqData 부터 응답 처리까지 시간(초, 페이지 1번)", ("trcode", "result"))
+
+
+class TrRequestError(Exception):
+    """CommRqData 가 0 이 아닌 코드를 돌려줌"""
+
+
+class TrTimeoutError(TrRequestError):
+    """제한 시간 안에 OnReceiveTrData 가 오지 않음"""
+
+
+class BaseCollector:
+    rqname = None
+    trcode = None
+    screen_no = None
+    schema = None  # tr_fields.TrSchema
+
+    def __init__(self, ocx, app, timeout=TR_TIMEOUT):
+        self.ocx = ocx
+        self.app = app
+        self.timeout = timeout
+        self.prev_next = 0
+        self.last_message = ""
+
+        self._loop = None
+        self._done = False
+        self._error = None
+        self._seq = 0
+        self._pending = None  # 응답을 기다리는 요청의 RQName
+
+        self.app.set_tr_handler(self.rqname, self._on_tr_data)
+        self.app.set_msg_handler(self.rqname, self._on_msg)
+
+    def set_inputs(self, inputs: dict):
+        for key, value in inputs.items():
+            self.ocx.dynamicCall("SetInputValue(QString, QString)", key, value)
+
+    def comm_rq_data(self, prev_next=0, timeout=None):
+        """TR 요청을 보내고 응답 처리(on_receive)가 끝날 때까지 대기"""
+        self.app.acquire_tr()
+        self._done = False
+        self._error = None
+        self._seq += 1
+        self._pending = f"{self.rqname}{RQNAME_SEP}{self._seq}"
+        started = time.monotonic()
+        result = "error"
+        try:
+            ret = self.ocx.dynamicCall(
+                "CommRqData(QString, QString, int, QString)",
+                self._pending, self.trcode, prev_next, self.screen_no
+            )
+            if ret != 0:
+                raise TrRequestError(f"{self.trcode} CommRqData 실패 (코드: {ret}) {self.last_message}")
+            self._wait(self.timeout if timeout is None else timeout)
+            result = "ok"
+        except TrTimeoutError:
+            result = "timeout"
+            raise
+        finally:
+            tr_round_trip.observe(time.monotonic() - started, trcode=self.trcode, result=result)
+
+    def _wait(self, timeout):
+        if not self._done:
+            self._loop = QEventLoop()
+            timer = QTimer()
+            timer.setSingleShot(True)
+            timer.timeout.connect(self._on_timeout)
+            timer.start(int(timeout * 1000))
+            self._loop.exec_()
+            timer.stop()
+            self._loop = None
+
+        if self._error is not None:
+            raise self._error
+
+    def _on_timeout(self):
+        self._error = TrTimeoutError(f"{self.trcode} 응답 시간 초과 {self.last_message}")
+        self._finish()
+
+    def _finish(self):
+        self._done = True
+        if self._loop is not None:
+            self._loop.quit()
+
+    def _on_msg(self, scr_no, rqname, trcode, msg):
+        self.last_message = msg
+
+    def _on_tr_data(self, scr_no, rqname, trcode, recordname, prev_next, *args):
+        if rqname != self._pending or self._done:
+            print(f"⚠️ {self.trcode} 늦게 도착한 응답 무시: {rqname}")
+            return
+        try:
+            self.prev_next = int(prev_next or 0)
+            self.on_receive(trcode, rqname, recordname)
+        except Exception as e:
+            self._error = e
+        finally:
+            self._finish()
+
+    def get_repeat_count(self, trcode, rqname) -> int:
+        return self.ocx.dynamicCall("GetRepeatCnt(QString, QString)", trcode, rqname)
+
+    def get_comm_data(self, trcode, rqname, index, field) -> str:
+        return self.ocx.dynamicCall("GetCommData(QString, QString, int, QString)", trcode, rqname, index, field).strip()
+
+    def read_rows(self, trcode, rqname):
+        """반복 데이터 전체를 스키마에 맞춘 dict 행 리스트(또는 구조화 배열)로 반환"""
+        table = self.ocx.dynamicCall("GetCommDataEx(QString, QString)", trcode, self.schema.record_name)
+        if table and all(len(raw) >= self.schema.width for raw in table):
+            return self.schema.convert_table(table)
+
+        # 일괄 조회가 비었거나 컬럼 수가 다르면 필드별 조회
+        count = self.get_repeat_count(trcode, rqname)
+        if table:
+            print(f"⚠️ {trcode} GetCommDataEx 컬럼 수 불일치, 필드별 조회로 대체")
+        return self.schema.convert_rows([
+            {field.name: self.get_comm_data(trcode, rqname, i, field.name) for field in self.schema.fields}
+            for i in range(count)
+        ])
+
+    def on_receive(self, trcode, rqname, recordname):
+        """수집기별 응답 파싱 (하위 클래스에서 구현)"""
+        raise NotImplementedError
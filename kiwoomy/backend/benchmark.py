@@ -0,0 +1,396 @@
+##### FastAPI 엔드포인트 부하 측정 #####
+
+"""
+키움 / Ollama 대역(replay_bridge, ollama_standin) 위에 main.py / integrated_server.py 를 띄우고
+정해진 동시 요청 수로 엔드포인트를 호출해 처리량과 지연 분포를 재는 벤치마크
+
+- 시나리오: price, short, invest, stock-theme, chat, stock-chat (+ price-stream: 첫 토큰까지 시간)
+- 결과: 시나리오별 처리량, p50 / p95 / p99 / 최대 지연, 오류 수
+  단계별 시간: 응답의 Server-Timing 헤더 평균 + 대역 서버 통계 (TR 대기 / 조회 제한, LLM 대기 / 생성)
+- 저장: data/benchmarks/<시각>_<커밋>.json, 실행마다 직전 결과와 비교해 변화율 출력
+
+    python benchmark.py --concurrency 16 --duration 30
+    python benchmark.py --scenarios price,chat --requests 200 --no-llm-cache
+    python benchmark.py --compare data/benchmarks/A.json data/benchmarks/B.json
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import httpx
+import numpy as np
+
+from kiwoom_client import KiwoomClient
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_DIR = os.getenv("BENCHMARK_DIR", os.path.join(BACKEND_DIR, "data", "benchmarks"))
+
+CODES = ["005930", "000660", "035420", "005380", "000270", "068270", "051910", "105560", "035720", "000830"]
+NAMES = ["삼성전자", "SK하이닉스", "NAVER", "현대차", "기아", "셀트리온", "LG화학", "KB금융", "카카오", "삼성물산"]
+PERIODS = ["1개월", "3개월", "6개월", "1년"]
+
+
+def _dates(rng):
+    return {"start_date": "2024-01-02", "end_date": f"2024-01-{rng.randint(10, 31):02d}"}
+
+
+# 시나리오 → (앱, 요청 만드는 함수). 요청: (method, path, params, json, stream)
+SCENARIOS = {
+    "price": ("main", lambda rng: ("GET", f"/price/{rng.choice(CODES)}", {"period": rng.choice(PERIODS)}, None, False)),
+    "price-stream": ("main", lambda rng: ("GET", f"/price/{rng.choice(CODES)}", {"period": rng.choice(PERIODS), "stream": "true"}, None, True)),
+    "short": ("main", lambda rng: ("GET", f"/short/{rng.choice(CODES)}", _dates(rng), None, False)),
+    "invest": ("integrated", lambda rng: ("GET", f"/invest/{rng.choice(CODES)}",
+                                          {"from_date": "20240102", "to_date": f"202401{rng.randint(10, 31):02d}"}, None, False)),
+    "stock-theme": ("main", lambda rng: ("GET", f"/stock-theme/{rng.choice(CODES)}", None, None, False)),
+    "chat": ("main", lambda rng: ("POST", "/chat", None, {"message": f"{rng.choice(NAMES)} 주가 어때?"}, False)),
+    "stock-chat": ("integrated", lambda rng: ("POST", "/stock-chat", None,
+                                              {"message": f"{rng.choice(NAMES)} {rng.choice(['주가', '공매도', '수급'])} 알려줘"}, False)),
+}
+DEFAULT_SCENARIOS = ["price", "short", "invest", "stock-theme", "chat", "stock-chat"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, timeout=10).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def parse_server_timing(header: str) -> dict:
+    """'kiwoom;dur=12.3, llm;dur=800' → {"kiwoom": 12.3, "llm": 800.0} (ms)"""
+    stages = {}
+    for item in header.split(","):
+        name, *params = [part.strip() for part in item.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                try:
+                    stages[name] = stages.get(name, 0.0) + float(param[4:])
+                except ValueError:
+                    pass
+    return stages
+
+
+##### 대역 서버 / 대상 앱 실행 #####
+
+class Stack:
+    """replay_bridge + ollama_standin + main / integrated_server 를 하위 프로세스로 띄우고 정리"""
+
+    def __init__(self, args):
+        self.args = args
+        self.processes = []
+        self.bridge_port = free_port()
+        self.ollama_url = f"http://localhost:{free_port()}"
+        self.apps = {"main": f"http://localhost:{free_port()}", "integrated": f"http://localhost:{free_port()}"}
+
+    def _spawn(self, argv, env=None, log_name=None):
+        log = open(os.path.join(self.args.log_dir, log_name), "w") if self.args.log_dir else subprocess.DEVNULL
+        process = subprocess.Popen(argv, cwd=BACKEND_DIR, env={**os.environ, **(env or {})}, stdout=log, stderr=subprocess.STDOUT)
+        self.processes.append(process)
+        return process
+
+    def start(self, apps):
+        args = self.args
+        if args.log_dir:
+            os.makedirs(args.log_dir, exist_ok=True)
+        bridge = [sys.executable, "replay_bridge.py", "replay", "--port", str(self.bridge_port),
+                  "--tr-rate", str(args.tr_rate), "--seed", str(args.seed)]
+        for latency in args.latency or []:
+            bridge += ["--latency", latency]
+        if args.recordings:
+            bridge += ["--recordings", args.recordings]
+        self._spawn(bridge, log_name="replay_bridge.log")
+
+        ollama_port = self.ollama_url.rsplit(":", 1)[1]
+        self._spawn([sys.executable, "-m", "uvicorn", "ollama_standin:app", "--port", ollama_port, "--log-level", "warning"],
+                    {"OLLAMA_STANDIN_TPS": str(args.llm_tps), "OLLAMA_STANDIN_PREFILL_TPS": str(args.llm_prefill_tps),
+                     "OLLAMA_STANDIN_TOKENS": str(args.llm_tokens), "OLLAMA_STANDIN_SLOTS": str(args.llm_slots)},
+                    log_name="ollama_standin.log")
+
+        env = {"KIWOOM_PORT": str(self.bridge_port), "OLLAMA_BASE_URL": self.ollama_url}
+        if args.no_llm_cache:
+            env["LLM_CACHE_SIZE"] = "0"
+        modules = {"main": "main:app", "integrated": "integrated_server:app"}
+        for name in apps:
+            port = self.apps[name].rsplit(":", 1)[1]
+            self._spawn([sys.executable, "-m", "uvicorn", modules[name], "--port", port, "--log-level", "warning"],
+                        env, log_name=f"{name}.log")
+
+    async def wait_ready(self, apps, timeout=60):
+        urls = [f"{self.ollama_url}/api/tags"] + [f"{self.apps[name]}/openapi.json" for name in apps]
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            for url in urls:
+                while True:
+                    try:
+                        if (await client.get(url, timeout=2)).status_code == 200:
+                            break
+                    except httpx.HTTPError:
+                        pass
+                    if time.monotonic() > deadline:
+                        raise RuntimeError(f"준비되지 않음: {url} (로그: --log-dir)")
+                    await asyncio.sleep(0.3)
+
+    def stop(self):
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+##### 부하 생성 #####
+
+async def send(client, base_url, request):
+    """한 요청 → (상태 코드, 전체 지연 s, 첫 바이트 s, Server-Timing 단계)"""
+    method, path, params, body, stream = request
+    started = time.perf_counter()
+    first_byte = None
+    async with client.stream(method, base_url + path, params=params, json=body) as response:
+        async for chunk in response.aiter_bytes():
+            if first_byte is None and chunk:
+                first_byte = time.perf_counter() - started
+                if stream and b"event: token" not in chunk:
+                    first_byte = None  # 스트림은 첫 LLM 토큰까지 시간
+        stages = parse_server_timing(response.headers.get("server-timing", ""))
+    elapsed = time.perf_counter() - started
+    return response.status_code, elapsed, first_byte if first_byte is not None else elapsed, stages
+
+
+async def run_load(stack, scenarios, args):
+    rng = random.Random(args.seed)
+    schedule = [name for name in scenarios]
+    samples = []  # (시나리오, 상태, 지연, 첫 바이트, 단계)
+    started = time.perf_counter()
+    deadline = started + args.duration if not args.requests else None
+    issued = 0
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        async def worker():
+            nonlocal issued
+            while True:
+                if args.requests and issued >= args.requests:
+                    return
+                if deadline and time.perf_counter() >= deadline:
+                    return
+                scenario = schedule[issued % len(schedule)]
+                issued += 1
+                app, make_request = SCENARIOS[scenario]
+                try:
+                    status, elapsed, first_byte, stages = await send(client, stack.apps[app], make_request(rng))
+                except httpx.HTTPError as e:
+                    status, elapsed, first_byte, stages = f"{type(e).__name__}", args.timeout, args.timeout, {}
+                samples.append((scenario, status, elapsed, first_byte, stages))
+
+        await asyncio.gather(*[worker() for _ in range(args.concurrency)])
+    return samples, time.perf_counter() - started
+
+
+def summarize(samples, wall_seconds) -> dict:
+    def percentiles(values):
+        values = np.asarray(values, dtype=float) * 1000
+        return {
+            "p50_ms": round(float(np.percentile(values, 50)), 1),
+            "p95_ms": round(float(np.percentile(values, 95)), 1),
+            "p99_ms": round(float(np.percentile(values, 99)), 1),
+            "max_ms": round(float(values.max()), 1),
+            "mean_ms": round(float(values.mean()), 1),
+        }
+
+    report = {}
+    for scenario in dict.fromkeys(sample[0] for sample in samples):
+        rows = [sample for sample in samples if sample[0] == scenario]
+        ok = [row for row in rows if row[1] == 200]
+        stages = {}
+        for row in ok:
+            for name, duration in row[4].items():
+                stages.setdefault(name, []).append(duration)
+        report[scenario] = {
+            "requests": len(rows),
+            "errors": len(rows) - len(ok),
+            "throughput_rps": round(len(rows) / wall_seconds, 2),
+            **(percentiles([row[2] for row in ok]) if ok else {}),
+            "first_byte_p50_ms": round(float(np.percentile([row[3] for row in ok], 50)) * 1000, 1) if ok else None,
+            "stages_mean_ms": {name: round(sum(values) / len(values), 1) for name, values in stages.items()},
+        }
+    ok = [sample for sample in samples if sample[1] == 200]
+    report["_total"] = {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "throughput_rps": round(len(samples) / wall_seconds, 2),
+        "wall_seconds": round(wall_seconds, 2),
+        **(percentiles([row[2] for row in ok]) if ok else {}),
+    }
+    return report
+
+
+async def backend_stats(stack) -> dict:
+    """대역 서버 쪽 단계 통계: 브릿지 TR 큐 / 조회 제한, LLM 대기 / 생성"""
+    stats = {}
+    bridge = KiwoomClient(port=stack.bridge_port, pool_size=1, timeout=5)
+    try:
+        stats["bridge"] = await bridge.request("STATUS")
+        stats["bridge"].pop("metrics", None)  # 히스토그램 원본은 /metrics 용
+    except Exception as e:
+        stats["bridge"] = {"error": str(e)}
+    finally:
+        await bridge.close()
+    async with httpx.AsyncClient() as client:
+        try:
+            stats["ollama"] = (await client.get(f"{stack.ollama_url}/stats", timeout=5)).json()
+        except (httpx.HTTPError, ValueError) as e:
+            stats["ollama"] = {"error": str(e)}
+    return stats
+
+
+##### 결과 저장 / 비교 #####
+
+def save_result(result) -> str:
+    os.makedirs(BENCHMARK_DIR, exist_ok=True)
+    name = f"{datetime.now():%Y%m%d-%H%M%S}_{result['git']['commit'] or 'nogit'}{'-dirty' if result['git']['dirty'] else ''}.json"
+    path = os.path.join(BENCHMARK_DIR, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def previous_result(result, exclude_path=None):
+    """같은 설정으로 잰 가장 최근 결과 (없으면 가장 최근 결과)"""
+    paths = sorted(path for path in glob.glob(os.path.join(BENCHMARK_DIR, "*.json")) if path != exclude_path)
+    for path in reversed(paths):
+        try:
+            with open(path, encoding="utf-8") as f:
+                if json.load(f).get("config") == result["config"]:
+                    return path
+        except (OSError, ValueError):
+            continue
+    return paths[-1] if paths else None
+
+
+def print_report(report, backend=None):
+    print(f"\n{'시나리오':<14}{'요청':>6}{'오류':>6}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'첫바이트':>9}  단계(평균 ms)")
+    for scenario, row in report.items():
+        stages = ", ".join(f"{name} {value}" for name, value in row.get("stages_mean_ms", {}).items())
+        print(f"{scenario:<14}{row['requests']:>6}{row['errors']:>6}{row['throughput_rps']:>8}"
+              f"{row.get('p50_ms', '-'):>9}{row.get('p95_ms', '-'):>9}{row.get('p99_ms', '-'):>9}{row.get('max_ms', '-'):>9}"
+              f"{row.get('first_byte_p50_ms') or '-':>9}  {stages}")
+    if backend:
+        bridge, ollama = backend.get("bridge", {}), backend.get("ollama", {})
+        budget = bridge.get("tr_budget", {})
+        print(f"\n🔌 브릿지: TR {bridge.get('processed', '-')}건, 합침 {bridge.get('coalesced', '-')}, "
+              f"평균 큐 대기 {bridge.get('avg_wait_seconds', '-')}s, 조회 제한 대기 {budget.get('throttled_seconds', '-')}s")
+        print(f"🤖 LLM: 생성 {ollama.get('generations', '-')}건, 평균 프롬프트 {ollama.get('avg_prompt_tokens', '-')}토큰, "
+              f"평균 대기 {ollama.get('avg_wait_seconds', '-')}s, 평균 생성 {ollama.get('avg_generate_seconds', '-')}s")
+
+
+def compare(old_path, new_path):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"\n📊 비교: {os.path.basename(old_path)} → {os.path.basename(new_path)}")
+    if old.get("config") != new.get("config"):
+        print("⚠️ 설정이 달라 직접 비교가 어려울 수 있음")
+
+    def delta(before, after):
+        if not before or after is None:
+            return "-"
+        return f"{(after / before - 1) * 100:+.1f}%"
+
+    print(f"{'시나리오':<14}{'rps':>18}{'p50 ms':>22}{'p95 ms':>22}")
+    for scenario, row in new["report"].items():
+        before = old["report"].get(scenario, {})
+        print(f"{scenario:<14}"
+              f"{before.get('throughput_rps', '-')!s:>7} → {row['throughput_rps']!s:<7}{delta(before.get('throughput_rps'), row['throughput_rps']):>3}"
+              f"{before.get('p50_ms', '-')!s:>8} → {row.get('p50_ms', '-')!s:<8}{delta(before.get('p50_ms'), row.get('p50_ms')):>4}"
+              f"{before.get('p95_ms', '-')!s:>8} → {row.get('p95_ms', '-')!s:<8}{delta(before.get('p95_ms'), row.get('p95_ms')):>4}")
+
+
+async def run(args):
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"알 수 없는 시나리오: {unknown} (가능: {', '.join(SCENARIOS)})")
+    apps = sorted({SCENARIOS[name][0] for name in scenarios})
+
+    stack = Stack(args)
+    stack.start(apps)
+    try:
+        await stack.wait_ready(apps)
+        print(f"✅ 대역 서버 / 앱 준비 완료 (브릿지 :{stack.bridge_port}, Ollama {stack.ollama_url})")
+        if args.warmup:
+            warmup = argparse.Namespace(**{**vars(args), "requests": args.warmup})
+            await run_load(stack, scenarios, warmup)
+            print(f"🔥 워밍업 {args.warmup}건 완료")
+
+        print(f"🚀 부하 측정: 동시 {args.concurrency}, {f'{args.requests}건' if args.requests else f'{args.duration}초'}, 시나리오 {scenarios}")
+        samples, wall_seconds = await run_load(stack, scenarios, args)
+        report = summarize(samples, wall_seconds)
+        backend = await backend_stats(stack)
+    finally:
+        stack.stop()
+
+    config = {key: value for key, value in vars(args).items() if key not in ("compare", "log_dir", "no_save")}
+    result = {"created_at": datetime.now().isoformat(timespec="seconds"), "git": git_commit(),
+              "config": config, "report": report, "backend": backend}
+    print_report(report, backend)
+    if not args.no_save:
+        path = save_result(result)
+        print(f"\n💾 결과 저장: {path}")
+        previous = previous_result(result, path)
+        if previous:
+            compare(previous, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI 엔드포인트 부하 측정 (키움 / Ollama 대역 사용)")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS), help=f"쉼표 구분 ({', '.join(SCENARIOS)})")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30, help="측정 시간(초)")
+    parser.add_argument("--requests", type=int, default=0, help="총 요청 수 (지정하면 --duration 대신)")
+    parser.add_argument("--warmup", type=int, default=0, help="측정 전 요청 수")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-llm-cache", action="store_true", help="LLM 응답 캐시를 끄고 측정")
+    # 키움 대역
+    parser.add_argument("--recordings", help="replay_bridge 녹화 폴더 (없으면 합성 데이터)")
+    parser.add_argument("--latency", action="append", help="replay_bridge --latency (예: PRICE=lognormal:0.8,0.4)")
+    parser.add_argument("--tr-rate", type=float, default=5, help="초당 TR 수")
+    # Ollama 대역
+    parser.add_argument("--llm-tps", type=float, default=30, help="응답 토큰 / 초")
+    parser.add_argument("--llm-prefill-tps", type=float, default=600, help="프롬프트 토큰 / 초")
+    parser.add_argument("--llm-tokens", type=int, default=120, help="응답 토큰 수")
+    parser.add_argument("--llm-slots", type=int, default=1, help="동시 생성 수")
+    # 결과
+    parser.add_argument("--log-dir", help="대역 서버 / 앱 로그 저장 폴더")
+    parser.add_argument("--no-save", action="store_true", help="결과를 저장하지 않음")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="저장된 결과 두 개 비교만 하고 종료")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
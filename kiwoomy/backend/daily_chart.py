@@ -0,0 +1,133 @@
+##### 기간별 주가 추이 #####
+
+"""
+opt10081 일봉을 OhlcvStore 에 쌓아두고 기간 조회는 저장소 슬라이스로 응답
+
+- 처음 조회하는 종목: 가장 오래된 행이 start_date 이전인 페이지에서 연속조회 중단
+- 이후: 마지막 저장일이 나오는 페이지까지만 받아 최신 구간 보충
+  (예산 안에 마지막 저장일까지 못 닿으면 사이가 비지 않도록 받은 구간으로 저장소를 교체),
+  더 과거가 필요하면 첫 저장일을 기준일자로 과거 방향만 추가 수신
+- 보충 때 다시 받은 확정 봉의 종가가 저장된 값과 다르면(분할 / 권리락으로 수정주가 기준 변경)
+  저장소 전체를 다시 받음 (append-only 저장소의 과거 행은 스스로 재수정되지 않음)
+- 호출당 페이지 / 행 예산 (기본 TR_MAX_PAGES)
+- 응답 행: date, open, high, low, close, volume, amount(거래대금, 백만원)
+"""
+
+import datetime
+
+from ohlcv_store import OhlcvStore, COLUMNS
+
+
+class DailyChart:
+    def __init__(self, engine, store=None):
+        self.engine = engine
+        self.store = store or OhlcvStore()
+
+    def request_daily_chart(self, code, start_date, max_pages=None, max_rows=None):
+        """
+        start_date 이후 일봉. max_pages / max_rows 는 이번 호출의 TR 예산
+        (예산 안에 다 못 받으면 받은 만큼만 응답하고 다음 호출에서 이어서 보충)
+        """
+        cached = self.cached_daily_chart(code, start_date)
+        if cached is not None:
+            return cached
+
+        budget = {"max_pages": max_pages, "max_rows": max_rows}
+        if not self.store.rows(code):
+            self._load(code, start_date, budget)
+        else:
+            if not self.store.is_fresh(code):
+                # 마지막 저장일이 나오는 페이지까지만 받아 최신 구간 보충
+                last_date = int(self.store.last_date(code))
+                rows = self._fetch(code, self._today(), stop=self._reaches(last_date))
+                if self._readjusted(code, rows):
+                    # 액면분할 / 권리락 등으로 수정주가 기준이 바뀜 → 저장된 과거 행 전체를 다시 받음
+                    print(f"⚠️ {code} 수정주가 변경 감지(저장된 종가 불일치), 일봉 전체 재수신")
+                    self._load(code, start_date, budget)
+                    return self._to_rows(self.store.read(code, start_date))
+                if self._gap_after(rows, last_date):
+                    print(f"⚠️ {code} 일봉 보충이 마지막 저장일({last_date})까지 닿지 않아 저장소 교체")
+                    self.store.replace(code, self._ascending(rows), history_from=self._history_from(rows))
+                else:
+                    self.store.append(code, self._ascending(rows, since=last_date))
+            if not self.store.covers(code, start_date):
+                # 첫 저장일을 기준일자로 과거 방향만 추가 수신
+                first_date = self.store.first_date(code)
+                rows = self._fetch(code, first_date, stop=self._reaches(start_date), **budget)
+                self.store.prepend(code, self._ascending(rows), history_from=self._history_from(rows))
+
+        return self._to_rows(self.store.read(code, start_date))
+
+    def _load(self, code, start_date, budget):
+        """오늘부터 start_date 가 나오는 페이지까지 받아 저장소를 통째로 교체 (처음 조회 / 수정주가 변경)"""
+        rows = self._fetch(code, self._today(), stop=self._reaches(start_date), **budget)
+        self.store.replace(code, self._ascending(rows), history_from=self._history_from(rows))
+
+    def _readjusted(self, code, rows):
+        """
+        다시 받은 행의 종가가 저장된 종가와 다른지 (수정주가 기준 변경)
+        마지막 저장 행은 장중에 저장됐을 수 있어 그 직전 행(저장 당시 이미 확정된 봉)으로 비교
+        """
+        stored = self.store.tail(code, 2)
+        if len(stored["date"]) < 2:
+            return False
+        date, close = int(stored["date"][0]), int(stored["close"][0])
+        fetched = rows["close"][rows["date"] == date]
+        return len(fetched) > 0 and int(fetched[0]) != close
+
+    def cached_daily_chart(self, code, start_date):
+        """TR 없이 저장소만으로 응답 가능하면 결과, 아니면 None (네트워크 스레드에서도 호출)"""
+        if self.store.rows(code) and self.store.is_fresh(code) and self.store.covers(code, start_date):
+            return self._to_rows(self.store.read(code, start_date))
+        return None
+
+    def _today(self):
+        return datetime.datetime.today().strftime("%Y%m%d")
+
+    def _reaches(self, date):
+        """페이지의 가장 오래된 행이 date 이하이면 연속조회 중단"""
+        date = int(date)
+
+        def reached(page):
+            dates = page["date"][page["date"] > 0]  # 끝의 빈 행(날짜 0)은 무시
+            return len(dates) > 0 and dates[-1] <= date
+        return reached
+
+    def _gap_after(self, rows, last_date):
+        """보충으로 받은 행이 last_date 까지 닿지 못하고 페이지가 남은 채 끝났는지"""
+        has_more = self.engine.collectors["daily_chart"].has_more
+        return has_more and (len(rows) == 0 or int(rows["date"].min()) > last_date)
+
+    def _history_from(self, rows):
+        """받은 구간이 어디부터 빠짐없이 저장됐는지 (상장일까지 받았으면 00000000)"""
+        if not self.engine.collectors["daily_chart"].has_more:
+            return "00000000"
+        return str(int(rows["date"].min())) if len(rows) else self._today()
+
+    def _fetch(self, code, base_date, stop=None, max_pages=None, max_rows=None):
+        """base_date 부터 과거로 페이지 수신 (최신순 구조화 배열)"""
+        rows = self.engine.request(
+            "daily_chart",
+            stop=stop,
+            max_pages=max_pages,
+            max_rows=max_rows,
+            code=code,
+            base_date=base_date,
+        )
+        return rows[(rows["date"] > 0) & (rows["close"] > 0)]
+
+    def _ascending(self, rows, since=None):
+        """최신순 배열을 날짜 오름차순으로. since 가 있으면 그 날짜부터"""
+        rows = rows[::-1]
+        if since:
+            rows = rows[rows["date"] >= since]
+        return rows
+
+    def _to_rows(self, columns):
+        """컬럼 배열 → [{"date", "open", "high", "low", "close", "volume", "amount"}]"""
+        dates = columns["date"].astype(str)
+        values = {column: columns[column].tolist() for column in COLUMNS if column != "date"}
+        return [
+            {"date": date, **{column: values[column][i] for column in values}}
+            for i, date in enumerate(dates.tolist())
+        ]
@@ -1,14 +1,25 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import httpx
 import json
-import socket
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 import re
 from datetime import datetime, timedelta
+from kiwoom_client import kiwoom, get_price_data, get_short_data, get_invest_data, get_price_batch, get_short_batch, get_invest_batch
+from stock_symbols import symbols, resolve_code
+from single_flight import coalesce, flights
+from stock_matcher import match_stock
+from ollama_client import ollama, OllamaError
+from sse import sse_response
+from llm_cache import llm_cache
+from prompt_builder import compose_prompt, price_stats, price_table, short_stats, short_table, invest_stats, invest_table
+from stock_batch import BatchRequest, normalize_codes, batch_dates, build_items, make_batch_prompt, make_batch_fallback
+from quote_hub import quote_hub
+from metrics import span
+from app_metrics import timing_middleware, metrics_response
 
 load_dotenv()
 
@@ -23,11 +34,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 단계별 소요 시간 → Server-Timing 헤더 + /metrics
+app.middleware("http")(timing_middleware)
+
 # 설정
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-MODEL_NAME = "gemma3:4b"
-KIWOOM_HOST = "localhost"
-KIWOOM_PORT = 9999
+MODEL_NAME = ollama.model
+STOCK_SYSTEM_PROMPT = "당신은 한국의 증권앱 '마이키우Me'의 금융 전문 AI 어시스턴트입니다. 친근하고 이해하기 쉬운 한국어로 답변해주세요. 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요."
 
 class ChatMessage(BaseModel):
     role: str
@@ -45,222 +57,140 @@ class ChatResponse(BaseModel):
 
 class StockDataRequest(BaseModel):
     message: str
+    stream: Optional[bool] = False
 
-# 키움증권 소켓 통신 함수
-def receive_all(sock):
-    buffer = b""
-    while True:
-        part = sock.recv(4096)
-        if not part:
-            break
-        buffer += part
-    return buffer.decode()
-
-def get_stock_name_code_map() -> dict:
-    try:
-        sock = socket.socket()
-        sock.connect((KIWOOM_HOST, KIWOOM_PORT))
-        sock.send(b"CODEMAP")
-        result = receive_all(sock)
-        return json.loads(result)
-    except Exception as e:
-        print(f"❌ 종목코드 맵 불러오기 실패: {e}")
-        return {}
-
-def get_price_data(code: str, period: str = "1개월") -> list:
-    try:
-        sock = socket.socket()
-        sock.connect((KIWOOM_HOST, KIWOOM_PORT))
-        sock.send(f"{code}|{period}".encode())
-        result = receive_all(sock)
-        print(f"📅 주가 데이터 수신: {result}")
-        return json.loads(result)
-    except Exception as e:
-        print(f"❌ 주가 데이터 수집 실패: {e}")
-        return []
-
-def get_short_data(code: str, start: str, end: str) -> list:
-    try:
-        sock = socket.socket()
-        sock.connect((KIWOOM_HOST, KIWOOM_PORT))
-        sock.send(f"SHORT|{code}|{start}|{end}".encode())
-        result = receive_all(sock)
-        return json.loads(result)
-    except Exception as e:
-        print(f"❌ 공매도 데이터 수집 실패: {e}")
-        return []
-
-def get_invest_data(code: str, from_date: str, to_date: str) -> list:
-    try:
-        sock = socket.socket()
-        sock.connect((KIWOOM_HOST, KIWOOM_PORT))
-        sock.send(f"INST|{code}|{from_date}|{to_date}".encode())
-        result = receive_all(sock)
-        return json.loads(result)
-    except Exception as e:
-        print(f"❌ 투자자 동향 데이터 수집 실패: {e}")
-        return []
-
-# 프롬프트 생성 함수들
+# 프롬프트 생성 함수들 (전체 행 대신 요약 통계 + 토큰 예산에 맞춘 표)
 def make_price_prompt(stock_name, price_data):
     if not price_data:
         return f"{stock_name}의 주가 데이터를 찾을 수 없습니다."
     
-    # 데이터에서 종목코드 제거
-    clean_data = []
-    for item in price_data:
-        clean_item = item.copy()
-        if 'code' in clean_item:
-            del clean_item['code']
-        clean_data.append(clean_item)
-    
-    oldest = clean_data[0]
-    latest = clean_data[-1]
-    return (
-        f"{stock_name}의 최근 1개월 주가 추이를 알려줘.\n"
-        f"처음 날짜는 {oldest['date']}일에 {oldest['close']}원이었고, "
-        f"가장 최근은 {latest['date']}일에 {latest['close']}원이야.\n"
-        f"전체 데이터: {clean_data}\n"
-        f"이 데이터를 바탕으로 간단하고 친절하게 추이를 설명해줘."
+    return compose_prompt(
+        f"{stock_name}의 최근 주가 추이를 알려줘.",
+        price_stats(price_data),
+        price_table(price_data),
+        "이 데이터를 바탕으로 간단하고 친절하게 추이를 설명해줘."
     )
 
 def make_short_prompt(stock_name, short_data):
     if not short_data:
         return f"{stock_name}의 공매도 데이터를 찾을 수 없습니다."
     
-    # 데이터에서 종목코드 제거
-    clean_data = []
-    for item in short_data:
-        clean_item = item.copy()
-        if 'code' in clean_item:
-            del clean_item['code']
-        clean_data.append(clean_item)
-    
-    # 데이터 구조 확인 및 요약
-    if len(clean_data) > 0:
-        latest_data = clean_data[-1]  # 가장 최근 데이터
-        oldest_data = clean_data[0]   # 가장 오래된 데이터
-        
-        return (
-            f"{stock_name}의 공매도 현황을 분석해줘.\n"
-            f"데이터 기간: {oldest_data.get('date', 'N/A')} ~ {latest_data.get('date', 'N/A')}\n"
-            f"최근 공매도 잔고: {latest_data.get('balance', 'N/A')}주\n"
-            f"최근 공매도 비율: {latest_data.get('ratio', 'N/A')}%\n"
-            f"전체 데이터: {clean_data}\n"
-            f"이 정보를 바탕으로 {stock_name}의 공매도 동향을 친근하고 이해하기 쉽게 설명해주세요."
-        )
-    
-    return (
-        f"{stock_name}의 공매도 데이터를 분석해줘.\n"
-        f"데이터: {clean_data}\n"
-        f"이 정보를 바탕으로 공매도 동향을 요약해서 알려주세요."
+    return compose_prompt(
+        f"{stock_name}의 공매도 현황을 분석해줘.",
+        short_stats(short_data),
+        short_table(short_data),
+        f"이 정보를 바탕으로 {stock_name}의 공매도 동향을 친근하고 이해하기 쉽게 설명해주세요."
     )
 
 def make_invest_prompt(stock_name, invest_data):
     if not invest_data:
         return f"{stock_name}의 투자자 기관 데이터를 찾을 수 없습니다."
     
-    # 데이터에서 종목코드 제거
-    clean_data = []
-    for item in invest_data:
-        clean_item = item.copy()
-        if 'code' in clean_item:
-            del clean_item['code']
-        clean_data.append(clean_item)
-    
-    return (
-        f"{stock_name}의 투자자 기관 동향을 분석해줘.\n"
-        f"전체 데이터: {clean_data}\n"
+    return compose_prompt(
+        f"{stock_name}의 투자자 기관 동향을 분석해줘.",
+        invest_stats(invest_data),
+        invest_table(invest_data),
         f"이 정보를 바탕으로 {stock_name}의 투자자 동향을 친근하고 이해하기 쉽게 설명해주세요. "
         f"기관계의 매매 패턴과 그 의미를 분석해주세요. "
         f"양수는 매수, 음수는 매도를 의미합니다."
     )
 
+@app.on_event("startup")
+async def load_symbols():
+    await symbols.ensure_loaded()
+
+@app.on_event("shutdown")
+async def close_clients():
+    await quote_hub.close()
+    await ollama.aclose()
+    await kiwoom.close()
+
 @app.get("/")
 async def root():
     return {"message": "마이키우Me 통합 API가 실행 중입니다!"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus 메트릭 (단계별 지연, 캐시 적중, LLM 토큰, 브릿지 TR 큐 대기 / 왕복)"""
+    return await metrics_response()
+
 @app.get("/health")
 async def health_check():
     """헬스 체크 엔드포인트"""
     try:
         # Ollama 연결 확인
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            ollama_status = "connected" if response.status_code == 200 else "disconnected"
+        try:
+            await ollama.tags()
+            ollama_status = "connected"
+        except (httpx.HTTPError, OllamaError):
+            ollama_status = "disconnected"
         
         # 키움증권 서버 연결 확인
-        try:
-            sock = socket.socket()
-            sock.connect((KIWOOM_HOST, KIWOOM_PORT))
-            sock.close()
-            kiwoom_status = "connected"
-        except:
-            kiwoom_status = "disconnected"
+        kiwoom_status = "connected" if await kiwoom.ping() else "disconnected"
+
+        # 브릿지 TR 큐 깊이 / 조회 제한 상태
+        kiwoom_queue = None
+        if kiwoom_status == "connected":
+            try:
+                kiwoom_queue = await kiwoom.request("STATUS", timeout=3.0)
+            except Exception as e:
+                kiwoom_queue = {"error": str(e)}
         
         return {
             "status": "healthy" if ollama_status == "connected" and kiwoom_status == "connected" else "unhealthy",
             "ollama": ollama_status,
-            "kiwoom": kiwoom_status
+            "kiwoom": kiwoom_status,
+            "kiwoom_pool": kiwoom.health(),
+            "kiwoom_queue": kiwoom_queue,
+            "llm_cache": llm_cache.stats(),
+            "quotes": quote_hub.stats(),
+            "single_flight": flights.stats()
         }
     except Exception as e:
         return {"status": "unhealthy", "error": str(e)}
 
 @app.get("/price/{code}")
-async def get_price_data_endpoint(code: str, period: str = "1개월"):
+@coalesce("price", code=resolve_code)
+async def get_price_data_endpoint(code: str, period: str = "1개월", stream: bool = False):
     """주가 데이터 조회"""
     try:
-        stock_map = get_stock_name_code_map()
-        # 종목코드를 정규화 (6자리로 패딩)
-        normalized_code = code.zfill(6)
+        await symbols.ensure_loaded()
+        # 종목명 / 종목코드 → 6자리 종목코드 (합쳐진 요청이 모두 같은 응답을 받도록)
+        normalized_code = resolve_code(code)
         
         # 종목명 찾기
-        stock_name = None
-        for name, stock_code in stock_map.items():
-            if stock_code == normalized_code:
-                stock_name = name
-                break
+        stock_name = symbols.name_of(normalized_code)
         
         if not stock_name:
             return {"error": "종목을 찾을 수 없습니다."}
         
-        price_data = get_price_data(normalized_code, period)
+        price_data = await get_price_data(normalized_code, period)
         
         if not price_data:
             return {"error": "주가 데이터를 가져올 수 없습니다."}
         
         # LLM으로 요약 생성
-        prompt = make_price_prompt(stock_name, price_data)
+        with span("prompt"):
+            prompt = make_price_prompt(stock_name, price_data)
         
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
-            try:
-                response = await client.post(
-                    f"{OLLAMA_BASE_URL}/api/chat",
-                    json={
-                        "model": MODEL_NAME,
-                        "messages": [
-                            {"role": "system", "content": "당신은 한국의 증권앱 '마이키우Me'의 금융 전문 AI 어시스턴트입니다. 친근하고 이해하기 쉬운 한국어로 답변해주세요. 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        summary = result.get("message", {}).get("content", response.text)
-                    except Exception:
-                        summary = f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                else:
-                    summary = f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                    
-            except httpx.TimeoutException:
-                summary = f"{stock_name}의 주가 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
-            except httpx.ConnectError:
-                summary = f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
-            except Exception as e:
-                summary = f"{stock_name}의 주가 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
+        messages = [
+            {"role": "system", "content": STOCK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        if stream:
+            return sse_response({"data": price_data}, ollama.stream_chat(messages, cache=True), f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다.")
+        
+        try:
+            result = await ollama.chat(messages, cache=True)
+            summary = result.get("message", {}).get("content", "")
+        except httpx.TimeoutException:
+            summary = f"{stock_name}의 주가 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
+        except httpx.ConnectError:
+            summary = f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
+        except OllamaError:
+            summary = f"{stock_name}의 주가 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
+        except Exception as e:
+            summary = f"{stock_name}의 주가 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
         
         return {"summary": summary, "data": price_data}
         
@@ -268,19 +198,16 @@ async def get_price_data_endpoint(code: str, period: str = "1개월"):
         raise HTTPException(status_code=500, detail=f"주가 데이터 조회 실패: {str(e)}")
 
 @app.get("/short/{code}")
-async def get_short_sale_data_endpoint(code: str, start_date: str = None, end_date: str = None):
+@coalesce("short", code=resolve_code)
+async def get_short_sale_data_endpoint(code: str, start_date: str = None, end_date: str = None, stream: bool = False):
     """공매도 데이터 조회"""
     try:
-        stock_map = get_stock_name_code_map()
-        # 종목코드를 정규화 (6자리로 패딩)
-        normalized_code = code.zfill(6)
+        await symbols.ensure_loaded()
+        # 종목명 / 종목코드 → 6자리 종목코드 (합쳐진 요청이 모두 같은 응답을 받도록)
+        normalized_code = resolve_code(code)
         
         # 종목명 찾기
-        stock_name = None
-        for name, stock_code in stock_map.items():
-            if stock_code == normalized_code:
-                stock_name = name
-                break
+        stock_name = symbols.name_of(normalized_code)
         
         if not stock_name:
             return {"error": "종목을 찾을 수 없습니다."}
@@ -289,43 +216,33 @@ async def get_short_sale_data_endpoint(code: str, start_date: str = None, end_da
         start_date_formatted = start_date.replace("-", "")
         end_date_formatted = end_date.replace("-", "")
         
-        short_data = get_short_data(normalized_code, start_date_formatted, end_date_formatted)
+        short_data = await get_short_data(normalized_code, start_date_formatted, end_date_formatted)
         
         if not short_data:
             return {"error": "공매도 데이터를 가져올 수 없습니다."}
         
         # LLM으로 요약 생성
-        prompt = make_short_prompt(stock_name, short_data)
+        with span("prompt"):
+            prompt = make_short_prompt(stock_name, short_data)
         
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
-            try:
-                response = await client.post(
-                    f"{OLLAMA_BASE_URL}/api/chat",
-                    json={
-                        "model": MODEL_NAME,
-                        "messages": [
-                            {"role": "system", "content": "당신은 한국의 증권앱 '마이키우Me'의 금융 전문 AI 어시스턴트입니다. 친근하고 이해하기 쉬운 한국어로 답변해주세요. 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        summary = result.get("message", {}).get("content", response.text)
-                    except Exception:
-                        summary = f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                else:
-                    summary = f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                    
-            except httpx.TimeoutException:
-                summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
-            except httpx.ConnectError:
-                summary = f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
-            except Exception as e:
-                summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
+        messages = [
+            {"role": "system", "content": STOCK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        if stream:
+            return sse_response({"data": short_data}, ollama.stream_chat(messages, cache=True), f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다.")
+        
+        try:
+            result = await ollama.chat(messages, cache=True)
+            summary = result.get("message", {}).get("content", "")
+        except httpx.TimeoutException:
+            summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
+        except httpx.ConnectError:
+            summary = f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
+        except OllamaError:
+            summary = f"{stock_name}의 공매도 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
+        except Exception as e:
+            summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
         
         return {"summary": summary, "data": short_data}
         
@@ -333,19 +250,16 @@ async def get_short_sale_data_endpoint(code: str, start_date: str = None, end_da
         raise HTTPException(status_code=500, detail=f"공매도 데이터 조회 실패: {str(e)}")
 
 @app.get("/invest/{code}")
-async def get_invest_data_endpoint(code: str, from_date: str = None, to_date: str = None):
+@coalesce("invest", code=resolve_code)
+async def get_invest_data_endpoint(code: str, from_date: str = None, to_date: str = None, stream: bool = False):
     """투자자 기관 데이터 조회"""
     try:
-        stock_map = get_stock_name_code_map()
-        # 종목코드를 정규화 (6자리로 패딩)
-        normalized_code = code.zfill(6)
+        await symbols.ensure_loaded()
+        # 종목명 / 종목코드 → 6자리 종목코드 (합쳐진 요청이 모두 같은 응답을 받도록)
+        normalized_code = resolve_code(code)
         
         # 종목명 찾기
-        stock_name = None
-        for name, stock_code in stock_map.items():
-            if stock_code == normalized_code:
-                stock_name = name
-                break
+        stock_name = symbols.name_of(normalized_code)
         
         if not stock_name:
             return {"error": "종목을 찾을 수 없습니다."}
@@ -359,64 +273,109 @@ async def get_invest_data_endpoint(code: str, from_date: str = None, to_date: st
             from_date = from_date.replace("-", "")
             to_date = to_date.replace("-", "")
         
-        invest_data = get_invest_data(normalized_code, from_date, to_date)
+        invest_data = await get_invest_data(normalized_code, from_date, to_date)
         
         if not invest_data:
             return {"error": "투자자 기관 데이터를 가져올 수 없습니다."}
         
         # LLM으로 요약 생성
-        prompt = make_invest_prompt(stock_name, invest_data)
+        with span("prompt"):
+            prompt = make_invest_prompt(stock_name, invest_data)
         
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
-            try:
-                response = await client.post(
-                    f"{OLLAMA_BASE_URL}/api/chat",
-                    json={
-                        "model": MODEL_NAME,
-                        "messages": [
-                            {"role": "system", "content": "당신은 한국의 증권앱 '마이키우Me'의 금융 전문 AI 어시스턴트입니다. 친근하고 이해하기 쉬운 한국어로 답변해주세요. 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": False
-                    }
-                )
-                
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        summary = result.get("message", {}).get("content", response.text)
-                    except Exception:
-                        summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                else:
-                    summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                    
-            except httpx.TimeoutException:
-                summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
-            except httpx.ConnectError:
-                summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
-            except Exception as e:
-                summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
+        messages = [
+            {"role": "system", "content": STOCK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        if stream:
+            return sse_response({"data": invest_data}, ollama.stream_chat(messages, cache=True), f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다.")
+        
+        try:
+            result = await ollama.chat(messages, cache=True)
+            summary = result.get("message", {}).get("content", "")
+        except httpx.TimeoutException:
+            summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
+        except httpx.ConnectError:
+            summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
+        except OllamaError:
+            summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
+        except Exception as e:
+            summary = f"{stock_name}의 투자자 기관 데이터를 분석했습니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
         
         return {"summary": summary, "data": invest_data}
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"투자자 기관 데이터 조회 실패: {str(e)}")
 
+async def batch_response(kind, codes, data_by_code, summarize, **extra):
+    """종목별 데이터 + 요약 수치, summarize=True 면 전체 종목 LLM 요약 한 번"""
+    await symbols.ensure_loaded()
+    with span("prompt"):
+        items = build_items(kind, codes, data_by_code)
+        prompt = make_batch_prompt(kind, items) if summarize else None
+    response = {**extra, "items": items}
+    if summarize:
+        messages = [
+            {"role": "system", "content": STOCK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        try:
+            result = await ollama.chat(messages, cache=True)
+            summary = result.get("message", {}).get("content", "")
+        except Exception as e:
+            print(f"LLM 분석 실패: {e}")
+            summary = ""
+        response["summary"] = summary or make_batch_fallback(kind, items)
+    return response
+
+@app.post("/price/batch")
+@coalesce("price-batch", code=resolve_code)
+async def get_price_batch_endpoint(request: BatchRequest):
+    """여러 종목 주가 데이터 일괄 조회"""
+    try:
+        await symbols.ensure_loaded()
+        codes = normalize_codes(resolve_code(code) for code in request.codes)
+        data = await get_price_batch(codes, request.period)
+        return await batch_response("price", codes, data, request.summarize, period=request.period)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"주가 데이터 일괄 조회 실패: {str(e)}")
+
+@app.post("/short/batch")
+@coalesce("short-batch", code=resolve_code)
+async def get_short_batch_endpoint(request: BatchRequest):
+    """여러 종목 공매도 데이터 일괄 조회"""
+    try:
+        await symbols.ensure_loaded()
+        codes = normalize_codes(resolve_code(code) for code in request.codes)
+        start_date, end_date = batch_dates(request.start_date, request.end_date)
+        data = await get_short_batch(codes, start_date, end_date)
+        return await batch_response("short", codes, data, request.summarize, start_date=start_date, end_date=end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"공매도 데이터 일괄 조회 실패: {str(e)}")
+
+@app.post("/invest/batch")
+@coalesce("invest-batch", code=resolve_code)
+async def get_invest_batch_endpoint(request: BatchRequest):
+    """여러 종목 투자자 기관 데이터 일괄 조회"""
+    try:
+        await symbols.ensure_loaded()
+        codes = normalize_codes(resolve_code(code) for code in request.codes)
+        from_date, to_date = batch_dates(request.start_date, request.end_date)
+        data = await get_invest_batch(codes, from_date, to_date)
+        return await batch_response("invest", codes, data, request.summarize, from_date=from_date, to_date=to_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"투자자 기관 데이터 일괄 조회 실패: {str(e)}")
+
 @app.get("/models")
 async def get_models():
     """사용 가능한 모델 목록 조회"""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{OLLAMA_BASE_URL}/api/tags")
-            if response.status_code == 200:
-                data = response.json()
-                return {"models": data.get("models", [])}
-            else:
-                raise HTTPException(status_code=500, detail="Ollama 서버에 연결할 수 없습니다")
+        data = await ollama.tags()
+        return {"models": data.get("models", [])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"모델 목록 조회 실패: {str(e)}")
 
 @app.post("/chat", response_model=ChatResponse)
+@coalesce("chat")
 async def chat_with_gemma(request: ChatRequest):
     """Gemma3:4b 모델과 채팅"""
     try:
@@ -442,51 +401,43 @@ async def chat_with_gemma(request: ChatRequest):
         messages = [{"role": "system", "content": system_prompt}]
         messages.extend([{"role": msg.role, "content": msg.content} for msg in request.messages])
         
-        # Ollama API 요청 데이터 준비
-        ollama_request = {
-            "model": request.model,
-            "messages": messages,
-            "stream": request.stream
-        }
+        if request.stream:
+            return sse_response(
+                {"model": request.model},
+                ollama.stream_chat(messages, model=request.model),
+                "죄송합니다. AI 서버에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요."
+            )
         
-        # 타임아웃을 30초로 줄이고 연결 타임아웃도 설정
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
-            try:
-                response = await client.post(
-                    f"{OLLAMA_BASE_URL}/api/chat",
-                    json=ollama_request
-                )
-                
-                if response.status_code != 200:
-                    # Ollama 서버 오류 시 기본 응답 반환
-                    return ChatResponse(
-                        response="죄송합니다. AI 서버에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요.",
-                        model=request.model,
-                        usage=None
-                    )
-                
-                result = response.json()
-                
-                return ChatResponse(
-                    response=result.get("message", {}).get("content", ""),
-                    model=result.get("model", request.model),
-                    usage=result.get("usage")
-                )
-                
-            except httpx.TimeoutException:
-                # 타임아웃 시 기본 응답 반환
-                return ChatResponse(
-                    response="죄송합니다. 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
-                    model=request.model,
-                    usage=None
-                )
-            except httpx.ConnectError:
-                # 연결 오류 시 기본 응답 반환
-                return ChatResponse(
-                    response="죄송합니다. AI 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요.",
-                    model=request.model,
-                    usage=None
-                )
+        try:
+            result = await ollama.chat(messages, model=request.model)
+            
+            return ChatResponse(
+                response=result.get("message", {}).get("content", ""),
+                model=result.get("model", request.model),
+                usage=result.get("usage")
+            )
+            
+        except OllamaError:
+            # Ollama 서버 오류 시 기본 응답 반환
+            return ChatResponse(
+                response="죄송합니다. AI 서버에 일시적인 문제가 있습니다. 잠시 후 다시 시도해주세요.",
+                model=request.model,
+                usage=None
+            )
+        except httpx.TimeoutException:
+            # 타임아웃 시 기본 응답 반환
+            return ChatResponse(
+                response="죄송합니다. 응답 시간이 초과되었습니다. 잠시 후 다시 시도해주세요.",
+                model=request.model,
+                usage=None
+            )
+        except httpx.ConnectError:
+            # 연결 오류 시 기본 응답 반환
+            return ChatResponse(
+                response="죄송합니다. AI 서버에 연결할 수 없습니다. 서버 상태를 확인해주세요.",
+                model=request.model,
+                usage=None
+            )
             
     except Exception as e:
         # 기타 예외 시 기본 응답 반환
@@ -497,68 +448,62 @@ async def chat_with_gemma(request: ChatRequest):
         )
 
 @app.post("/stock-chat")
+@coalesce("stock-chat")
 async def stock_chat(request: StockDataRequest):
     """주식 데이터 기반 채팅"""
     try:
         user_message = request.message.strip()
-        stock_map = get_stock_name_code_map()
-        matched_name = next((name for name in stock_map if name in user_message), None)
+        stream = request.stream
+        await symbols.ensure_loaded()
+        matched = match_stock(user_message)
 
-        if not matched_name:
+        if not matched:
             return {"response": "어떤 종목에 대한 이야기인지 잘 모르겠어요. 종목명을 정확히 입력해 주세요."}
 
-        code = stock_map[matched_name]
+        matched_name, code = matched
 
         # 분기: 주가 / 공매도 / 수급
         if re.search(r"(주가|가격|차트|그래프)", user_message):
-            price_data = get_price_data(code)
-            prompt = make_price_prompt(matched_name, price_data)
+            price_data = await get_price_data(code)
+            with span("prompt"):
+                prompt = make_price_prompt(matched_name, price_data)
 
         elif re.search(r"(공매도|숏)", user_message):
             from_date = (datetime.today() - timedelta(days=10)).strftime("%Y%m%d")
             to_date = datetime.today().strftime("%Y%m%d")
-            short_data = get_short_data(code, from_date, to_date)
-            prompt = make_short_prompt(matched_name, short_data)
+            short_data = await get_short_data(code, from_date, to_date)
+            with span("prompt"):
+                prompt = make_short_prompt(matched_name, short_data)
 
         elif re.search(r"(수급|기관|외국인|개인)", user_message):
             from_date = (datetime.today() - timedelta(days=10)).strftime("%Y%m%d")
             to_date = datetime.today().strftime("%Y%m%d")
-            invest_data = get_invest_data(code, from_date, to_date)
-            prompt = make_invest_prompt(matched_name, invest_data)
+            invest_data = await get_invest_data(code, from_date, to_date)
+            with span("prompt"):
+                prompt = make_invest_prompt(matched_name, invest_data)
 
         else:
             return {"response": f"{matched_name}에 대해 어떤 정보를 원하시는지 조금 더 구체적으로 말씀해 주세요. 예: 주가, 공매도, 수급 등"}
 
         # LLM 서버 호출
-        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0, connect=10.0)) as client:
-            try:
-                response = await client.post(
-                    f"{OLLAMA_BASE_URL}/api/chat",
-                    json={
-                        "model": MODEL_NAME,
-                        "messages": [
-                            {"role": "system", "content": "당신은 한국의 증권앱 '마이키우Me'의 금융 전문 AI 어시스턴트입니다. 친근하고 이해하기 쉬운 한국어로 답변해주세요. 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        "stream": False
-                    }
-                )
-
-                if response.status_code == 200:
-                    try:
-                        result = response.json()
-                        llm_text = result.get("message", {}).get("content", response.text)
-                    except Exception:
-                        llm_text = response.text  # fallback
-                else:
-                    llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
-                    
-            except httpx.TimeoutException:
-                llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
-            except httpx.ConnectError:
-                llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
-            except Exception as e:
-                llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
+        messages = [
+            {"role": "system", "content": STOCK_SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        if stream:
+            return sse_response({"stock_name": matched_name, "code": code}, ollama.stream_chat(messages, cache=True), f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다.")
+        
+        try:
+            result = await ollama.chat(messages, cache=True)
+            llm_text = result.get("message", {}).get("content", "")
+        except httpx.TimeoutException:
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
+        except httpx.ConnectError:
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 연결할 수 없어 상세 분석을 제공할 수 없습니다."
+        except OllamaError:
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
+        except Exception as e:
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. 오류가 발생하여 상세 분석을 제공할 수 없습니다: {str(e)}"
 
         return {"response": llm_text}
 
@@ -569,33 +514,20 @@ async def stock_chat(request: StockDataRequest):
 async def generate_text(prompt: str, model: str = MODEL_NAME):
     """텍스트 생성 엔드포인트"""
     try:
-        ollama_request = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False
+        text = await ollama.generate(prompt, model=model)
+        return {
+            "response": text,
+            "model": model
         }
-        
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.post(
-                f"{OLLAMA_BASE_URL}/api/generate",
-                json=ollama_request
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(
-                    status_code=500, 
-                    detail=f"Ollama API 오류: {response.text}"
-                )
-            
-            result = response.json()
-            return {
-                "response": result.get("response", ""),
-                "model": result.get("model", model)
-            }
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"텍스트 생성 실패: {str(e)}")
 
+@app.websocket("/ws/quotes")
+async def quotes_socket(websocket: WebSocket):
+    """실시간 시세 구독 (quote_hub 참고)"""
+    await quote_hub.serve(websocket)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001) 
\ No newline at end of file
@@ -20,11 +20,16 @@ class KiwoomApp:
         
         self.login_state = False
         self.tr_handlers = {}  # RQName → 콜백함수 저장소
+        self.msg_handlers = {}  # RQName → 서버 메시지 콜백
+        self.real_handler = None  # 실시간 시세 콜백 (real_feed.RealFeed.on_real_data)
+        self.tr_budget = None  # TR 조회 제한 (tr_scheduler.TrBudget)
 
         # 이벤트 연결 (안전한 방식으로)
         try:
             self.ocx.OnEventConnect.connect(self._on_event_connect)
             self.ocx.OnReceiveTrData.connect(self._on_receive_tr_data)
+            self.ocx.OnReceiveMsg.connect(self._on_receive_msg)
+            self.ocx.OnReceiveRealData.connect(self._on_receive_real_data)
             print("✅ 이벤트 연결 성공")
         except Exception as e:
             print(f"❌ 이벤트 연결 실패: {e}")
@@ -38,6 +43,8 @@ class KiwoomApp:
             self.ocx.dynamicCall("OnEventConnect(int)", self._on_event_connect)
             self.ocx.dynamicCall("OnReceiveTrData(QString, QString, QString, QString, QString, QString, QString, QString)", 
                                 self._on_receive_tr_data)
+            self.ocx.dynamicCall("OnReceiveMsg(QString, QString, QString, QString)", self._on_receive_msg)
+            self.ocx.dynamicCall("OnReceiveRealData(QString, QString, QString)", self._on_receive_real_data)
             print("✅ 대체 방법으로 이벤트 연결 성공")
         except Exception as e:
             print(f"❌ 대체 이벤트 연결도 실패: {e}")
@@ -64,10 +71,70 @@ class KiwoomApp:
         """RQName에 대응하는 핸들러 등록"""
         self.tr_handlers[rqname] = handler_func
 
+    @staticmethod
+    def _base_rqname(rqname):
+        """요청별 순번을 뗀 RQName ("opt10081_req#12" → "opt10081_req", base_collector.RQNAME_SEP)"""
+        return rqname.split("#", 1)[0]
+
     def _on_receive_tr_data(self, scr_no, rqname, trcode, recordname, prev_next, *args):
         """모든 TR 응답을 중앙에서 처리하고 RQName으로 분기"""
-        handler = self.tr_handlers.get(rqname)
+        handler = self.tr_handlers.get(self._base_rqname(rqname))
         if handler:
             handler(scr_no, rqname, trcode, recordname, prev_next, *args)
         else:
-            print(f"[⚠️ No handler] {rqname}에 대한 핸들러가 등록되지 않았습니다.")
\ No newline at end of file
+            print(f"[⚠️ No handler] {rqname}에 대한 핸들러가 등록되지 않았습니다.")
+
+    def acquire_tr(self):
+        """CommRqData 직전 호출: 조회 제한에 걸리면 Qt 이벤트를 처리하며 대기"""
+        if self.tr_budget is not None:
+            self.tr_budget.acquire(idle=self.app.processEvents)
+
+    def set_msg_handler(self, rqname, handler_func):
+        """RQName에 대응하는 서버 메시지(OnReceiveMsg) 핸들러 등록"""
+        self.msg_handlers[rqname] = handler_func
+
+    def _on_receive_msg(self, scr_no, rqname, trcode, msg):
+        """TR 처리 결과 메시지 (조회 완료, 조회 제한 초과 등)"""
+        print(f"[📨 서버 메시지] {rqname} ({trcode}): {msg}")
+        handler = self.msg_handlers.get(self._base_rqname(rqname))
+        if handler:
+            handler(scr_no, rqname, trcode, msg)
+
+    def set_real_handler(self, handler_func):
+        """실시간 시세(OnReceiveRealData) 핸들러 등록"""
+        self.real_handler = handler_func
+
+    def set_real_reg(self, screen_no, codes, fids, opt_type="1"):
+        """실시간 등록 (opt_type "1": 화면의 기존 등록에 추가, "0": 교체)"""
+        return self.ocx.dynamicCall(
+            "SetRealReg(QString, QString, QString, QString)",
+            screen_no, ";".join(codes), ";".join(str(fid) for fid in fids), opt_type,
+        )
+
+    def set_real_remove(self, screen_no, code):
+        """실시간 해지 (code 가 "ALL" 이면 화면 전체)"""
+        self.ocx.dynamicCall("SetRealRemove(QString, QString)", screen_no, code)
+
+    def get_comm_real_data(self, code, fid):
+        """OnReceiveRealData 안에서만 유효"""
+        return self.ocx.dynamicCall("GetCommRealData(QString, int)", code, fid)
+
+    def _on_receive_real_data(self, code, real_type, real_data):
+        if self.real_handler:
+            self.real_handler(code, real_type, real_data)
+
+    def get_symbol_master(self):
+        """코스피 + 코스닥 전 종목 {종목코드: {종목명, 시장, 상장일, 상장주식수}}"""
+        symbols = {}
+        for market, market_name in [("0", "KOSPI"), ("10", "KOSDAQ")]:
+            codes = self.ocx.dynamicCall("GetCodeListByMarket(QString)", market).split(";")
+            for code in codes:
+                if not code:
+                    continue
+                symbols[code] = {
+                    "name": self.ocx.dynamicCall("GetMasterCodeName(QString)", code),
+                    "market": market_name,
+                    "listed_date": self.ocx.dynamicCall("GetMasterListedStockDate(QString)", code),
+                    "listed_shares": int(self.ocx.dynamicCall("GetMasterListedStockCnt(QString)", code) or 0),
+                }
+        return symbols
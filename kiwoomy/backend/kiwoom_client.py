@@ -0,0 +1,347 @@
+##### 키움 브릿지 비동기 클라이언트 #####
+
+"""
+server.py(키움 브릿지)와 프레임 프로토콜로 통신하는 asyncio 커넥션 풀
+
+- 연결을 재사용하며 한 연결에 여러 요청을 동시에 실어 보냄 (요청 id로 응답 매칭)
+- 호출별 타임아웃, 동시 요청 수 제한(백프레셔), 연결 상태(health) 추적
+- 같은 명령이 이미 진행 중이면 브릿지에 다시 보내지 않고 그 응답을 함께 기다림 (single-flight)
+- 요청마다 브릿지 왕복(kiwoom) / 응답 프레임 해석(decode) 시간을 metrics 에 기록
+- main.py / integrated_server.py 가 공유
+"""
+
+import asyncio
+import itertools
+import os
+import time
+
+from kiwoom_protocol import FrameDecoder, ProtocolError, encode_frame, make_request
+from metrics import record, span
+from single_flight import flights
+
+KIWOOM_HOST = os.getenv("KIWOOM_HOST", "localhost")
+KIWOOM_PORT = int(os.getenv("KIWOOM_PORT", "9999"))
+KIWOOM_POOL_SIZE = int(os.getenv("KIWOOM_POOL_SIZE", "4"))
+KIWOOM_MAX_IN_FLIGHT = int(os.getenv("KIWOOM_MAX_IN_FLIGHT", "32"))
+KIWOOM_MAX_WAITING = int(os.getenv("KIWOOM_MAX_WAITING", "256"))
+KIWOOM_TIMEOUT = float(os.getenv("KIWOOM_TIMEOUT", "60"))
+KIWOOM_BATCH_TIMEOUT_PER_CODE = float(os.getenv("KIWOOM_BATCH_TIMEOUT_PER_CODE", "5"))
+
+
+class KiwoomError(Exception):
+    """브릿지 호출 실패 (연결 오류, 타임아웃, 브릿지가 돌려준 error 응답)"""
+
+
+class _Connection:
+    """하나의 지속 연결. 응답은 읽기 태스크가 요청 id별 Future 에, 푸시(event)는 on_event 에 전달"""
+
+    def __init__(self, host, port, on_event=None):
+        self.host = host
+        self.port = port
+        self.on_event = on_event
+        self.reader = None
+        self.writer = None
+        self.pending = {}
+        self.decode_seconds = {}  # 요청 id → 응답 프레임 해석 시간
+        self.ids = itertools.count(1)
+        self.read_task = None
+        self.opening = None  # 연결 중인 Task (여러 요청이 같은 연결을 함께 기다림)
+        self.closed = True
+
+    @property
+    def connecting(self) -> bool:
+        return self.opening is not None and not self.opening.done()
+
+    async def open(self, timeout):
+        """연결 (이미 연결 중이면 그 결과를 기다림). 기다리던 쪽이 시간 초과돼도 연결 시도는 계속됨"""
+        if self.opening is None:
+            self.opening = asyncio.ensure_future(self._open(timeout))
+            self.opening.add_done_callback(lambda task: task.cancelled() or task.exception())
+        await asyncio.wait_for(asyncio.shield(self.opening), timeout)
+
+    async def _open(self, timeout):
+        self.reader, self.writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), timeout
+        )
+        self.closed = False
+        self.read_task = asyncio.create_task(self._read_loop())
+
+    async def request(self, command):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        try:
+            self.writer.write(encode_frame(make_request(request_id, command)))
+            await self.writer.drain()
+            return await future
+        finally:
+            self.pending.pop(request_id, None)
+            decode_seconds = self.decode_seconds.pop(request_id, None)
+            if decode_seconds is not None:
+                record("decode", decode_seconds)
+
+    async def _read_loop(self):
+        decoder = FrameDecoder()
+        error = ConnectionError("키움 브릿지 연결이 종료되었습니다")
+        decode_seconds = 0.0  # 응답 하나가 여러 chunk 에 걸치면 합산
+        try:
+            while True:
+                chunk = await self.reader.read(65536)
+                if not chunk:
+                    break
+                started = time.perf_counter()
+                messages = decoder.feed(chunk)
+                decode_seconds += time.perf_counter() - started
+                for message in messages:
+                    if "event" in message:
+                        if self.on_event:
+                            self.on_event(message)
+                        continue
+                    future = self.pending.get(message.get("id"))
+                    if future and not future.done():
+                        self.decode_seconds[message.get("id")] = decode_seconds
+                        future.set_result(message)
+                    decode_seconds = 0.0
+        except (OSError, ProtocolError) as e:
+            error = e
+        finally:
+            self._fail_pending(error)
+            self.close()
+
+    def _fail_pending(self, error):
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self.pending.clear()
+
+    def close(self):
+        self.closed = True
+        if self.writer:
+            self.writer.close()
+
+
+class KiwoomClient:
+    def __init__(self, host=KIWOOM_HOST, port=KIWOOM_PORT, pool_size=KIWOOM_POOL_SIZE,
+                 max_in_flight=KIWOOM_MAX_IN_FLIGHT, max_waiting=KIWOOM_MAX_WAITING,
+                 timeout=KIWOOM_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.max_waiting = max_waiting
+        self.timeout = timeout
+        self._connections = []
+        self.max_in_flight = max_in_flight
+        self._semaphore = None  # 실행 중인 이벤트 루프에서 처음 쓸 때 생성 (import 시 만들면 다른 루프에 묶임)
+        self._waiting = 0
+
+        # 상태 추적
+        self.total_requests = 0
+        self.total_failures = 0
+        self.consecutive_failures = 0
+        self.last_error = None
+        self.last_success_at = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    async def _acquire_connection(self, timeout):
+        # 연결 중인 연결도 풀 크기에 포함 (동시 요청마다 소켓을 새로 열지 않도록), 실제로 닫힌 연결만 제외
+        self._connections = [c for c in self._connections if c.connecting or not c.closed]
+        if len(self._connections) < self.pool_size:
+            conn = _Connection(self.host, self.port)
+            self._connections.append(conn)
+        else:
+            # 열린 연결 중 진행 중 요청이 가장 적은 연결 선택 (모두 연결 중이면 그 연결을 기다림)
+            conn = min(self._connections, key=lambda c: (c.connecting, len(c.pending)))
+        if conn.closed:
+            await conn.open(timeout)
+        return conn
+
+    async def request(self, command: str, timeout: float = None):
+        """명령 하나를 보내고 data 를 반환. 실패 시 KiwoomError (응답 data 는 합류한 요청과 공유하므로 수정하지 말 것)"""
+        command = "|".join(part.strip() for part in command.strip().split("|"))
+        with span("kiwoom", command.split("|")[0].upper()):
+            return await flights.do(("kiwoom", command), lambda: self._request(command, timeout))
+
+    async def _request(self, command: str, timeout: float = None):
+        timeout = self.timeout if timeout is None else timeout
+        if self._waiting >= self.max_waiting:
+            raise KiwoomError(f"키움 요청 대기열 초과 ({self._waiting}건)")
+
+        self._waiting += 1
+        self.total_requests += 1
+        started = time.monotonic()
+        try:
+            async with self.semaphore:
+                remaining = max(timeout - (time.monotonic() - started), 0.001)
+                conn = await self._acquire_connection(remaining)
+                remaining = max(timeout - (time.monotonic() - started), 0.001)
+                response = await asyncio.wait_for(conn.request(command), remaining)
+        except asyncio.TimeoutError:
+            self._record_failure(f"타임아웃 ({timeout}s): {command}")
+            raise KiwoomError(f"키움 응답 시간 초과: {command}")
+        except OSError as e:
+            self._record_failure(str(e))
+            raise KiwoomError(f"키움 서버 연결 실패: {e}")
+        except ProtocolError as e:
+            self._record_failure(str(e))
+            raise KiwoomError(f"키움 응답 프레임 오류: {e}")
+        finally:
+            self._waiting -= 1
+
+        self._record_success()
+        if "error" in response:
+            raise KiwoomError(response["error"])
+        return response.get("data")
+
+    async def open_stream(self, on_event, timeout: float = None) -> _Connection:
+        """실시간 틱 푸시(SUBSCRIBE)를 받는 전용 연결 (풀과 분리, 호출자가 close)"""
+        conn = _Connection(self.host, self.port, on_event=on_event)
+        await conn.open(self.timeout if timeout is None else timeout)
+        return conn
+
+    async def ping(self, timeout: float = 3.0) -> bool:
+        """풀에서 연결을 확보할 수 있는지 확인"""
+        try:
+            await self._acquire_connection(timeout)
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            self._record_failure(str(e))
+            return False
+
+    def _record_success(self):
+        self.consecutive_failures = 0
+        self.last_success_at = time.time()
+
+    def _record_failure(self, message):
+        self.total_failures += 1
+        self.consecutive_failures += 1
+        self.last_error = message
+
+    def health(self) -> dict:
+        open_connections = [c for c in self._connections if not c.closed]
+        return {
+            "healthy": self.consecutive_failures < 3,
+            "open_connections": len(open_connections),
+            "in_flight": sum(len(c.pending) for c in open_connections),
+            "waiting": self._waiting,
+            "total_requests": self.total_requests,
+            "total_failures": self.total_failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_success_at": self.last_success_at,
+        }
+
+    async def close(self):
+        for conn in self._connections:
+            conn.close()
+        self._connections = []
+
+
+# 앱 전체가 공유하는 클라이언트
+kiwoom = KiwoomClient()
+
+
+async def get_stock_name_code_map() -> dict:
+    try:
+        data = await kiwoom.request("CODEMAP")
+        if not isinstance(data, dict):
+            print(f"❌ 예상치 못한 데이터 형식: {type(data)}")
+            return {}
+        return data
+    except KiwoomError as e:
+        print(f"❌ 종목코드 맵 불러오기 실패: {e}")
+        return {}
+
+async def get_symbol_master(since_version=None) -> dict:
+    """종목 마스터 전체 또는 since_version 이후 변경분 (실패 시 {})"""
+    try:
+        data = await kiwoom.request(f"SYMBOLS|{'' if since_version is None else since_version}")
+        if not isinstance(data, dict) or "version" not in data:
+            print(f"❌ 예상치 못한 종목 마스터 형식: {type(data)}")
+            return {}
+        return data
+    except KiwoomError as e:
+        print(f"❌ 종목 마스터 불러오기 실패: {e}")
+        return {}
+
+async def get_price_data(code: str, period: str = "1개월") -> list:
+    try:
+        return await kiwoom.request(f"PRICE|{code}|{period}")
+    except KiwoomError as e:
+        print(f"❌ 주가 데이터 수집 실패: {e}")
+        return []
+
+async def get_short_data(code: str, start: str, end: str) -> list:
+    try:
+        return await kiwoom.request(f"SHORT|{code}|{start}|{end}")
+    except KiwoomError as e:
+        print(f"❌ 공매도 데이터 수집 실패: {e}")
+        return []
+
+async def get_invest_data(code: str, from_date: str, to_date: str) -> list:
+    try:
+        return await kiwoom.request(f"INST|{code}|{from_date}|{to_date}")
+    except KiwoomError as e:
+        print(f"❌ 투자자 동향 데이터 수집 실패: {e}")
+        return []
+
+async def get_stock_themes(code: str) -> dict:
+    """브릿지 테마 인덱스에서 종목이 속한 테마와 구성종목 (실패 시 {})"""
+    try:
+        data = await kiwoom.request(f"THEMESOF|{code}")
+        return data if isinstance(data, dict) else {}
+    except KiwoomError as e:
+        print(f"❌ 종목 테마 인덱스 조회 실패: {e}")
+        return {}
+
+async def get_theme_members(theme_code: str) -> dict:
+    """브릿지 테마 인덱스에서 테마 구성종목 (인덱스에 없거나 실패 시 {})"""
+    try:
+        data = await kiwoom.request(f"THEMEMEMBERS|{theme_code}")
+        return data if isinstance(data, dict) else {}
+    except KiwoomError as e:
+        print(f"❌ 테마 구성 인덱스 조회 실패: {e}")
+        return {}
+
+async def get_batch_data(command: str, codes: list, *args) -> dict:
+    """
+    여러 종목의 같은 명령을 BATCH 한 번으로 조회 → {종목코드: 데이터}
+    (종목별 실패는 {"error": ...}, 전체 실패는 {})
+    """
+    if not codes:
+        return {}
+    message = "|".join(["BATCH", command, ",".join(codes), *args])
+    timeout = kiwoom.timeout + KIWOOM_BATCH_TIMEOUT_PER_CODE * len(codes)
+    try:
+        data = await kiwoom.request(message, timeout=timeout)
+        if not isinstance(data, dict):
+            print(f"❌ 예상치 못한 BATCH 응답 형식: {type(data)}")
+            return {}
+        return data
+    except KiwoomError as e:
+        print(f"❌ {command} 일괄 조회 실패: {e}")
+        return {}
+
+async def get_price_batch(codes: list, period: str = "1개월") -> dict:
+    return await get_batch_data("PRICE", codes, period)
+
+async def get_short_batch(codes: list, start: str, end: str) -> dict:
+    return await get_batch_data("SHORT", codes, start, end)
+
+async def get_invest_batch(codes: list, from_date: str, to_date: str) -> dict:
+    return await get_batch_data("INST", codes, from_date, to_date)
+
+async def get_ticks(codes: list) -> dict:
+    """실시간 구독 중인 종목의 최신 틱 스냅샷 (구독 안 된 종목은 빠짐, 실패 시 {})"""
+    if not codes:
+        return {}
+    try:
+        data = await kiwoom.request(f"TICKS|{','.join(codes)}")
+        return data if isinstance(data, dict) else {}
+    except KiwoomError as e:
+        print(f"❌ 실시간 틱 조회 실패: {e}")
+        return {}
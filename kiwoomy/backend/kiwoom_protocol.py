@@ -0,0 +1,85 @@
+##### 키움 소켓 브릿지 프레이밍 프로토콜 #####
+
+"""
+하나의 연결로 여러 요청을 동시에 주고받기 위한 길이 접두 프레임 프로토콜
+
+- 프레임: 4바이트 빅엔디언 길이 + UTF-8 JSON 본문
+- 요청: {"id": 1, "cmd": "PRICE|005930|1개월", "priority": "interactive"}
+  (priority 는 선택, "background" 면 사용자 요청보다 늦게 처리)
+- 응답: {"id": 1, "data": ...} 또는 {"id": 1, "error": "..."}
+- 여러 종목: {"cmd": "BATCH|PRICE|005930,000660|1개월"} → {"data": {"005930": [...], "000660": [...]}}
+- 실시간: {"cmd": "SUBSCRIBE|005930,000660"} → {"data": {"codes": [...], "ticks": {최신 틱}}} 이후
+  같은 연결로 id 없는 푸시 {"event": "tick", "data": {"005930": {...}}} (바뀐 종목의 최신 틱만)
+
+프레임 길이는 16MB 미만이라 첫 바이트가 항상 0x00 이므로,
+기존 `|` 구분 평문 요청(첫 바이트가 문자)과 첫 바이트만으로 구분할 수 있다.
+"""
+
+import json
+import struct
+
+HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = (1 << 24) - 1  # 첫 바이트 0x00 유지
+
+# 브릿지가 처리하는 명령 목록
+COMMANDS = ("PRICE", "SHORT", "INST", "THEME", "THEMEGROUP", "MINUTE", "CODEMAP", "SYMBOLS", "SYMBOLREFRESH", "STATUS", "BATCH",
+            "THEMESOF", "THEMEMEMBERS", "THEMEREFRESH", "THEMEINDEX", "SUBSCRIBE", "UNSUBSCRIBE", "TICKS")
+
+
+class ProtocolError(Exception):
+    """프레임 형식이 잘못되었을 때 발생"""
+
+
+def is_framed(first_bytes: bytes) -> bool:
+    """연결의 첫 바이트로 프레임 프로토콜 여부 판별"""
+    return bool(first_bytes) and first_bytes[0] == 0
+
+
+def encode_frame(message: dict) -> bytes:
+    body = json.dumps(message, ensure_ascii=False).encode()
+    if len(body) > MAX_FRAME_SIZE:
+        raise ProtocolError(f"프레임 크기 초과: {len(body)} bytes")
+    return HEADER.pack(len(body)) + body
+
+
+def make_request(request_id: int, command: str, priority: str = None) -> dict:
+    request = {"id": request_id, "cmd": command}
+    if priority:
+        request["priority"] = priority
+    return request
+
+
+def make_response(request_id, data=None, error=None) -> dict:
+    if error is not None:
+        return {"id": request_id, "error": str(error)}
+    return {"id": request_id, "data": data}
+
+
+def make_event(event: str, data) -> dict:
+    """요청 없이 브릿지가 먼저 보내는 푸시 메시지"""
+    return {"event": event, "data": data}
+
+
+class FrameDecoder:
+    """수신 바이트를 누적하다가 완성된 프레임만 꺼내주는 증분 디코더"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data: bytes) -> list:
+        self.buffer.extend(data)
+        messages = []
+        while len(self.buffer) >= HEADER.size:
+            (length,) = HEADER.unpack_from(self.buffer)
+            if length > MAX_FRAME_SIZE:
+                raise ProtocolError(f"프레임 크기 초과: {length} bytes")
+            end = HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            body = bytes(self.buffer[HEADER.size:end])
+            del self.buffer[:end]
+            try:
+                messages.append(json.loads(body.decode()))
+            except ValueError as e:
+                raise ProtocolError(f"JSON 디코딩 실패: {e}")
+        return messages
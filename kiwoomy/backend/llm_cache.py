@@ -0,0 +1,137 @@
+##### LLM 응답 캐시 #####
+
+"""
+(모델 + 시스템 프롬프트 + 프롬프트) 해시를 키로 하는 LLM 응답 캐시
+
+- 메모리 LRU 1차 캐시 + 선택적 디스크 2차 캐시 (LLM_CACHE_DIR 지정 시)
+- 만료: 다음 시세 갱신 시각(MARKET_REFRESH_TIME, 기본 16:00 장 마감 후)까지,
+  단 LLM_CACHE_MAX_TTL 을 넘지 않음
+- hit / miss / eviction 통계 제공
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "512"))
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "")
+LLM_CACHE_MAX_TTL = float(os.getenv("LLM_CACHE_MAX_TTL", "86400"))
+MARKET_REFRESH_TIME = os.getenv("MARKET_REFRESH_TIME", "16:00")
+
+
+def make_key(model: str, system, prompt) -> str:
+    """prompt 는 문자열 또는 chat messages 리스트"""
+    raw = json.dumps([model, system or "", prompt], ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def seconds_until_refresh(now: datetime = None) -> float:
+    """다음 시세 갱신 시각까지 남은 초"""
+    now = now or datetime.now()
+    hour, minute = (int(x) for x in MARKET_REFRESH_TIME.split(":"))
+    refresh = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if refresh <= now:
+        refresh += timedelta(days=1)
+    return (refresh - now).total_seconds()
+
+
+class LLMResponseCache:
+    def __init__(self, max_size=LLM_CACHE_SIZE, cache_dir=LLM_CACHE_DIR, max_ttl=LLM_CACHE_MAX_TTL):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_ttl = max_ttl
+        self._memory = OrderedDict()  # key → (만료 시각, 값)
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._memory)
+
+    def _ttl(self) -> float:
+        return min(seconds_until_refresh(), self.max_ttl)
+
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._memory[key]
+
+        if self.cache_dir:
+            value = self._get_disk(key, now)
+            if value is not None:
+                self.disk_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    def _get_disk(self, key, now):
+        path = self._disk_path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        self._put_memory(key, entry["expires_at"], entry["value"])
+        return entry["value"]
+
+    def set(self, key, value):
+        if not value:
+            return
+        expires_at = time.time() + self._ttl()
+        self._put_memory(key, expires_at, value)
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), "w", encoding="utf-8") as f:
+                    json.dump({"expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+            except OSError as e:
+                print(f"⚠️ LLM 캐시 디스크 저장 실패: {e}")
+
+    def _put_memory(self, key, expires_at, value):
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "size": len(self._memory),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+
+# 앱 전체가 공유하는 캐시
+llm_cache = LLMResponseCache()
@@ -1,24 +1,30 @@
-import socket
-import json
-from fastapi import FastAPI, HTTPException, Query, Request, Body
+from fastapi import FastAPI, HTTPException, WebSocket
 from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, Request
 from pydantic import BaseModel
+from typing import Optional
 import httpx
 import traceback
 import re
-import random
-import requests
-import os
 from dotenv import load_dotenv
+from kiwoom_client import kiwoom, get_price_data, get_short_data, get_invest_data, get_price_batch, get_short_batch, get_theme_members, get_ticks
+from stock_symbols import symbols, resolve_code
+from single_flight import coalesce
+from stock_matcher import match_stock
+from ollama_client import ollama, OllamaError
+from sse import sse_response
+from theme_service import theme_service, make_theme_fallback
+from prompt_builder import compose_prompt, price_stats, price_table, short_stats, short_table, invest_stats, invest_table
+from stock_batch import BatchRequest, normalize_codes, batch_dates, build_items, make_batch_prompt, make_batch_fallback
+from quote_hub import quote_hub
+from metrics import span
+from app_metrics import timing_middleware, metrics_response
 
 load_dotenv()
 
 # 설정
-OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-MODEL_NAME = "gemma3:4b"
+MODEL_NAME = ollama.model
 
 app = FastAPI()
 
@@ -30,14 +36,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def receive_all(sock):
-    buffer = b""
-    while True:
-        part = sock.recv(4096)
-        if not part:
-            break
-        buffer += part
-    return buffer.decode()
+# 단계별 소요 시간 → Server-Timing 헤더 + /metrics
+app.middleware("http")(timing_middleware)
+
+@app.on_event("startup")
+async def load_symbols():
+    await symbols.ensure_loaded()
+
+@app.on_event("shutdown")
+async def close_clients():
+    await quote_hub.close()
+    await ollama.aclose()
+    await kiwoom.close()
 
 def format_date(yyyymmdd):
     try:
@@ -47,22 +57,18 @@ def format_date(yyyymmdd):
 
 ## 주가 일봉 조회
 @app.get("/price/{code}")
-async def get_price(code: str, period: str = "1개월"):
+@coalesce("price", code=resolve_code)
+async def get_price(code: str, period: str = "1개월", stream: bool = False):
     try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        sock.send(f"{code}|{period}".encode())
-        result = receive_all(sock)
-        print(f"📥 소켓 응답: {result}")
-        data = json.loads(result)
+        # 종목명 / 종목코드 → 6자리 종목코드 (합쳐진 요청이 모두 같은 응답을 받도록 응답에도 정규화한 코드 사용)
+        await symbols.ensure_loaded()
+        code = resolve_code(code)
 
-        if "error" in data:
-            raise Exception(data["error"])
+        data = await kiwoom.request(f"PRICE|{code}|{period}")
+        print(f"📥 키움 응답: {len(data) if isinstance(data, list) else 0}행")
 
         # summary 필드: 종목명(한글명)만 표시, 날짜는 YYYY-MM-DD 형식으로 변환
-        stock_map = get_stock_name_code_map()
-        code_to_name = {v: k for k, v in stock_map.items()}
-        stock_name = code_to_name.get(code, code)
+        stock_name = symbols.name_of(code, code)
         
         if data and isinstance(data, list) and len(data) > 0:
             # 기본 데이터 계산
@@ -81,15 +87,8 @@ async def get_price(code: str, period: str = "1개월"):
                 ⚠️ 중요: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
                 종목코드({code})는 절대 사용하지 마세요!
                 
-                📊 기본 데이터:
-                - 기간: {format_date(oldest['date'])} ~ {format_date(latest['date'])}
-                - 시작가: {oldest['close']:,}원
-                - 최근가: {latest['close']:,}원
-                - 변화량: {price_diff:+,}원 ({percent:+.2f}%)
-                - 추세: {trend}
-                
-                📈 전체 데이터: {data}
-                
+                """
+                tail = f"""
                 다음 내용을 포함해서 자연스럽게 설명해주세요:
                 1. 전체적인 주가 추세와 특징
                 2. 주요 변동점이나 특이사항
@@ -102,34 +101,24 @@ async def get_price(code: str, period: str = "1개월"):
                 ⚠️ 다시 한 번 강조: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
                 종목코드({code})는 절대 사용하지 마세요!
                 """
+                # 전체 행 대신 요약 통계 + 토큰 예산에 맞춘 표
+                with span("prompt"):
+                    prompt = compose_prompt(prompt, price_stats(data), price_table(data), tail)
+                if stream:
+                    fallback = f"{stock_name}의 주가 데이터를 분석했습니다. {format_date(oldest['date'])}부터 {format_date(latest['date'])}까지 {percent:.2f}% {trend}했습니다."
+                    return sse_response({"code": code, "period": period, "data": data}, ollama.stream_generate(prompt, cache=True), fallback)
+
                 print(f"🤖 LLM 프롬프트 전송 중...")
-                response = requests.post("http://localhost:11434/api/generate", 
-                                       json={
-                                           "model": "gemma3:4b",
-                                           "prompt": prompt,
-                                           "stream": False
-                                       })
-                
-                print(f"🤖 LLM 응답 상태: {response.status_code}")
+                summary = await ollama.generate(prompt, cache=True)
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"🤖 LLM 응답: {result}")
-                    summary = result.get('response', '').strip()
-                    if not summary:
-                        print("🤖 LLM 응답이 비어있음, 기본 분석 사용")
-                        # 기본 분석 생성
-                        start_date = format_date(oldest['date'])
-                        end_date = format_date(latest['date'])
-                        summary = f"{stock_name}의 주가 데이터를 분석했습니다. {start_date}부터 {end_date}까지 {percent:.2f}% {trend}했습니다."
-                    else:
-                        print(f"🤖 LLM 분석 완료: {summary[:100]}...")
-                else:
-                    print(f"🤖 LLM 호출 실패: {response.status_code}")
+                if not summary:
+                    print("🤖 LLM 응답이 비어있음, 기본 분석 사용")
                     # 기본 분석 생성
                     start_date = format_date(oldest['date'])
                     end_date = format_date(latest['date'])
                     summary = f"{stock_name}의 주가 데이터를 분석했습니다. {start_date}부터 {end_date}까지 {percent:.2f}% {trend}했습니다."
+                else:
+                    print(f"🤖 LLM 분석 완료: {summary[:100]}...")
                     
             except Exception as e:
                 print(f"LLM 분석 실패: {e}")
@@ -140,6 +129,9 @@ async def get_price(code: str, period: str = "1개월"):
         else:
             summary = f"{stock_name}의 주가 데이터를 찾을 수 없습니다."
 
+        if stream:
+            return sse_response({"code": code, "period": period, "data": data}, None, summary)
+
         return JSONResponse(content={"code": code, "period": period, "data": data, "summary": summary})
 
     except Exception as e:
@@ -147,40 +139,34 @@ async def get_price(code: str, period: str = "1개월"):
 
 ## 공매도
 @app.get("/short/{code}")
-def get_short(code: str, start_date: str, end_date: str):
+@coalesce("short", code=resolve_code)
+async def get_short(code: str, start_date: str, end_date: str, stream: bool = False):
     try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        
+        # 종목코드 / 날짜 정규화 (합쳐진 요청이 모두 같은 응답을 받도록 응답에도 정규화한 값 사용)
+        await symbols.ensure_loaded()
+        code = resolve_code(code)
+
         # 날짜 형식 변환 (YYYY-MM-DD -> YYYYMMDD)
         start_date_formatted = start_date.replace("-", "")
         end_date_formatted = end_date.replace("-", "")
+        start_date = format_date(start_date_formatted)
+        end_date = format_date(end_date_formatted)
         
-        sock.send(f"SHORT|{code}|{start_date_formatted}|{end_date_formatted}".encode())
-        result = receive_all(sock)
-        print(f"🔍 공매도 원본 응답: {result}")
-        data = json.loads(result)
-        print(f"🔍 공매도 파싱된 데이터: {data}")
-        print(f"🔍 데이터 타입: {type(data)}")
-        print(f"🔍 데이터 길이: {len(data) if isinstance(data, list) else 'not list'}")
-
-        if "error" in data:
-            raise Exception(data["error"])
+        data = await kiwoom.request(f"SHORT|{code}|{start_date_formatted}|{end_date_formatted}")
+        print(f"🔍 공매도 데이터: {len(data) if isinstance(data, list) else 0}행")
 
         # summary 필드: 종목명(한글명)만 표시, 날짜는 YYYY-MM-DD 형식으로 변환
-        stock_map = get_stock_name_code_map()
-        code_to_name = {v: k for k, v in stock_map.items()}
-        stock_name = code_to_name.get(code, code)
+        stock_name = symbols.name_of(code, code)
         
         if data and isinstance(data, list) and len(data) > 0:
             oldest = data[0]
             latest = data[-1]
             
-            # 공매도 데이터 분석 (실제 데이터 구조에 맞게 수정)
-            latest_volume = int(latest.get('공매도량', 0))
-            latest_ratio = float(latest.get('매매비중', '0').replace('+', ''))
-            oldest_volume = int(oldest.get('공매도량', 0))
-            oldest_ratio = float(oldest.get('매매비중', '0').replace('+', ''))
+            # 공매도 데이터 분석 (브릿지가 숫자 필드를 int / float 로 변환해서 보냄)
+            latest_volume = latest.get('공매도량', 0)
+            latest_ratio = latest.get('매매비중', 0.0)
+            oldest_volume = oldest.get('공매도량', 0)
+            oldest_ratio = oldest.get('매매비중', 0.0)
             
             volume_change = latest_volume - oldest_volume
             ratio_change = latest_ratio - oldest_ratio
@@ -190,15 +176,6 @@ def get_short(code: str, start_date: str, end_date: str):
             
             # LLM을 사용하여 자연스럽고 유동적인 공매도 분석 생성
             try:
-                # 기본 통계 계산
-                volumes = [int(item.get('공매도량', 0)) for item in data]
-                ratios = [float(item.get('매매비중', '0').replace('+', '')) for item in data]
-                
-                avg_volume = sum(volumes) / len(volumes)
-                max_volume = max(volumes)
-                min_volume = min(volumes)
-                avg_ratio = sum(ratios) / len(ratios)
-                
                 # LLM 프롬프트 생성
                 prompt = f"""
                 다음은 {stock_name}(종목코드: {code})의 공매도 데이터입니다. 
@@ -207,17 +184,8 @@ def get_short(code: str, start_date: str, end_date: str):
                 ⚠️ 중요: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
                 종목코드({code})는 절대 사용하지 마세요!
                 
-                📊 기본 데이터:
-                - 기간: {start_date} ~ {end_date}
-                - 최근 공매도량: {latest_volume:,}주 (매매비중 {latest_ratio:.2f}%)
-                - 시작 공매도량: {oldest_volume:,}주 (매매비중 {oldest_ratio:.2f}%)
-                - 변화량: {volume_change:,}주 ({volume_change/oldest_volume*100:.1f}%)
-                - 평균 공매도량: {avg_volume:,.0f}주
-                - 최대/최소: {max_volume:,}주 / {min_volume:,}주
-                - 평균 매매비중: {avg_ratio:.2f}%
-                
-                📈 전체 데이터: {data}
-                
+                """
+                tail = f"""
                 다음 내용을 포함해서 자연스럽게 설명해주세요:
                 1. 전체적인 공매도 추세와 특징
                 2. 주요 변화점이나 특이사항
@@ -230,30 +198,23 @@ def get_short(code: str, start_date: str, end_date: str):
                 ⚠️ 다시 한 번 강조: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
                 종목코드({code})는 절대 사용하지 마세요!
                 """
+                # 전체 행 대신 요약 통계 + 토큰 예산에 맞춘 표
+                with span("prompt"):
+                    prompt = compose_prompt(prompt, short_stats(data), short_table(data), tail)
                 
+                if stream:
+                    fallback = f"{stock_name}의 공매도 데이터를 분석했습니다. 최근 공매도량은 {latest_volume:,}주(매매비중 {latest_ratio:.2f}%)입니다."
+                    return sse_response({"code": code, "start_date": start_date, "end_date": end_date, "data": data}, ollama.stream_generate(prompt, cache=True), fallback)
+
                 # LLM 호출
                 print(f"🤖 LLM 프롬프트 전송 중...")
-                response = requests.post("http://localhost:11434/api/generate", 
-                                       json={
-                                           "model": "gemma3:4b",
-                                           "prompt": prompt,
-                                           "stream": False
-                                       })
-                
-                print(f"🤖 LLM 응답 상태: {response.status_code}")
+                summary = await ollama.generate(prompt, cache=True)
                 
-                if response.status_code == 200:
-                    result = response.json()
-                    print(f"🤖 LLM 응답: {result}")
-                    summary = result.get('response', '').strip()
-                    if not summary:
-                        print("🤖 LLM 응답이 비어있음, 기본 분석 사용")
-                        summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 최근 공매도량은 {latest_volume:,}주(매매비중 {latest_ratio:.2f}%)입니다."
-                    else:
-                        print(f"🤖 LLM 분석 완료: {summary[:100]}...")
-                else:
-                    print(f"🤖 LLM 호출 실패: {response.status_code}")
+                if not summary:
+                    print("🤖 LLM 응답이 비어있음, 기본 분석 사용")
                     summary = f"{stock_name}의 공매도 데이터를 분석했습니다. 최근 공매도량은 {latest_volume:,}주(매매비중 {latest_ratio:.2f}%)입니다."
+                else:
+                    print(f"🤖 LLM 분석 완료: {summary[:100]}...")
                     
             except Exception as e:
                 print(f"LLM 분석 실패: {e}")
@@ -262,23 +223,59 @@ def get_short(code: str, start_date: str, end_date: str):
         else:
             summary = f"{stock_name}의 공매도 데이터를 찾을 수 없습니다."
 
+        if stream:
+            return sse_response({"code": code, "start_date": start_date, "end_date": end_date, "data": data}, None, summary)
+
         return JSONResponse(content={"code": code, "start_date": start_date, "end_date": end_date, "data": data, "summary": summary})
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"공매도 수집 실패: {str(e)}")
 
+## 여러 종목 일괄 조회 (브릿지 BATCH 한 번, LLM 요약은 summarize=True 일 때 한 번만)
+async def batch_response(kind, codes, data_by_code, summarize, **extra):
+    await symbols.ensure_loaded()
+    with span("prompt"):
+        items = build_items(kind, codes, data_by_code)
+        prompt = make_batch_prompt(kind, items) if summarize else None
+    content = {**extra, "items": items}
+    if summarize:
+        try:
+            summary = await ollama.generate(prompt, cache=True)
+        except Exception as e:
+            print(f"LLM 분석 실패: {e}")
+            summary = ""
+        content["summary"] = summary or make_batch_fallback(kind, items)
+    return JSONResponse(content=content)
+
+@app.post("/price/batch")
+@coalesce("price-batch", code=resolve_code)
+async def get_price_batch_endpoint(req: BatchRequest):
+    try:
+        await symbols.ensure_loaded()
+        codes = normalize_codes(resolve_code(code) for code in req.codes)
+        data = await get_price_batch(codes, req.period)
+        return await batch_response("price", codes, data, req.summarize, period=req.period)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"일괄 수집 실패: {str(e)}")
+
+@app.post("/short/batch")
+@coalesce("short-batch", code=resolve_code)
+async def get_short_batch_endpoint(req: BatchRequest):
+    try:
+        await symbols.ensure_loaded()
+        codes = normalize_codes(resolve_code(code) for code in req.codes)
+        start_date, end_date = batch_dates(req.start_date, req.end_date)
+        data = await get_short_batch(codes, start_date, end_date)
+        return await batch_response("short", codes, data, req.summarize, start_date=start_date, end_date=end_date)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"공매도 일괄 수집 실패: {str(e)}")
+
 ## 테마 구성 종목    
 @app.get("/theme/{theme_code}")
-def get_theme(theme_code: str, date_type: str = "5"):
+@coalesce("theme")
+async def get_theme(theme_code: str, date_type: str = "5"):
     try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        sock.send(f"THEME|{theme_code}|{date_type}".encode())
-        result = receive_all(sock)
-        data = json.loads(result)
-
-        if "error" in data:
-            raise Exception(data["error"])
+        data = await kiwoom.request(f"THEME|{theme_code}|{date_type}")
 
         return JSONResponse(content={"theme_code": theme_code, "date_type": date_type, "data": data})
 
@@ -286,199 +283,85 @@ def get_theme(theme_code: str, date_type: str = "5"):
         raise HTTPException(status_code=500, detail=f"테마 수집 실패: {str(e)}")
     
 
+## 테마 구성 종목 (테마 인덱스, TR 없음)
+@app.get("/theme/{theme_code}/members")
+async def get_theme_members_endpoint(theme_code: str):
+    try:
+        data = await get_theme_members(theme_code)
+        if not data:
+            raise HTTPException(status_code=404, detail=f"테마 인덱스에 없는 테마: {theme_code}")
+        return JSONResponse(content=data)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"테마 구성 조회 실패: {str(e)}")
+
+## Prometheus 메트릭 (단계별 지연, 캐시 적중, LLM 토큰, 브릿지 TR 큐 대기 / 왕복)
+@app.get("/metrics")
+async def get_metrics():
+    return await metrics_response()
+
+## 실시간 시세 (WebSocket 구독, 브릿지 실시간 등록 하나를 모든 클라이언트가 공유)
+@app.websocket("/ws/quotes")
+async def quotes_socket(websocket: WebSocket):
+    await quote_hub.serve(websocket)
+
+## 실시간 시세 스냅샷 (구독 중인 종목의 최신 틱)
+@app.get("/quotes")
+async def get_quotes(codes: str):
+    await symbols.ensure_loaded()
+    code_list = normalize_codes(resolve_code(code) for code in codes.split(","))
+    ticks = {code: quote_hub.latest[code] for code in code_list if code in quote_hub.latest}
+    missing = [code for code in code_list if code not in ticks]
+    if missing:
+        ticks.update(await get_ticks(missing))
+    return JSONResponse(content={"codes": code_list, "data": ticks, "hub": quote_hub.stats()})
+
+
 ## 테마 그룹별 요청
 @app.get("/theme-groups")
-def get_theme_groups(date_type: str = "5", search_type: str = "0", theme_name: str = "", stock_code: str = "", rank_type: str = "1"):
+@coalesce("theme-groups", stock_code=resolve_code)
+async def get_theme_groups(date_type: str = "5", search_type: str = "0", theme_name: str = "", stock_code: str = "", rank_type: str = "1"):
     try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
+        if stock_code:
+            await symbols.ensure_loaded()
+            stock_code = resolve_code(stock_code)
         msg = f"THEMEGROUP|{date_type}|{search_type}|{theme_name}|{stock_code}|{rank_type}"
-        print(f"📤 소켓 전송 메시지: {msg}")
-        sock.send(msg.encode())
-        result = receive_all(sock)
-        data = json.loads(result)
-
-        if "error" in data:
-            raise Exception(data["error"])
+        print(f"📤 키움 전송 메시지: {msg}")
+        data = await kiwoom.request(msg)
 
         return JSONResponse(content={"data": data})
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"테마그룹 수집 실패: {str(e)}")
 
-## 종목별 테마 조회
+## 종목별 테마 조회 (테마 조회 / 요약은 theme_service 에서 처리)
 @app.get("/stock-theme/{code}")
-def get_stock_theme(code: str, date_type: str = "5"):
+@coalesce("stock-theme", code=resolve_code)
+async def get_stock_theme(code: str, date_type: str = "5", stream: bool = False, summarize: bool = True):
     try:
-        # 1단계: 종목코드로 테마 그룹 검색
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        msg = f"THEMEGROUP|{date_type}|1||{code}|1"  # search_type=1 (종목코드 검색)
-        print(f"📤 종목 테마 검색 메시지: {msg}")
-        sock.send(msg.encode())
-        result = receive_all(sock)
-        sock.close()
-        theme_groups = json.loads(result)
-        
-        if "error" in theme_groups:
-            raise Exception(theme_groups["error"])
-        
-        print(f"🔍 종목 테마 그룹 응답: {theme_groups}")
-
-        # 종목코드 → 종목명 매핑 준비
-        stock_map = get_stock_name_code_map()
-        code = code.zfill(6)
-        
-        # 디버깅: 원본 매핑 데이터 확인
-        print(f"🔍 원본 매핑 데이터 샘플: {list(stock_map.items())[:5]}")
-        
-        # 매핑 방향 확인 및 수정
-        if stock_map:
-            # 첫 번째 항목으로 데이터 구조 확인
-            first_item = list(stock_map.items())[0]
-            print(f"🔍 첫 번째 매핑 항목: {first_item}")
-            
-            # 종목코드가 키인지 값인지 확인
-            if len(first_item[0]) == 6 and first_item[0].isdigit():
-                # 종목코드가 키인 경우
-                code_to_name = stock_map
-            else:
-                # 종목명이 키인 경우 (기존 로직)
-                code_to_name = {v: k for k, v in stock_map.items()}
-        else:
-            code_to_name = {}
-        
-        stock_name = code_to_name.get(code, code)
-        
-        # 디버깅: 종목코드 매핑 상태 확인
-        print(f"🔍 종목코드 매핑 상태: {code} -> {stock_name}")
-        print(f"🔍 매핑 테이블 크기: {len(stock_map)}")
-
-        # (NEW) 상위 테마 추출 - 기간수익률 기준
-        def to_float(x):
-            try:
-                return float(str(x).replace("+", "").replace("%", ""))
-            except:
-                return -999
-
-        # 상위 3개 테마만 추림 (혹은 전체 사용하고 싶으면 theme_groups 그대로 사용)
-        priority = [g for g in theme_groups if "반도체" in g.get("테마명", "")]
-        others   = [g for g in theme_groups if g not in priority]
-        top_groups = (priority[:3] + others)[:3]
-
-        theme_stocks = []
-
-        for theme_group in top_groups:
-            # 정확한 테마코드 필드 처리
-            theme_code = (
-                theme_group.get("테마코드")
-                or theme_group.get("종목코드")  # 실제로는 여기에 테마코드가 들어옴
-                or theme_group.get("code")
-                or theme_group.get("CODE")
+        await symbols.ensure_loaded()
+        theme_data = await theme_service.analyze(resolve_code(code), date_type)
+
+        if stream:
+            # 테마 데이터(payload)가 먼저 나가고 요약 토큰이 뒤따름
+            return sse_response(
+                theme_data,
+                theme_service.stream_summary(theme_data) if summarize else None,
+                make_theme_fallback(theme_data)
             )
-            theme_code = str(theme_code).strip()
-            theme_name = theme_group.get("테마명", "").strip()
-
-            if not theme_code:
-                continue
-
-            try:
-                sock2 = socket.socket()
-                sock2.connect(("localhost", 9999))
-                msg2 = f"THEME|{theme_code}|{date_type}"
-                sock2.send(msg2.encode())
-                result2 = receive_all(sock2)
-                sock2.close()
-
-                if result2.strip():
-                    theme_detail = json.loads(result2)
-                    if isinstance(theme_detail, list) and len(theme_detail) > 0:
-                        for stock in theme_detail:
-                            stock_code = stock.get("종목코드", "")
-                            if stock_code:
-                                stock["종목명"] = code_to_name.get(stock_code.zfill(6), stock_code)
-                                stock["종목코드"] = stock_code.zfill(6)
-
-                        theme_stocks.append({
-                            "테마코드": theme_code,
-                            "테마명": theme_name,
-                            "종목들": theme_detail,
-                            "종목수": len(theme_detail)
-                        })
-
-            except Exception as e:
-                print(f"❌ 테마 {theme_name} 상세 조회 실패: {e}")
-                continue
-
-        # 프롬프트용 테마 요약 생성
-        theme_summary = []
-        for theme in theme_stocks:
-            stock_names = []
-            for stock in theme["종목들"][:5]:
-                stock_name_detail = stock.get("종목명", "")
-                if stock_name_detail:
-                    stock_names.append(stock_name_detail)
-            
-            print(f"🔍 테마 '{theme['테마명']}' 종목들: {stock_names}")
-            
-            theme_summary.append({
-                "테마명": theme["테마명"],
-                "종목수": theme["종목수"],
-                "주요종목": stock_names
-            })
-
-        # LLM 프롬프트 생성
-        try:
-            prompt = f"""
-다음은 {stock_name}(종목코드: {code})이 속한 테마 정보입니다. 
-친근하고 자연스러운 한국어로 자세하게 분석해주세요.
 
-⚠️ 중요: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
-종목코드({code})는 절대 사용하지 마세요!
-
-허용 종목 리스트: {', '.join(stock_names)}
-
-📊 테마 정보 요약:
-{theme_summary}
-
-다음 내용을 포함해서 자연스럽게 설명해주세요:
-1. {stock_name}이 속한 테마들의 특징과 의미
-2. 같은 테마에 속한 주요 종목들과의 연관성
-3. 테마 투자 관점에서의 인사이트
-4. 투자자들에게 도움이 되는 조언
-
-친근하고 이해하기 쉽게 설명해주세요. 이모티콘도 적절히 사용하고, 
-실제 투자에 도움이 되는 구체적인 조언을 포함해주세요.
-
-⚠️ 다시 한 번 강조: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고, 
-종목코드({code})는 절대 사용하지 마세요!
-"""
-            response = requests.post("http://localhost:11434/api/generate", 
-                                     json={
-                                         "model": "gemma3:4b",
-                                         "prompt": prompt,
-                                         "stream": False
-                                     })
-
-            if response.status_code == 200:
-                result = response.json()
-                summary = result.get('response', '').strip()
-                if not summary:
-                    summary = f"{stock_name}이 속한 테마 정보를 분석했습니다. 총 {len(theme_stocks)}개의 테마에 속해 있으며, 각 테마별로 다양한 관련 종목들이 있습니다."
-            else:
-                summary = f"{stock_name}이 속한 테마 정보를 분석했습니다. 총 {len(theme_stocks)}개의 테마에 속해 있으며, 각 테마별로 다양한 관련 종목들이 있습니다."
-
-        except Exception as e:
-            print(f"LLM 요약 생성 실패: {e}")
-            summary = f"{stock_name}이 속한 테마 정보를 분석했습니다. 총 {len(theme_stocks)}개의 테마에 속해 있으며, 각 테마별로 다양한 관련 종목들이 있습니다."
+        # summarize=False 면 테마 데이터만 바로 응답
+        if summarize:
+            summary, summary_ready = await theme_service.summarize(theme_data)
+        else:
+            summary, summary_ready = make_theme_fallback(theme_data), False
 
         response_data = {
-            "code": code,
-            "stock_name": stock_name,
-            "date_type": date_type,
-            "theme_groups": top_groups,
-            "theme_stocks": theme_stocks,
-            "summary": summary
+            **theme_data,
+            "summary": summary,
+            "summary_ready": summary_ready
         }
 
         return JSONResponse(content=response_data)
@@ -490,82 +373,23 @@ def get_stock_theme(code: str, date_type: str = "5"):
         
 #############################################################################################
 
-# 철회 LLM URL
-LLM_SERVER_URL = "http://localhost:8001/llm/generate"
-
 # 참조자 입력목
 class ChatRequest(BaseModel):
     message: str
+    stream: Optional[bool] = False
 
-# 주가 데이터 발출
-# CODEMAP 요청
-def get_stock_name_code_map() -> dict:
-    try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        sock.send(b"CODEMAP")
-        result = receive_all(sock)
-        data = json.loads(result)
-        
-        # 에러 체크
-        if isinstance(data, dict) and 'error' in data:
-            print(f"❌ Kiwoom API 에러: {data['error']}")
-            return {}
-        
-        # 데이터 구조 확인
-        if not isinstance(data, dict):
-            print(f"❌ 예상치 못한 데이터 형식: {type(data)}")
-            return {}
-            
-        return data
-    except Exception as e:
-        print(f"❌ 종목코드 맵 불러오기 실패: {e}")
-        return {}
-
-# 주가 데이터 요청 함수 (이미 존재하는 get_price_data 재사용)
-# def get_price_data(code: str, period: str = "1개월") → 있음
+# 주가 데이터 / CODEMAP 요청 함수는 kiwoom_client 에서 가져옴
 
 # 📌 프롬프트 생성 유틸
 def make_price_prompt(stock_name, price_data):
     if not price_data:
         return f"{stock_name}의 주가 데이터를 찾을 수 없습니다."
-    
-    oldest = price_data[0]
-    latest = price_data[-1]
-    
-    # 기본 통계 계산
-    prices = [item['close'] for item in price_data]
-    volumes = [item.get('volume', 0) for item in price_data]
-    
-    price_diff = latest['close'] - oldest['close']
-    percent_change = round((price_diff / oldest['close']) * 100, 2) if oldest['close'] else 0
-    trend = "상승" if price_diff > 0 else ("하락" if price_diff < 0 else "변동 없음")
-    
-    max_price = max(prices)
-    min_price = min(prices)
-    avg_price = sum(prices) / len(prices)
-    avg_volume = sum(volumes) / len(volumes) if volumes else 0
-    
-    start_date = format_date(oldest['date'])
-    end_date = format_date(latest['date'])
-    
-    return f"""
+
+    head = f"""
     다음은 {stock_name}의 주가 데이터입니다. 
     친근하고 자연스러운 한국어로 자세하게 분석해주세요.
-    
-    📊 기본 데이터:
-    - 기간: {start_date} ~ {end_date}
-    - 시작가: {oldest['close']:,}원
-    - 현재가: {latest['close']:,}원
-    - 변화: {price_diff:+,}원 ({percent_change:+.2f}%)
-    - 추세: {trend}
-    - 최고가: {max_price:,}원
-    - 최저가: {min_price:,}원
-    - 평균가: {avg_price:,.0f}원
-    - 평균거래량: {avg_volume:,.0f}주
-    
-    📈 전체 데이터: {[item for item in price_data if 'code' not in item]}
-    
+    """
+    tail = """
     다음 내용을 포함해서 자연스럽게 설명해주세요:
     1. 전체적인 주가 추세와 특징
     2. 주요 변동점이나 특이사항
@@ -576,168 +400,82 @@ def make_price_prompt(stock_name, price_data):
     친근하고 이해하기 쉽게 설명해주세요. 이모티콘도 적절히 사용하고, 
     실제 투자에 도움이 되는 구체적인 조언을 포함해주세요.
     """
+    return compose_prompt(head, price_stats(price_data), price_table(price_data), tail)
 
 def make_short_prompt(stock_name, short_data):
     if not short_data:
         return f"{stock_name}의 공매도 데이터를 찾을 수 없습니다."
-    
-    # 데이터에서 종목코드 제거
-    clean_data = []
-    for item in short_data:
-        clean_item = item.copy()
-        if 'code' in clean_item:
-            del clean_item['code']
-        clean_data.append(clean_item)
-    
-    return (
-        f"{stock_name}의 최근 공매도 데이터를 알려줘.\n"
-        f"샘플 데이터: {clean_data[:3]}\n"
-        f"이 데이터를 바탕으로 공매도 흐름을 요약해서 알려줘."
+
+    return compose_prompt(
+        f"{stock_name}의 최근 공매도 데이터를 알려줘.",
+        short_stats(short_data),
+        short_table(short_data),
+        "이 데이터를 바탕으로 공매도 흐름을 요약해서 알려줘."
     )
 
 def make_invest_prompt(stock_name, invest_data):
     if not invest_data:
         return f"{stock_name}의 투자자 기관 데이터를 찾을 수 없습니다."
-    
-    # 데이터에서 종목코드 제거
-    clean_data = []
-    for item in invest_data:
-        clean_item = item.copy()
-        if 'code' in clean_item:
-            del clean_item['code']
-        clean_data.append(clean_item)
-    
-    # 데이터 구조 확인 및 요약
-    if len(clean_data) > 0:
-        latest_data = clean_data[-1]  # 가장 최근 데이터
-        oldest_data = clean_data[0]   # 가장 오래된 데이터
-        
-        # 주요 투자자별 데이터 추출 (실제 데이터 구조에 맞게 조정)
-        try:
-            # 실제 키움 API 데이터 필드명 사용 (빈 문자열 처리 및 숫자 변환)
-            def safe_int(value):
-                if not value or value == '':
-                    return 0
-                return int(str(value).replace(',', ''))
-            
-            latest_individual = safe_int(latest_data.get('개인', '0'))
-            latest_foreign = safe_int(latest_data.get('외국인', '0'))
-            latest_institution = safe_int(latest_data.get('기관계', '0'))
-            latest_financial = safe_int(latest_data.get('금융투자', '0'))
-            latest_insurance = safe_int(latest_data.get('보험', '0'))
-            latest_investment = safe_int(latest_data.get('투신', '0'))
-            latest_other_financial = safe_int(latest_data.get('기타금융', '0'))
-            latest_bank = safe_int(latest_data.get('은행', '0'))
-            latest_other_corp = safe_int(latest_data.get('기타법인', '0'))
-            
-            oldest_individual = safe_int(oldest_data.get('개인', '0'))
-            oldest_foreign = safe_int(oldest_data.get('외국인', '0'))
-            oldest_institution = safe_int(oldest_data.get('기관계', '0'))
-            
-            # 최근 3일간의 기관계 동향 분석
-            recent_trend = []
-            for i in range(min(3, len(clean_data))):
-                data = clean_data[-(i+1)]
-                trend = safe_int(data.get('기관계', '0'))
-                date = data.get('일자', 'N/A')
-                recent_trend.append(f"{date}: {trend:+,}주")
-            
-            return (
-                f"{stock_name}의 투자자 기관 동향을 분석해줘.\n"
-                f"데이터 기간: {oldest_data.get('일자', 'N/A')} ~ {latest_data.get('일자', 'N/A')}\n"
-                f"최근 기관계 순매수: {latest_institution:+,}주\n"
-                f"최근 금융투자 순매수: {latest_financial:+,}주\n"
-                f"최근 보험 순매수: {latest_insurance:+,}주\n"
-                f"최근 투신 순매수: {latest_investment:+,}주\n"
-                f"최근 기타금융 순매수: {latest_other_financial:+,}주\n"
-                f"최근 은행 순매수: {latest_bank:+,}주\n"
-                f"최근 기타법인 순매수: {latest_other_corp:+,}주\n"
-                f"최근 3일간 기관계 동향: {', '.join(recent_trend)}\n"
-                f"전체 데이터: {clean_data}\n"
-                f"이 정보를 바탕으로 {stock_name}의 투자자 동향을 친근하고 이해하기 쉽게 설명해주세요. "
-                f"기관계의 매매 패턴과 그 의미를 분석해주세요. "
-                f"특히 금융투자, 보험, 투신 등 주요 기관들의 동향도 함께 설명해주세요. "
-                f"양수는 매수, 음수는 매도를 의미합니다."
-            )
-        except:
-            # 데이터 구조가 예상과 다를 경우 기본 형태로 처리
-            return (
-                f"{stock_name}의 투자자 기관 현황을 분석해줘.\n"
-                f"데이터 기간: {oldest_data.get('일자', 'N/A')} ~ {latest_data.get('일자', 'N/A')}\n"
-                f"전체 데이터: {clean_data}\n"
-                f"이 정보를 바탕으로 {stock_name}의 투자자 동향을 친근하고 이해하기 쉽게 설명해주세요."
-            )
-    
-    return (
-        f"{stock_name}의 투자자 기관 데이터를 분석해줘.\n"
-        f"데이터: {clean_data}\n"
-        f"이 정보를 바탕으로 투자자 동향을 요약해서 알려주세요."
+
+    return compose_prompt(
+        f"{stock_name}의 투자자 기관 동향을 분석해줘.",
+        invest_stats(invest_data),
+        invest_table(invest_data),
+        f"이 정보를 바탕으로 {stock_name}의 투자자 동향을 친근하고 이해하기 쉽게 설명해주세요. "
+        f"기관계의 매매 패턴과 그 의미를 분석해주세요. "
+        f"특히 금융투자, 보험, 투신 등 주요 기관들의 동향도 함께 설명해주세요. "
+        f"양수는 매수, 음수는 매도를 의미합니다."
     )
 
-def get_price_data(code: str, period: str = "1개월") -> list:
-    try:
-        sock = socket.socket()
-        sock.connect(("localhost", 9999))
-        sock.send(f"{code}|{period}".encode())
-        result = receive_all(sock)
-        print(f"📅 주가 데이터 수신: {result}")
-        return json.loads(result)
-    except Exception as e:
-        print(f"❌ 주가 데이터 수집 실패: {e}")
-        return []
-    
 # 📣 메인 챗 엔드포인트
 @app.post("/chat")
+@coalesce("chat")
 async def chat(req: ChatRequest):
     try:
         user_message = req.message.strip()
-        stock_map = get_stock_name_code_map()
-        matched_name = next((name for name in stock_map if name in user_message), None)
+        await symbols.ensure_loaded()
+        matched = match_stock(user_message)
 
-        if not matched_name:
+        if not matched:
             return {"response": "어떤 종목에 대한 이야기인지 잘 모르겠어요. 종목명을 정확히 입력해 주세요."}
 
-        code = stock_map[matched_name]
+        matched_name, code = matched
 
         # 분기: 주가 / 공매도 / 수급 / 테마
         if re.search(r"(테마|테마주|관련주|테마별)", user_message):
-            # 테마 정보 조회 - 기존 API 활용
+            # 테마 정보 조회 - /stock-theme 과 같은 서비스를 프로세스 안에서 바로 호출
             try:
-                async with httpx.AsyncClient(timeout=30) as client:
-                    res = await client.get(f"http://localhost:8000/stock-theme/{code}")
-                    if res.status_code == 200:
-                        theme_data = res.json()
-                        summary = theme_data.get("summary", "")
-                        return {"response": summary}
-                    else:
-                        return {"response": f"{matched_name}의 테마 정보를 조회하는 중 오류가 발생했습니다."}
+                theme_data = await theme_service.analyze(code)
+                if req.stream:
+                    return sse_response(
+                        {"stock_name": matched_name, "code": code},
+                        theme_service.stream_summary(theme_data),
+                        make_theme_fallback(theme_data)
+                    )
+                summary, _ = await theme_service.summarize(theme_data)
+                return {"response": summary}
             except Exception as e:
                 print(f"❌ 테마 정보 조회 실패: {e}")
                 return {"response": f"{matched_name}의 테마 정보를 조회하는 중 오류가 발생했습니다."}
 
         elif re.search(r"(주가|가격|차트|그래프)", user_message):
-            price_data = get_price_data(code)
-            prompt = make_price_prompt(matched_name, price_data)
+            price_data = await get_price_data(code)
+            with span("prompt"):
+                prompt = make_price_prompt(matched_name, price_data)
 
         elif re.search(r"(공매도|숏)", user_message):
             from_date = (datetime.today() - timedelta(days=10)).strftime("%Y%m%d")
             to_date = datetime.today().strftime("%Y%m%d")
-            sock = socket.socket()
-            sock.connect(("localhost", 9999))
-            sock.send(f"SHORT|{code}|{from_date}|{to_date}".encode())
-            result = receive_all(sock)
-            short_data = json.loads(result)
-            prompt = make_short_prompt(matched_name, short_data)
+            short_data = await get_short_data(code, from_date, to_date)
+            with span("prompt"):
+                prompt = make_short_prompt(matched_name, short_data)
 
         elif re.search(r"(수급|기관|외국인|개인)", user_message):
             from_date = (datetime.today() - timedelta(days=10)).strftime("%Y%m%d")
             to_date = datetime.today().strftime("%Y%m%d")
-            sock = socket.socket()
-            sock.connect(("localhost", 9999))
-            sock.send(f"INST|{code}|{from_date}|{to_date}".encode())
-            result = receive_all(sock)
-            invest_data = json.loads(result)
-            prompt = make_invest_prompt(matched_name, invest_data)
+            invest_data = await get_invest_data(code, from_date, to_date)
+            with span("prompt"):
+                prompt = make_invest_prompt(matched_name, invest_data)
 
         else:
             return {"response": f"{matched_name}에 대해 어떤 정보를 원하시는지 조금 더 구체적으로 말씀해 주세요. 예: 주가, 공매도, 수급, 테마 등"}
@@ -749,13 +487,16 @@ async def chat(req: ChatRequest):
 
 중요: 종목을 언급할 때는 반드시 한글 종목명을 사용하고, 종목코드(숫자)는 사용하지 마세요.
 """
-        async with httpx.AsyncClient(timeout=120) as client:
-            res = await client.post(LLM_SERVER_URL, json={"prompt": enhanced_prompt})
+        if req.stream:
+            fallback = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
+            return sse_response({"stock_name": matched_name, "code": code}, ollama.stream_generate(enhanced_prompt, cache=True), fallback)
 
         try:
-            llm_text = res.json().get("response", res.text)
-        except Exception:
-            llm_text = res.text  # fallback
+            llm_text = await ollama.generate(enhanced_prompt, cache=True)
+        except httpx.TimeoutException:
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. 응답 시간이 초과되어 상세 분석을 제공할 수 없습니다."
+        except (httpx.HTTPError, OllamaError):
+            llm_text = f"{matched_name}에 대한 기본 정보를 제공합니다. AI 서버에 일시적인 문제가 있어 상세 분석을 제공할 수 없습니다."
 
         return {"response": llm_text}
 
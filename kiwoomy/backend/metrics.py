@@ -0,0 +1,174 @@
+##### 지연 / 카운터 계측 #####
+
+"""
+단계별 소요 시간과 카운터를 모아 Prometheus 텍스트 형식으로 내보내는 계측 모듈 (외부 패키지 없음)
+
+- Histogram / Counter: 라벨별 값, 스레드 안전 (브릿지 메인 / 네트워크 스레드에서 함께 씀)
+- span("kiwoom", "PRICE"): with 블록 소요 시간을 stage_seconds 히스토그램에 기록하고,
+  요청 단위 타이밍(start_timings)이 열려 있으면 거기에도 더함 → 응답 Server-Timing 헤더
+- family(): JSON 으로 옮길 수 있는 형태 (브릿지는 STATUS 의 metrics 로 보내고 FastAPI /metrics 가 렌더링)
+
+    with span("prompt"):
+        prompt = compose_prompt(...)
+"""
+
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# 초 단위 (TR 1건 ~ LLM 생성 수십 초까지)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _label_text(labels: dict) -> str:
+    if not labels:
+        return ""
+    items = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        items.append(f'{name}="{value}"')
+    return "{" + ",".join(items) + "}"
+
+
+def _number(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render_families(families) -> str:
+    """family() 목록 → Prometheus 텍스트 노출 형식"""
+    lines = []
+    for family in families:
+        lines.append(f"# HELP {family['name']} {family['help']}")
+        lines.append(f"# TYPE {family['name']} {family['type']}")
+        for suffix, labels, value in family["samples"]:
+            lines.append(f"{family['name']}{suffix}{_label_text(labels)} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def prefixed(families, prefix: str) -> list:
+    """다른 프로세스(브릿지)에서 받은 family 이름 앞에 prefix 를 붙임"""
+    return [{**family, "name": prefix + family["name"]} for family in families]
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def family(self) -> dict:
+        with self._lock:
+            samples = [("", dict(zip(self.labelnames, key)), value) for key, value in sorted(self._values.items())]
+        return {"name": self.name, "type": "counter", "help": self.help, "samples": samples}
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # 라벨 → [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += seconds
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def family(self) -> dict:
+        samples = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                labels = dict(zip(self.labelnames, key))
+                for bound, count in zip(self.buckets, series):
+                    samples.append(("_bucket", {**labels, "le": _number(float(bound))}, count))
+                samples.append(("_bucket", {**labels, "le": "+Inf"}, series[-1]))
+                samples.append(("_sum", labels, round(series[-2], 6)))
+                samples.append(("_count", labels, series[-1]))
+        return {"name": self.name, "type": "histogram", "help": self.help, "samples": samples}
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def families(self) -> list:
+        return [metric.family() for metric in self._metrics]
+
+
+# 프로세스 전체가 공유하는 레지스트리
+registry = Registry()
+
+stage_seconds = registry.histogram("stage_seconds", "요청 처리 단계별 소요 시간(초)", ("stage", "detail"))
+
+
+##### 요청 단위 타이밍 (Server-Timing) #####
+
+_timings = contextvars.ContextVar("timings", default=None)
+
+
+def start_timings() -> dict:
+    """현재 요청(컨텍스트)의 단계별 누적 시간 dict 를 열고 반환 (이후 만든 태스크도 같은 dict 를 공유)"""
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def record(stage: str, seconds: float, detail: str = ""):
+    stage_seconds.observe(seconds, stage=stage, detail=detail)
+    timings = _timings.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str, detail: str = ""):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - started, detail)
+
+
+def server_timing(timings: dict, total: float = None) -> str:
+    """{"kiwoom": 0.012} → 'kiwoom;dur=12.0' (ms)"""
+    items = [f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items()]
+    if total is not None:
+        items.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(items)
@@ -0,0 +1,187 @@
+##### 일봉 OHLCV 컬럼 저장소 #####
+
+"""
+종목별 일봉(날짜, 시가, 고가, 저가, 종가, 거래량, 거래대금)을 컬럼별 바이너리 파일로 보관하는 로컬 저장소
+
+- 디렉터리: OHLCV_STORE_DIR/<종목코드>/{date,open,high,low,close,volume,amount}.bin + meta.json
+- 날짜 오름차순 append-only. 마지막 행(당일 봉)만 장중 갱신을 위해 덮어씀
+- 읽기는 np.memmap + searchsorted 로 기간 슬라이스 → 3년 조회도 파일 슬라이스 한 번
+- meta.json 의 rows 가 유효 행 수. 컬럼을 먼저 쓰고 meta 를 마지막에 써서
+  중간에 죽어도 meta 기준으로 잘라내면 일관성이 유지됨
+"""
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+OHLCV_STORE_DIR = os.getenv(
+    "OHLCV_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ohlcv"),
+)
+OHLCV_SYNC_TTL = float(os.getenv("OHLCV_SYNC_TTL", "300"))
+
+# 컬럼 이름 → 저장 타입 (날짜는 YYYYMMDD 정수)
+COLUMNS = {
+    "date": np.int32,
+    "open": np.int64,
+    "high": np.int64,
+    "low": np.int64,
+    "close": np.int64,
+    "volume": np.int64,
+    "amount": np.int64,  # 거래대금 (백만원)
+}
+
+
+class OhlcvStore:
+    def __init__(self, root=OHLCV_STORE_DIR, sync_ttl=OHLCV_SYNC_TTL):
+        self.root = root
+        self.sync_ttl = sync_ttl
+        self._meta = {}  # code → meta dict
+        self._lock = threading.RLock()  # 쓰기(메인 스레드)와 읽기(네트워크 스레드) 보호
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, code):
+        return os.path.join(self.root, code)
+
+    def _column_path(self, code, column):
+        return os.path.join(self._dir(code), f"{column}.bin")
+
+    def meta(self, code) -> dict:
+        with self._lock:
+            if code not in self._meta:
+                try:
+                    with open(os.path.join(self._dir(code), "meta.json"), encoding="utf-8") as f:
+                        meta = json.load(f)
+                except (OSError, ValueError):
+                    meta = None
+                if meta is None or meta.get("columns") != list(COLUMNS):
+                    # 없거나 컬럼 구성이 바뀐 저장소는 비어 있는 것으로 보고 다시 받음
+                    meta = {"rows": 0, "history_from": None, "synced_at": 0, "columns": list(COLUMNS)}
+                self._meta[code] = meta
+            return self._meta[code]
+
+    def _write_meta(self, code, meta):
+        path = os.path.join(self._dir(code), "meta.json")
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, path)
+        self._meta[code] = meta
+
+    def rows(self, code) -> int:
+        return self.meta(code)["rows"]
+
+    def first_date(self, code):
+        """저장된 첫 날짜 (YYYYMMDD 문자열) 또는 None"""
+        dates = self._read_column(code, "date")
+        return str(int(dates[0])) if len(dates) else None
+
+    def last_date(self, code):
+        """저장된 마지막 날짜 (YYYYMMDD 문자열) 또는 None"""
+        dates = self._read_column(code, "date")
+        return str(int(dates[-1])) if len(dates) else None
+
+    def is_fresh(self, code) -> bool:
+        """최근 OHLCV_SYNC_TTL 초 안에 TR 로 동기화했는지"""
+        return time.time() - self.meta(code)["synced_at"] < self.sync_ttl
+
+    def covers(self, code, start_date: str) -> bool:
+        """start_date 이후 구간이 모두 저장되어 있는지 (과거 방향 기준)"""
+        history_from = self.meta(code)["history_from"]
+        return history_from is not None and history_from <= start_date
+
+    def _read_column(self, code, column):
+        n = self.rows(code)
+        if n == 0:
+            return np.empty(0, dtype=COLUMNS[column])
+        return np.memmap(self._column_path(code, column), dtype=COLUMNS[column], mode="r", shape=(n,))
+
+    def read(self, code, start_date: str, end_date: str = None) -> dict:
+        """[start_date, end_date] 구간의 컬럼 배열 dict (복사본)"""
+        with self._lock:
+            dates = self._read_column(code, "date")
+            lo = int(np.searchsorted(dates, int(start_date), side="left"))
+            hi = len(dates) if end_date is None else int(np.searchsorted(dates, int(end_date), side="right"))
+            return {column: np.array(self._read_column(code, column)[lo:hi]) for column in COLUMNS}
+
+    def tail(self, code, count: int) -> dict:
+        """마지막 count 행의 컬럼 배열 dict (복사본)"""
+        with self._lock:
+            n = self.rows(code)
+            return {column: np.array(self._read_column(code, column)[max(0, n - count):]) for column in COLUMNS}
+
+    def append(self, code, rows: dict, history_from: str = None):
+        """
+        rows: 컬럼 이름 → 배열 (날짜 오름차순). 구조화 배열도 그대로 받음
+        마지막 저장일보다 새로운 행만 덧붙이고, 마지막 저장일과 같은 날짜는 덮어씀
+        """
+        with self._lock:
+            os.makedirs(self._dir(code), exist_ok=True)
+            meta = dict(self.meta(code))
+            n = meta["rows"]
+            dates = np.asarray(rows["date"], dtype=COLUMNS["date"])
+
+            last = int(self._read_column(code, "date")[-1]) if n else None
+            if last is not None and len(dates) and dates[0] < last:
+                raise ValueError(f"{code}: 저장된 마지막 날짜({last})보다 과거 데이터는 덧붙일 수 없음")
+
+            # 당일 봉 갱신: 같은 날짜 행은 마지막 행을 덮어씀
+            # (memmap 을 열어 둔 채 아래에서 truncate 하면 Windows 에서 실패하므로 파일 쓰기로 덮어씀)
+            if last is not None and len(dates) and dates[0] == last:
+                for column, dtype in COLUMNS.items():
+                    with open(self._column_path(code, column), "r+b") as f:
+                        f.seek((n - 1) * np.dtype(dtype).itemsize)
+                        np.asarray(rows[column][:1], dtype=dtype).tofile(f)
+                rows = {column: rows[column][1:] for column in COLUMNS}
+                dates = dates[1:]
+
+            if len(dates):
+                for column, dtype in COLUMNS.items():
+                    path = self._column_path(code, column)
+                    with open(path, "ab") as f:
+                        # 이전에 meta 갱신 전 중단된 쓰기가 있으면 유효 행 수로 잘라냄
+                        f.truncate(n * np.dtype(dtype).itemsize)
+                        np.asarray(rows[column], dtype=dtype).tofile(f)
+                meta["rows"] = n + len(dates)
+
+            if history_from is not None and (meta["history_from"] is None or history_from < meta["history_from"]):
+                meta["history_from"] = history_from
+            meta["synced_at"] = time.time()
+            self._write_meta(code, meta)
+
+    def replace(self, code, rows: dict, history_from: str):
+        """저장된 내용을 rows 로 통째로 바꿈 (처음 받은 종목 / 수정주가 변경 / 보충 구간이 비는 경우)"""
+        with self._lock:
+            self._write_all(code, rows, {
+                "rows": len(rows["date"]),
+                "history_from": history_from,
+                "synced_at": time.time(),
+                "columns": list(COLUMNS),
+            })
+
+    def prepend(self, code, rows: dict, history_from: str):
+        """첫 저장일보다 과거 구간을 앞에 붙임 (과거 방향 보충). 마지막 동기화 시각은 유지"""
+        with self._lock:
+            meta = dict(self.meta(code))
+            existing = {column: np.array(self._read_column(code, column)) for column in COLUMNS}
+            first = existing["date"][0] if len(existing["date"]) else None
+            dates = np.asarray(rows["date"], dtype=COLUMNS["date"])
+            keep = dates < first if first is not None else np.ones(len(dates), dtype=bool)
+            merged = {
+                column: np.concatenate([np.asarray(rows[column], dtype=dtype)[keep], existing[column]])
+                for column, dtype in COLUMNS.items()
+            }
+            meta["rows"] = len(merged["date"])
+            if meta["history_from"] is None or history_from < meta["history_from"]:
+                meta["history_from"] = history_from
+            self._write_all(code, merged, meta)
+
+    def _write_all(self, code, rows, meta):
+        os.makedirs(self._dir(code), exist_ok=True)
+        for column, dtype in COLUMNS.items():
+            with open(self._column_path(code, column), "wb") as f:
+                np.asarray(rows[column], dtype=dtype).tofile(f)
+        self._write_meta(code, meta)
@@ -0,0 +1,274 @@
+##### Ollama 비동기 클라이언트 #####
+
+"""
+모든 엔드포인트가 공유하는 Ollama 클라이언트
+
+- httpx.AsyncClient 하나를 재사용 (keep-alive 커넥션 풀)
+- 타임아웃 / 모델 / 생성 옵션은 llm/ollama_config.json 에서 읽음
+- 동시 생성 수 제한: 느린 생성 하나가 워커 전체를 막지 않도록 세마포어로 제어
+- cache=True 로 호출하면 같은 (모델, 시스템 프롬프트, 프롬프트) 결과를 llm_cache 에서 재사용하고,
+  같은 프롬프트가 생성 중이면 새로 생성하지 않고 합류 (single_flight)
+- 계측(metrics): 동시 생성 슬롯 대기(llm_queue), 생성(llm), 스트림 첫 토큰(llm_first_token) 시간,
+  Ollama 가 돌려준 프롬프트 / 응답 토큰 수(prompt_eval_count / eval_count) 누적
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+from llm_cache import llm_cache, make_key
+from metrics import record, registry, span
+from single_flight import flights
+
+CONFIG_PATH = os.getenv(
+    "OLLAMA_CONFIG",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "llm", "ollama_config.json"),
+)
+
+DEFAULT_CONFIG = {
+    "model": "gemma3:4b",
+    "base_url": "http://localhost:11434",
+    "timeout": 180,
+    "connect_timeout": 10,
+    "max_concurrency": 2,
+    "max_connections": 8,
+    "max_tokens": 2048,
+    "temperature": 0.7,
+    "prompt_token_budget": {"default": 1500},  # 모델별 프롬프트 토큰 예산 (prompt_builder)
+}
+
+
+llm_requests = registry.counter("llm_requests_total", "Ollama 호출 수 (캐시 적중 제외)", ("endpoint", "result"))
+llm_tokens = registry.counter("llm_tokens_total", "Ollama 가 처리한 토큰 수", ("model", "kind"))
+
+
+def count_tokens(result: dict):
+    """Ollama 응답(스트림이면 마지막 done 청크)의 토큰 수 누적"""
+    model = result.get("model", "")
+    if result.get("prompt_eval_count"):
+        llm_tokens.inc(result["prompt_eval_count"], model=model, kind="prompt")
+    if result.get("eval_count"):
+        llm_tokens.inc(result["eval_count"], model=model, kind="completion")
+
+
+class OllamaError(Exception):
+    """Ollama 가 200 이외의 상태 코드나 해석할 수 없는 응답을 돌려줌"""
+
+
+def load_config(path=CONFIG_PATH) -> dict:
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, encoding="utf-8") as f:
+            config.update(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Ollama 설정 파일을 읽지 못해 기본값 사용: {e}")
+    # 환경변수가 있으면 우선
+    config["base_url"] = os.getenv("OLLAMA_BASE_URL", config["base_url"])
+    return config
+
+
+class OllamaClient:
+    def __init__(self, config: dict = None, cache=llm_cache):
+        config = config or load_config()
+        self.cache = cache
+        self.config = config
+        self.base_url = config["base_url"].rstrip("/")
+        self.model = config["model"]
+        self.timeout = httpx.Timeout(float(config["timeout"]), connect=float(config["connect_timeout"]))
+        self.options = {
+            "temperature": config["temperature"],
+            "num_predict": config["max_tokens"],
+        }
+        self.max_concurrency = int(config["max_concurrency"])
+        self._limits = httpx.Limits(
+            max_connections=int(config["max_connections"]),
+            max_keepalive_connections=int(config["max_connections"]),
+        )
+        self._semaphore = None  # 실행 중인 이벤트 루프에서 처음 쓸 때 생성 (import 시 만들면 다른 루프에 묶임)
+        self._client = None
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, limits=self._limits)
+        return self._client
+
+    async def _acquire_slot(self):
+        with span("llm_queue"):
+            await self.semaphore.acquire()
+
+    async def _post(self, path, payload, timeout=None):
+        await self._acquire_slot()
+        try:
+            kwargs = {"timeout": timeout} if timeout is not None else {}
+            with span("llm", path):
+                response = await self.client.post(path, json=payload, **kwargs)
+        except Exception:
+            llm_requests.inc(endpoint=path, result="error")
+            raise
+        finally:
+            self.semaphore.release()
+        llm_requests.inc(endpoint=path, result="ok" if response.status_code == 200 else "error")
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama API 오류 ({response.status_code}): {response.text}")
+        try:
+            result = response.json()
+        except ValueError:
+            raise OllamaError(f"Ollama 응답 해석 실패: {response.text[:200]}")
+        count_tokens(result)
+        return result
+
+    async def generate(self, prompt: str, model: str = None, system: str = None, timeout=None, cache=False) -> str:
+        """/api/generate 호출 후 생성된 텍스트 반환"""
+        key = make_key(model or self.model, system, prompt) if cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": False,
+            "options": self.options,
+        }
+        if system:
+            payload["system"] = system
+        if key:
+            # 같은 프롬프트가 생성 중이면 그 결과를 함께 기다림
+            return await flights.do(("generate", key), lambda: self._generate(payload, timeout, key))
+        return await self._generate(payload, timeout, None)
+
+    async def _generate(self, payload, timeout, key):
+        result = await self._post("/api/generate", payload, timeout)
+        text = result.get("response", "").strip()
+        if key:
+            self.cache.set(key, text)
+        return text
+
+    async def chat(self, messages: list, model: str = None, timeout=None, cache=False) -> dict:
+        """/api/chat 호출 후 Ollama 응답 JSON 그대로 반환"""
+        model = model or self.model
+        key = make_key(model, None, messages) if cache else None
+        if key:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {"model": model, "message": {"role": "assistant", "content": cached}, "done": True}
+
+        payload = {
+            "model": model,
+            "messages": messages,
+            "stream": False,
+            "options": self.options,
+        }
+        if key:
+            return await flights.do(("chat", key), lambda: self._chat(payload, timeout, key))
+        return await self._chat(payload, timeout, None)
+
+    async def _chat(self, payload, timeout, key):
+        result = await self._post("/api/chat", payload, timeout)
+        if key:
+            self.cache.set(key, result.get("message", {}).get("content", "").strip())
+        return result
+
+    async def _stream(self, path, payload, extract):
+        """stream=True 응답(NDJSON)을 한 줄씩 읽어 토큰만 내보냄"""
+        await self._acquire_slot()
+        started = time.perf_counter()
+        first_token = True
+        result = "error"
+        try:
+            async with self.client.stream("POST", path, json=payload) as response:
+                if response.status_code != 200:
+                    body = await response.aread()
+                    raise OllamaError(f"Ollama API 오류 ({response.status_code}): {body.decode(errors='replace')}")
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError:
+                        raise OllamaError(f"Ollama 스트림 해석 실패: {line[:200]}")
+                    if chunk.get("error"):
+                        raise OllamaError(chunk["error"])
+                    token = extract(chunk)
+                    if token:
+                        if first_token:
+                            first_token = False
+                            record("llm_first_token", time.perf_counter() - started, path)
+                        yield token
+                    if chunk.get("done"):
+                        count_tokens(chunk)
+                        break
+            result = "ok"
+        finally:
+            self.semaphore.release()
+            llm_requests.inc(endpoint=path, result=result)
+            record("llm", time.perf_counter() - started, path)
+
+    async def _replay(self, text):
+        yield text
+
+    async def _stream_and_store(self, key, tokens):
+        parts = []
+        async for token in tokens:
+            parts.append(token)
+            yield token
+        self.cache.set(key, "".join(parts).strip())
+
+    def _cached_stream(self, key, make_tokens):
+        if not key:
+            return make_tokens()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return self._replay(cached)
+        # 같은 프롬프트 스트림이 진행 중이면 합류 (끊긴 요청이 있어도 생성은 끝까지 진행해 캐시에 저장)
+        return flights.stream(("stream", key), lambda: self._stream_and_store(key, make_tokens()))
+
+    def stream_generate(self, prompt: str, model: str = None, system: str = None, cache=False):
+        """/api/generate 를 스트리밍으로 호출해 토큰을 순서대로 yield"""
+        payload = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": self.options,
+        }
+        if system:
+            payload["system"] = system
+        key = make_key(payload["model"], system, prompt) if cache else None
+        return self._cached_stream(key, lambda: self._stream("/api/generate", payload, lambda chunk: chunk.get("response", "")))
+
+    def stream_chat(self, messages: list, model: str = None, cache=False):
+        """/api/chat 을 스트리밍으로 호출해 토큰을 순서대로 yield"""
+        payload = {
+            "model": model or self.model,
+            "messages": messages,
+            "stream": True,
+            "options": self.options,
+        }
+        key = make_key(payload["model"], None, messages) if cache else None
+        return self._cached_stream(key, lambda: self._stream("/api/chat", payload, lambda chunk: chunk.get("message", {}).get("content", "")))
+
+    async def tags(self) -> dict:
+        response = await self.client.get("/api/tags", timeout=10.0)
+        if response.status_code != 200:
+            raise OllamaError(f"Ollama 서버에 연결할 수 없습니다 ({response.status_code})")
+        return response.json()
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 앱 전체가 공유하는 클라이언트
+ollama = OllamaClient()
@@ -0,0 +1,128 @@
+##### Ollama 대역 서버 #####
+
+"""
+GPU / 모델 없이 부하 측정을 하기 위한 Ollama API 대역 (/api/tags, /api/generate, /api/chat)
+
+- 생성 시간 = 프롬프트 토큰 / OLLAMA_STANDIN_PREFILL_TPS + 응답 토큰 / OLLAMA_STANDIN_TPS
+  (프롬프트가 길수록 느려지므로 프롬프트 크기 변화도 측정됨)
+- 동시 생성 수 OLLAMA_STANDIN_SLOTS (기본 1, 단일 GPU 의 Ollama 처럼 나머지는 대기)
+- stream=True 면 실제 Ollama 처럼 NDJSON 으로 토큰을 하나씩 보냄
+- /stats: 생성 수, 프롬프트 / 응답 토큰 합계, 평균 대기 / 생성 시간
+
+    uvicorn ollama_standin:app --port 11435
+"""
+
+import asyncio
+import json
+import os
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from prompt_builder import estimate_tokens
+
+OLLAMA_STANDIN_TPS = float(os.getenv("OLLAMA_STANDIN_TPS", "30"))                  # 응답 토큰 / 초
+OLLAMA_STANDIN_PREFILL_TPS = float(os.getenv("OLLAMA_STANDIN_PREFILL_TPS", "600"))  # 프롬프트 토큰 / 초
+OLLAMA_STANDIN_TOKENS = int(os.getenv("OLLAMA_STANDIN_TOKENS", "120"))              # 응답 토큰 수
+OLLAMA_STANDIN_SLOTS = int(os.getenv("OLLAMA_STANDIN_SLOTS", "1"))                  # 동시 생성 수
+OLLAMA_STANDIN_MODEL = os.getenv("OLLAMA_STANDIN_MODEL", "gemma3:4b")
+
+RESPONSE_TOKENS = ["분석", " 결과", "를", " 정리", "하면", " 다음", "과", " 같습니다", ".", " "]
+
+app = FastAPI()
+slots = None  # startup 에서 생성 (uvicorn 의 이벤트 루프에 묶이도록)
+stats = {"generations": 0, "prompt_tokens": 0, "response_tokens": 0, "wait_seconds": 0.0, "generate_seconds": 0.0}
+
+
+@app.on_event("startup")
+async def create_slots():
+    global slots
+    slots = asyncio.Semaphore(OLLAMA_STANDIN_SLOTS)
+
+
+def prompt_text(body) -> str:
+    if "messages" in body:
+        return "\n".join(str(message.get("content", "")) for message in body["messages"])
+    return (body.get("system") or "") + str(body.get("prompt", ""))
+
+
+def response_tokens(body) -> int:
+    limit = (body.get("options") or {}).get("num_predict") or OLLAMA_STANDIN_TOKENS
+    return min(int(limit), OLLAMA_STANDIN_TOKENS)
+
+
+async def generate_tokens(body):
+    """슬롯을 얻고 prefill 만큼 대기한 뒤 디코딩 속도로 토큰을 하나씩"""
+    queued = time.monotonic()
+    async with slots:
+        started = time.monotonic()
+        prompt_tokens = estimate_tokens(prompt_text(body))
+        count = response_tokens(body)
+        stats["wait_seconds"] += started - queued
+        stats["generations"] += 1
+        stats["prompt_tokens"] += prompt_tokens
+        stats["response_tokens"] += count
+
+        await asyncio.sleep(prompt_tokens / OLLAMA_STANDIN_PREFILL_TPS)
+        for i in range(count):
+            await asyncio.sleep(1 / OLLAMA_STANDIN_TPS)
+            yield RESPONSE_TOKENS[i % len(RESPONSE_TOKENS)]
+        stats["generate_seconds"] += time.monotonic() - started
+
+
+def chunk(body, token, done):
+    model = body.get("model", OLLAMA_STANDIN_MODEL)
+    if "messages" in body:
+        result = {"model": model, "message": {"role": "assistant", "content": token}, "done": done}
+    else:
+        result = {"model": model, "response": token, "done": done}
+    if done:
+        # 실제 Ollama 처럼 마지막 청크에 토큰 수
+        result["prompt_eval_count"] = estimate_tokens(prompt_text(body))
+        result["eval_count"] = response_tokens(body)
+    return result
+
+
+async def respond(request: Request):
+    body = await request.json()
+    if body.get("stream", True):
+        async def lines():
+            async for token in generate_tokens(body):
+                yield json.dumps(chunk(body, token, False), ensure_ascii=False) + "\n"
+            yield json.dumps(chunk(body, "", True)) + "\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    text = "".join([token async for token in generate_tokens(body)])
+    return JSONResponse(chunk(body, text, True))
+
+
+@app.post("/api/generate")
+async def api_generate(request: Request):
+    return await respond(request)
+
+
+@app.post("/api/chat")
+async def api_chat(request: Request):
+    return await respond(request)
+
+
+@app.get("/api/tags")
+async def api_tags():
+    return {"models": [{"name": OLLAMA_STANDIN_MODEL}]}
+
+
+@app.get("/stats")
+async def get_stats():
+    generations = stats["generations"] or 1
+    return {
+        **stats,
+        "avg_wait_seconds": round(stats["wait_seconds"] / generations, 4),
+        "avg_generate_seconds": round(stats["generate_seconds"] / generations, 4),
+        "avg_prompt_tokens": round(stats["prompt_tokens"] / generations, 1),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="localhost", port=int(os.getenv("OLLAMA_STANDIN_PORT", "11435")))
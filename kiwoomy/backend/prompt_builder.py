@@ -0,0 +1,248 @@
+##### LLM 프롬프트 빌더 #####
+
+"""
+원본 행 리스트를 통째로 넣는 대신 NumPy 로 요약 통계를 계산하고
+모델별 토큰 예산 안에 들어가는 크기의 표만 붙이는 프롬프트 빌더
+
+- 주가: 수익률, 최고 / 최저, 최대낙폭(MDD), 변동성, 이동평균(5 / 20 / 60일), 거래량
+- 공매도: 공매도량 / 매매비중 평균 · 최대 · 추세
+- 수급: 투자자별 순매수 합계, 연속 순매수 일수
+- 표: 기간 전체에서 고르게 뽑은 행 (처음과 마지막 행 포함), 남은 예산만큼만
+- 토큰 예산: llm/ollama_config.json 의 prompt_token_budget (모델명 → 토큰 수, default)
+
+    prompt = compose_prompt(head, price_stats(rows), price_table(rows), tail)
+"""
+
+import numpy as np
+
+from ollama_client import ollama
+
+# 표 최대 행 수 (예산이 남아도 이 이상은 넣지 않음)
+PROMPT_TABLE_MAX_ROWS = 20
+DEFAULT_TOKEN_BUDGET = 1500
+
+# 기관 세부 항목 (opt10059 필드 키)
+INVESTOR_KEYS = ["개인", "외국인", "기관계", "금융투자", "보험", "투신", "기타금융", "은행", "기타법인"]
+
+
+def token_budget(model: str = None) -> int:
+    """모델별 프롬프트 토큰 예산"""
+    budgets = ollama.config.get("prompt_token_budget") or {}
+    if isinstance(budgets, (int, float)):
+        return int(budgets)
+    model = model or ollama.model
+    return int(budgets.get(model, budgets.get("default", DEFAULT_TOKEN_BUDGET)))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    토크나이저 없이 쓰는 보수적인 토큰 수 추정
+    (한글 1자 ≈ 1토큰, 숫자는 자리마다 1토큰, 그 밖의 문자는 3자 ≈ 1토큰)
+    """
+    hangul = digits = spaces = 0
+    for ch in text:
+        if "가" <= ch <= "힣":
+            hangul += 1
+        elif ch.isdigit():
+            digits += 1
+        elif ch.isspace():
+            spaces += 1
+    other = len(text) - hangul - digits - spaces
+    return hangul + digits + other // 3 + 1
+
+
+def _column(rows, key, dtype=float):
+    return np.array([row.get(key, 0) or 0 for row in rows], dtype=dtype)
+
+
+def _date(value) -> str:
+    value = str(value)
+    return f"{value[:4]}-{value[4:6]}-{value[6:8]}" if len(value) == 8 and value.isdigit() else value
+
+
+def _pct(value) -> str:
+    return f"{value:+.2f}%"
+
+
+def _returns(close):
+    """일간 수익률 (전일 종가가 0 인 날은 0)"""
+    prev = close[:-1]
+    return np.divide(np.diff(close), prev, out=np.zeros(len(prev)), where=prev > 0)
+
+
+def _ascending(rows, key):
+    """날짜 오름차순 (수급 TR 은 최신순으로 옴)"""
+    if len(rows) > 1 and str(rows[0].get(key, "")) > str(rows[-1].get(key, "")):
+        return rows[::-1]
+    return rows
+
+
+##### 주가 #####
+
+def price_stats(rows) -> list:
+    """일봉 행 → 요약 통계 줄 목록"""
+    if not rows:
+        return []
+    rows = _ascending(rows, "date")
+    dates = [row["date"] for row in rows]
+    close = _column(rows, "close")
+    volume = _column(rows, "volume")
+    amount = _column(rows, "amount")
+
+    lines = [
+        f"- 기간: {_date(dates[0])} ~ {_date(dates[-1])} ({len(rows)}거래일)",
+        f"- 시작가 {close[0]:,.0f}원 → 현재가 {close[-1]:,.0f}원 ({_pct((close[-1] / close[0] - 1) * 100) if close[0] else 'N/A'})",
+        f"- 최고가 {close.max():,.0f}원 ({_date(dates[int(close.argmax())])}), "
+        f"최저가 {close.min():,.0f}원 ({_date(dates[int(close.argmin())])})",
+    ]
+
+    if len(close) > 1:
+        returns = _returns(close)
+        peak = np.maximum.accumulate(close)
+        drawdown = close / peak - 1
+        trough = int(drawdown.argmin())
+        peak_at = int(close[:trough + 1].argmax())
+        lines += [
+            f"- 일간 변동성 {returns.std() * 100:.2f}% (연환산 {returns.std() * np.sqrt(252) * 100:.1f}%), "
+            f"상승 {int((returns > 0).sum())}일 / 하락 {int((returns < 0).sum())}일",
+            f"- 최대낙폭(MDD) {drawdown[trough] * 100:.2f}% ({_date(dates[peak_at])} 고점 → {_date(dates[trough])})",
+        ]
+
+    averages = []
+    for window in (5, 20, 60):
+        if len(close) >= window:
+            ma = close[-window:].mean()
+            averages.append(f"{window}일 {ma:,.0f}원(현재가 대비 {_pct((close[-1] / ma - 1) * 100)})")
+    if averages:
+        lines.append(f"- 이동평균: {', '.join(averages)}")
+
+    avg_volume = volume.mean()
+    ratio = f" (평균의 {volume[-1] / avg_volume:.1f}배)" if avg_volume else ""
+    lines.append(f"- 거래량: 평균 {avg_volume:,.0f}주, 최근 {volume[-1]:,.0f}주{ratio}")
+    if amount.any():
+        lines.append(f"- 평균 거래대금 {amount.mean():,.0f}백만원")
+    return lines
+
+
+def price_table(rows):
+    rows = _ascending(rows, "date")
+    close = _column(rows, "close")
+    # 표는 행을 건너뛰며 뽑으므로 일간 등락 대신 시작일 대비 누적 수익률
+    cumulative = (close / close[0] - 1) * 100 if len(close) and close[0] else np.zeros(len(close))
+    body = [
+        [_date(row["date"]), f"{row['close']:,}", f"{cumulative[i]:+.1f}", f"{row.get('volume', 0):,}"]
+        for i, row in enumerate(rows)
+    ]
+    return ["날짜", "종가", "시작 대비%", "거래량"], body
+
+
+##### 공매도 #####
+
+def short_stats(rows) -> list:
+    if not rows:
+        return []
+    rows = _ascending(rows, "일자")
+    volume = _column(rows, "공매도량")
+    ratio = _column(rows, "매매비중")
+    dates = [row.get("일자", "") for row in rows]
+
+    lines = [
+        f"- 기간: {_date(dates[0])} ~ {_date(dates[-1])} ({len(rows)}거래일)",
+        f"- 공매도량: 최근 {volume[-1]:,.0f}주, 평균 {volume.mean():,.0f}주, "
+        f"최대 {volume.max():,.0f}주 ({_date(dates[int(volume.argmax())])})",
+        f"- 매매비중: 최근 {ratio[-1]:.2f}%, 평균 {ratio.mean():.2f}%, 최대 {ratio.max():.2f}%",
+    ]
+    if len(rows) >= 4:
+        half = len(rows) // 2
+        first, second = volume[:half].mean(), volume[half:].mean()
+        if first:
+            lines.append(f"- 추세: 후반 평균 공매도량이 전반 대비 {_pct((second / first - 1) * 100)}")
+    avg_price = rows[-1].get("공매도평균가", 0)
+    close = rows[-1].get("종가", 0)
+    if avg_price and close:
+        lines.append(f"- 최근 공매도 평균가 {avg_price:,}원 (종가 {close:,}원 대비 {_pct((close / avg_price - 1) * 100)})")
+    return lines
+
+
+def short_table(rows):
+    rows = _ascending(rows, "일자")
+    body = [
+        [_date(row.get("일자", "")), f"{row.get('종가', 0):,}", f"{row.get('공매도량', 0):,}", f"{row.get('매매비중', 0.0):.2f}"]
+        for row in rows
+    ]
+    return ["일자", "종가", "공매도량", "매매비중%"], body
+
+
+##### 투자자 수급 #####
+
+def _streak(values) -> int:
+    """마지막 날부터 같은 방향(순매수 +, 순매도 -)이 이어진 일수"""
+    if not len(values) or values[-1] == 0:
+        return 0
+    sign = np.sign(values[-1])
+    broken = np.nonzero(np.sign(values[::-1]) != sign)[0]
+    return int(broken[0]) if len(broken) else len(values)
+
+
+def invest_stats(rows) -> list:
+    if not rows:
+        return []
+    rows = _ascending(rows, "일자")
+    dates = [row.get("일자", "") for row in rows]
+    flows = {key: _column(rows, key) for key in INVESTOR_KEYS}
+
+    lines = [
+        f"- 기간: {_date(dates[0])} ~ {_date(dates[-1])} ({len(rows)}거래일), 단위 백만원, 양수는 순매수 / 음수는 순매도",
+        "- 기간 순매수 합계: " + ", ".join(f"{key} {flows[key].sum():+,.0f}" for key in INVESTOR_KEYS if flows[key].any()),
+    ]
+    for key in ("외국인", "기관계", "개인"):
+        streak = _streak(flows[key])
+        if streak:
+            direction = "순매수" if flows[key][-1] > 0 else "순매도"
+            lines.append(f"- {key}: 최근 {streak}일 연속 {direction}, 순매수일 {int((flows[key] > 0).sum())}일")
+    return lines
+
+
+def invest_table(rows):
+    rows = _ascending(rows, "일자")
+    body = [
+        [_date(row.get("일자", ""))] + [f"{row.get(key, 0):+,}" for key in ("개인", "외국인", "기관계")]
+        for row in rows
+    ]
+    return ["일자", "개인", "외국인", "기관계"], body
+
+
+##### 조립 #####
+
+def sample_rows(body, count):
+    """기간 전체에서 고르게 count 행 (처음 / 마지막 행 포함)"""
+    if len(body) <= count:
+        return body
+    if count <= 1:
+        return body[-1:]
+    indexes = np.unique(np.linspace(0, len(body) - 1, count).round().astype(int))
+    return [body[i] for i in indexes]
+
+
+def render_table(table, budget_tokens, max_rows=PROMPT_TABLE_MAX_ROWS) -> str:
+    """예산 안에 들어가는 만큼만 행을 골라 `|` 구분 표로"""
+    header, body = table
+    if not body or budget_tokens <= 0:
+        return ""
+    header_line = " | ".join(header)
+    lines = [" | ".join(row) for row in body]
+    per_row = max(estimate_tokens(line) for line in lines[-5:]) + 1
+    count = min(max_rows, (budget_tokens - estimate_tokens(header_line)) // per_row)
+    if count < 2:
+        return ""
+    picked = sample_rows(lines, count)
+    note = f" (전체 {len(lines)}행 중 {len(picked)}행)" if len(picked) < len(lines) else ""
+    return f"📈 추이 표{note}:\n{header_line}\n" + "\n".join(picked) + "\n"
+
+
+def compose_prompt(head: str, stats: list, table=None, tail: str = "", model: str = None) -> str:
+    """head + 요약 통계 + 남은 토큰 예산에 맞춘 표 + tail"""
+    stats_text = "📊 요약 통계:\n" + "\n".join(stats) + "\n" if stats else ""
+    fixed = head + "\n" + stats_text + "\n" + tail
+    table_text = render_table(table, token_budget(model) - estimate_tokens(fixed)) if table else ""
+    return head + "\n" + stats_text + ("\n" + table_text if table_text else "") + "\n" + tail
@@ -0,0 +1,248 @@
+##### 실시간 시세 WebSocket 허브 #####
+
+"""
+브릿지 실시간 구독 하나를 여러 WebSocket 클라이언트가 나눠 쓰는 팬아웃 허브
+
+- 브릿지에는 전용 연결 하나로, 클라이언트 전체가 보고 있는 종목의 합집합만 SUBSCRIBE
+  (마지막으로 보던 클라이언트가 나가면 UNSUBSCRIBE)
+- 클라이언트별로 QUOTE_PUSH_INTERVAL 마다 바뀐 종목의 최신 틱만 전송
+  (느린 클라이언트는 중간 틱을 건너뛰고 최신값만 받음, 버퍼가 늘지 않음)
+- 브릿지 연결이 끊기면 QUOTE_RECONNECT_DELAY 마다 다시 연결해 구독 복구
+
+클라이언트 메시지:
+    {"action": "subscribe", "codes": ["005930", "SK하이닉스"]}
+    {"action": "unsubscribe", "codes": ["005930"]}
+서버 메시지:
+    {"type": "subscribed", "codes": [...], "data": {종목: 최신 틱}}
+    {"type": "tick", "data": {종목: 최신 틱}}
+    {"type": "error", "message": "..."}
+"""
+
+import asyncio
+import os
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from kiwoom_client import kiwoom, KiwoomError
+from stock_symbols import symbols, normalize_code, is_stock_code
+
+QUOTE_PUSH_INTERVAL = float(os.getenv("QUOTE_PUSH_INTERVAL", "0.5"))        # 클라이언트별 최소 전송 간격(초)
+QUOTE_MAX_CODES = int(os.getenv("QUOTE_MAX_CODES", "50"))                   # 클라이언트 1명이 볼 수 있는 종목 수
+QUOTE_RECONNECT_DELAY = float(os.getenv("QUOTE_RECONNECT_DELAY", "3"))      # 브릿지 재연결 간격(초)
+QUOTE_TIMEOUT = float(os.getenv("QUOTE_TIMEOUT", "10"))                     # SUBSCRIBE 응답 대기(초)
+
+
+class QuoteClient:
+    """WebSocket 클라이언트 하나: 보고 있는 종목과 아직 안 보낸 최신 틱"""
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.codes = set()
+        self.pending = {}               # 종목 → 최신 틱 (덮어쓰기로 묶음)
+        self.wake = asyncio.Event()
+        self.send_lock = asyncio.Lock()
+
+    def push(self, ticks: dict):
+        self.pending.update(ticks)
+        self.wake.set()
+
+    async def send(self, message: dict):
+        async with self.send_lock:
+            await self.websocket.send_json(message)
+
+    async def send_loop(self, interval):
+        while True:
+            await self.wake.wait()
+            self.wake.clear()
+            ticks, self.pending = self.pending, {}
+            if ticks:
+                await self.send({"type": "tick", "data": ticks})
+            await asyncio.sleep(interval)
+
+
+class QuoteHub:
+    def __init__(self, interval=QUOTE_PUSH_INTERVAL, max_codes=QUOTE_MAX_CODES):
+        self.interval = interval
+        self.max_codes = max_codes
+        self.latest = {}        # 종목 → 최신 틱
+        self._watchers = {}     # 종목 → {QuoteClient}
+        self._clients = set()
+        self._conn = None       # 브릿지 실시간 전용 연결
+        self._lock = None       # 브릿지 연결 / 구독 변경 직렬화 (실행 중인 이벤트 루프에서 처음 쓸 때 생성)
+        self._reconnect_task = None
+
+        self.ticks_received = 0
+        self.reconnects = 0
+
+    @property
+    def lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def _bridge(self, command):
+        """실시간 전용 연결로 명령 하나 (끊겼으면 다시 연결하고 보고 있던 종목 재구독)"""
+        if self._conn is None or self._conn.closed:
+            self._conn = await kiwoom.open_stream(self._on_event, QUOTE_TIMEOUT)
+            if self._watchers:
+                self.reconnects += 1
+                await self._request(f"SUBSCRIBE|{','.join(self._watchers)}", resubscribe=True)
+                print(f"🔌 실시간 브릿지 재연결: {len(self._watchers)}종목 재구독")
+        return await self._request(command)
+
+    async def _request(self, command, resubscribe=False):
+        try:
+            response = await asyncio.wait_for(self._conn.request(command), QUOTE_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise KiwoomError(f"키움 응답 시간 초과: {command}")
+        if "error" in response:
+            raise KiwoomError(response["error"])
+        data = response.get("data") or {}
+        if resubscribe or command.startswith("SUBSCRIBE|"):
+            self.latest.update(data.get("ticks") or {})
+        return data
+
+    def _on_event(self, message):
+        """브릿지 틱 푸시 → 해당 종목을 보는 클라이언트별로 나눠 담기"""
+        if message.get("event") != "tick":
+            return
+        ticks = message.get("data") or {}
+        self.latest.update(ticks)
+        self.ticks_received += len(ticks)
+        per_client = {}
+        for code, tick in ticks.items():
+            for client in self._watchers.get(code, ()):
+                per_client.setdefault(client, {})[code] = tick
+        for client, client_ticks in per_client.items():
+            client.push(client_ticks)
+
+    def _resolve(self, codes) -> list:
+        if isinstance(codes, str):
+            codes = codes.split(",")
+        resolved = [normalize_code(symbols.code_of(str(code).strip(), str(code).strip())) for code in codes or []]
+        return list(dict.fromkeys(code for code in resolved if code))
+
+    async def subscribe(self, client, codes) -> dict:
+        await symbols.ensure_loaded()
+        codes = self._resolve(codes)
+        invalid = [code for code in codes if not is_stock_code(code)]
+        if invalid:
+            raise ValueError(f"종목코드 / 종목명을 찾을 수 없음: {', '.join(invalid)}")
+        if len(client.codes | set(codes)) > self.max_codes:
+            raise ValueError(f"구독 종목 수 초과 (최대 {self.max_codes}개)")
+        async with self.lock:
+            new_codes = [code for code in codes if code not in self._watchers]
+            if new_codes:
+                await self._bridge(f"SUBSCRIBE|{','.join(new_codes)}")
+            for code in codes:
+                self._watchers.setdefault(code, set()).add(client)
+                client.codes.add(code)
+        return {code: self.latest[code] for code in codes if code in self.latest}
+
+    async def unsubscribe(self, client, codes=None) -> list:
+        """codes 가 None 이면 클라이언트의 모든 종목"""
+        codes = set(client.codes) if codes is None else set(self._resolve(codes)) & client.codes
+        async with self.lock:
+            dropped = []
+            for code in codes:
+                client.codes.discard(code)
+                client.pending.pop(code, None)
+                watchers = self._watchers.get(code, set())
+                watchers.discard(client)
+                if not watchers:
+                    self._watchers.pop(code, None)
+                    self.latest.pop(code, None)
+                    dropped.append(code)
+            if dropped and self._conn is not None and not self._conn.closed:
+                try:
+                    await self._request(f"UNSUBSCRIBE|{','.join(dropped)}")
+                except (KiwoomError, OSError, ConnectionError) as e:
+                    print(f"⚠️ 실시간 구독 해지 실패: {e}")
+        return sorted(codes)
+
+    async def _keep_connected(self):
+        """보는 종목이 있는데 브릿지 연결이 끊겼으면 다시 연결"""
+        while True:
+            await asyncio.sleep(QUOTE_RECONNECT_DELAY)
+            if not self._watchers or (self._conn is not None and not self._conn.closed):
+                continue
+            async with self.lock:
+                try:
+                    await self._bridge("STATUS")
+                except (KiwoomError, OSError, ConnectionError, asyncio.TimeoutError) as e:
+                    print(f"⚠️ 실시간 브릿지 재연결 실패: {e}")
+
+    async def serve(self, websocket: WebSocket):
+        """/ws/quotes 핸들러 (?codes=005930,000660 으로 바로 구독 가능)"""
+        await websocket.accept()
+        client = QuoteClient(websocket)
+        self._clients.add(client)
+        if self._reconnect_task is None or self._reconnect_task.done():
+            self._reconnect_task = asyncio.create_task(self._keep_connected())
+        sender = asyncio.create_task(self._send_loop(client))
+        try:
+            initial = websocket.query_params.get("codes")
+            if initial:
+                await self._handle(client, {"action": "subscribe", "codes": initial})
+            while True:
+                try:
+                    message = await websocket.receive_json()
+                except ValueError:
+                    await client.send({"type": "error", "message": "JSON 메시지만 지원"})
+                    continue
+                await self._handle(client, message)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            self._clients.discard(client)
+            await self.unsubscribe(client)
+
+    async def _send_loop(self, client):
+        """클라이언트별 틱 전송. 전송 오류로 끝나면 로그를 남기고 연결을 닫음 (구독은 항상 해지)"""
+        try:
+            await client.send_loop(self.interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ 실시간 시세 전송 중단: {e!r}")
+            try:
+                await client.websocket.close()
+            except Exception:
+                pass
+        finally:
+            self._clients.discard(client)
+            await self.unsubscribe(client)
+
+    async def _handle(self, client, message):
+        action = message.get("action") if isinstance(message, dict) else None
+        try:
+            if action == "subscribe":
+                snapshot = await self.subscribe(client, message.get("codes"))
+                await client.send({"type": "subscribed", "codes": sorted(client.codes), "data": snapshot})
+            elif action == "unsubscribe":
+                await self.unsubscribe(client, message.get("codes"))
+                await client.send({"type": "subscribed", "codes": sorted(client.codes), "data": {}})
+            else:
+                await client.send({"type": "error", "message": f"지원하지 않는 action: {action}"})
+        except (KiwoomError, ValueError, OSError, ConnectionError) as e:
+            await client.send({"type": "error", "message": str(e)})
+
+    def stats(self) -> dict:
+        return {
+            "clients": len(self._clients),
+            "codes": len(self._watchers),
+            "connected": self._conn is not None and not self._conn.closed,
+            "ticks_received": self.ticks_received,
+            "reconnects": self.reconnects,
+        }
+
+    async def close(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._conn is not None:
+            self._conn.close()
+
+
+# 앱 전체가 공유하는 허브 (브릿지 실시간 구독 하나)
+quote_hub = QuoteHub()
@@ -0,0 +1,190 @@
+##### 실시간 시세 #####
+
+"""
+SetRealReg / OnReceiveRealData(주식체결) 로 받은 틱을 종목별 최신값 테이블로 유지하고
+구독 중인 연결에 REAL_FLUSH_INTERVAL 마다 바뀐 종목의 최신 틱만 묶어서 밀어줌
+
+- 같은 종목을 여러 연결이 구독해도 키움 실시간 등록은 한 번 (마지막 구독자가 해지하면 등록 해제)
+- 구독 / 해지(네트워크 스레드)는 상태만 바꾸고, SetRealReg / SetRealRemove 는 메인 스레드 sync() 에서
+- 틱 사이에 전송이 밀려도 종목별 최신값만 보내므로 연결당 버퍼가 늘지 않음
+- 화면번호 하나당 최대 REAL_CODES_PER_SCREEN 종목 (TR 화면번호 01xx 와 겹치지 않게 5000번대)
+"""
+
+import os
+import threading
+import time
+
+from tr_fields import text, integer, price, number
+
+REAL_FLUSH_INTERVAL = float(os.getenv("REAL_FLUSH_INTERVAL", "0.2"))  # 구독자별 틱 묶음 전송 간격(초)
+REAL_MAX_CODES = int(os.getenv("REAL_MAX_CODES", "500"))              # 동시에 실시간 등록할 최대 종목 수
+REAL_CODES_PER_SCREEN = 100
+REAL_SCREEN_BASE = 5000
+
+# 주식체결 FID → (결과 키, 변환 함수)
+REAL_FIDS = {
+    20: ("time", text),              # 체결시간 HHMMSS
+    10: ("price", price),            # 현재가
+    11: ("change", integer),         # 전일대비
+    12: ("change_rate", number),     # 등락율
+    15: ("volume", integer),         # 체결량 (+ 매수체결, - 매도체결)
+    13: ("acc_volume", integer),     # 누적거래량
+    14: ("acc_amount", integer),     # 누적거래대금 (백만원)
+    16: ("open", price),             # 시가
+    17: ("high", price),             # 고가
+    18: ("low", price),              # 저가
+    27: ("ask", price),              # 최우선 매도호가
+    28: ("bid", price),              # 최우선 매수호가
+    228: ("strength", number),       # 체결강도
+}
+
+
+class RealFeed:
+    def __init__(self, app, max_codes=REAL_MAX_CODES, flush_interval=REAL_FLUSH_INTERVAL):
+        self.app = app
+        self.max_codes = max_codes
+        self.flush_interval = flush_interval
+        self.latest = {}          # 종목코드 → 최신 틱
+        self.seq = 0              # 틱 수신 순번 (틱마다 seq 로 붙임)
+        self._subscribers = {}    # 구독자 → {"send": 전송 함수, "codes": set, "dirty": set}
+        self._watchers = {}       # 종목코드 → {구독자}
+        self._screens = {}        # 키움에 실시간 등록된 종목코드 → 화면번호
+        self._to_register = set()
+        self._to_remove = set()
+        self._lock = threading.Lock()  # 네트워크 / 메인 / 전송 스레드가 함께 씀
+
+        self.ticks_received = 0
+        self.batches_sent = 0
+
+        app.set_real_handler(self.on_real_data)
+
+    def subscribe(self, subscriber, codes, send) -> dict:
+        """구독 추가 후 이미 받은 최신 틱 스냅샷 반환 (send(ticks): 묶음 전송 함수)"""
+        invalid = [code for code in codes if not (len(code) == 6 and code.isdigit())]
+        if invalid:
+            raise ValueError(f"종목코드가 아님: {', '.join(invalid)}")  # SetRealReg 에 넘기지 않음
+        with self._lock:
+            entry = self._subscribers.get(subscriber)
+            added = [code for code in dict.fromkeys(codes) if entry is None or code not in entry["codes"]]
+            new_codes = [code for code in added if code not in self._watchers]
+            if len(self._watchers) + len(new_codes) > self.max_codes:
+                raise ValueError(f"실시간 등록 종목 수 초과 (최대 {self.max_codes}개)")
+
+            if entry is None:
+                entry = self._subscribers[subscriber] = {"send": send, "codes": set(), "dirty": set()}
+            for code in added:
+                entry["codes"].add(code)
+                self._watchers.setdefault(code, set()).add(subscriber)
+            for code in new_codes:
+                self._to_remove.discard(code)
+                if code not in self._screens:
+                    self._to_register.add(code)
+            if new_codes:
+                print(f"📡 실시간 구독 추가: {new_codes} (전체 {len(self._watchers)}종목)")
+            return {code: self.latest[code] for code in codes if code in self.latest}
+
+    def unsubscribe(self, subscriber, codes=None) -> list:
+        """구독 해지 (codes 가 None 이면 연결 종료로 전체 해지). 해지된 종목 목록 반환"""
+        with self._lock:
+            entry = self._subscribers.get(subscriber)
+            if entry is None:
+                return []
+            removed = set(entry["codes"]) if codes is None else set(codes) & entry["codes"]
+            for code in removed:
+                entry["codes"].discard(code)
+                entry["dirty"].discard(code)
+                watchers = self._watchers[code]
+                watchers.discard(subscriber)
+                if not watchers:
+                    del self._watchers[code]
+                    self.latest.pop(code, None)
+                    self._to_register.discard(code)
+                    if code in self._screens:
+                        self._to_remove.add(code)
+            if not entry["codes"]:
+                del self._subscribers[subscriber]
+            return sorted(removed)
+
+    def _free_screen(self):
+        used = {}
+        for screen in self._screens.values():
+            used[screen] = used.get(screen, 0) + 1
+        screen = REAL_SCREEN_BASE
+        while used.get(str(screen), 0) >= REAL_CODES_PER_SCREEN:
+            screen += 1
+        return str(screen), REAL_CODES_PER_SCREEN - used.get(str(screen), 0)
+
+    def sync(self):
+        """메인(Qt) 스레드: 밀린 실시간 등록 / 해제를 키움에 반영"""
+        if not self._to_register and not self._to_remove:
+            return
+        with self._lock:
+            removes = [(code, self._screens.pop(code)) for code in sorted(self._to_remove) if code in self._screens]
+            self._to_remove.clear()
+            registers = {}
+            pending = sorted(self._to_register)
+            self._to_register.clear()
+            while pending:
+                screen, free = self._free_screen()
+                batch, pending = pending[:free], pending[free:]
+                for code in batch:
+                    self._screens[code] = screen
+                registers[screen] = batch
+
+        for code, screen in removes:
+            self.app.set_real_remove(screen, code)
+        for screen, codes in registers.items():
+            self.app.set_real_reg(screen, codes, list(REAL_FIDS), "1")
+            print(f"📡 실시간 등록: 화면 {screen} {len(codes)}종목")
+
+    def on_real_data(self, code, real_type, real_data):
+        """메인(Qt) 스레드: OnReceiveRealData"""
+        if real_type != "주식체결":
+            return
+        tick = {"code": code}
+        for fid, (key, convert) in REAL_FIDS.items():
+            tick[key] = convert(self.app.get_comm_real_data(code, fid))
+        with self._lock:
+            if code not in self._watchers:
+                return  # 해제 직전에 들어온 틱
+            self.seq += 1
+            self.ticks_received += 1
+            tick["seq"] = self.seq
+            self.latest[code] = tick
+            for subscriber in self._watchers[code]:
+                self._subscribers[subscriber]["dirty"].add(code)
+
+    def flush(self):
+        """구독자마다 마지막 전송 이후 바뀐 종목의 최신 틱만 한 번에 전송"""
+        with self._lock:
+            batches = []
+            for entry in self._subscribers.values():
+                if entry["dirty"]:
+                    batches.append((entry["send"], {code: self.latest[code] for code in entry["dirty"]}))
+                    entry["dirty"] = set()
+        for send, ticks in batches:
+            send(ticks)
+        self.batches_sent += len(batches)
+
+    def run_flusher(self):
+        """전송 전용 스레드 (TR 처리로 메인 스레드가 바빠도 틱 전송은 계속)"""
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ 실시간 틱 전송 실패: {e}")
+
+    def snapshot(self, codes) -> dict:
+        with self._lock:
+            return {code: self.latest[code] for code in codes if code in self.latest}
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "codes": len(self._watchers),
+                "registered": len(self._screens),
+                "subscribers": len(self._subscribers),
+                "ticks_received": self.ticks_received,
+                "batches_sent": self.batches_sent,
+            }
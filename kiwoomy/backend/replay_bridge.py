@@ -0,0 +1,525 @@
+##### 키움 브릿지 녹화 / 재생 서버 #####
+
+"""
+Windows / PyQt5 / 키움 로그인 없이 main.py / integrated_server.py 를 돌리고 부하 측정하기 위한
+server.py 대역 (포트 9999, 같은 프레임 / 평문 프로토콜)
+
+- replay: 녹화 파일(JSON Lines)의 응답을 그대로 돌려줌
+  녹화에 없는 명령은 같은 종류(PRICE, SHORT ...)의 다른 녹화 → 합성 데이터 순으로 대체
+- 지연: TR 명령마다 녹화된 왕복 시간 분포(recorded) 또는 fixed / uniform / lognormal 분포에서 뽑음
+- TR 제한: server.py 와 같은 TrScheduler (사용자 > 백그라운드 우선순위, 같은 명령 합치기,
+  초당 / 시간당 토큰 버킷)와 처리 스레드 하나, tr_registry 와 같은 TR 캐시 시간
+- record: 실제 브릿지 앞에 프록시로 두고 지나가는 명령 / 응답 / 왕복 시간을 녹화
+
+    python replay_bridge.py replay --latency PRICE=lognormal:0.8,0.4 --latency fixed:0.3
+    python replay_bridge.py record --upstream localhost:9999 --port 9998
+"""
+
+import argparse
+import glob
+import json
+import os
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+
+from kiwoom_protocol import FrameDecoder, ProtocolError, encode_frame, is_framed, make_request
+from theme_index import THEME_INDEX_DATE_TYPE
+from tr_registry import TR_SPECS
+from tr_scheduler import TrBudget, TrScheduler, PRIORITIES, PRIORITY_INTERACTIVE
+
+REPLAY_RECORDINGS = os.getenv(
+    "REPLAY_RECORDINGS",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "recordings"),
+)
+REPLAY_HOST = os.getenv("REPLAY_HOST", "localhost")
+REPLAY_PORT = int(os.getenv("REPLAY_PORT", "9999"))
+REPLAY_LATENCY = os.getenv("REPLAY_LATENCY", "recorded")
+REPLAY_DEFAULT_LATENCY = 0.3  # 녹화된 왕복 시간이 없을 때 TR 1건 지연(초)
+# 녹화 시 이보다 빠른 응답은 브릿지 캐시 / 저장소 응답으로 보고 TR 지연 분포에서 뺌
+RECORD_CACHED_THRESHOLD = float(os.getenv("RECORD_CACHED_THRESHOLD", "0.02"))
+
+# OCX 없이 바로 응답하는 명령 (server.LOCAL_COMMANDS 와 같음)
+LOCAL_COMMANDS = {"CODEMAP", "SYMBOLS", "STATUS", "THEMESOF", "THEMEMEMBERS", "TICKS"}
+BATCH_COMMANDS = {"PRICE", "SHORT", "INST", "MINUTE"}
+
+# 명령 → tr_registry TR (캐시 시간). PRICE 는 OHLCV 저장소가 당일 내내 응답하므로 장 마감까지로 봄
+COMMAND_SPECS = {"SHORT": "short_trend", "INST": "investor_trend", "THEMEGROUP": "theme_groups",
+                 "THEME": "theme_stocks", "MINUTE": "minute_chart"}
+PRICE_CACHE_TTL = float(os.getenv("REPLAY_PRICE_CACHE_TTL", "3600"))
+
+# 합성 데이터용 종목 (녹화에 CODEMAP 이 없을 때)
+SYNTHETIC_SYMBOLS = {
+    "005930": "삼성전자", "000660": "SK하이닉스", "373220": "LG에너지솔루션", "207940": "삼성바이오로직스",
+    "005380": "현대차", "000270": "기아", "035420": "NAVER", "035720": "카카오",
+    "068270": "셀트리온", "051910": "LG화학", "000830": "삼성물산", "105560": "KB금융",
+}
+SYNTHETIC_THEMES = {"100": ("반도체", ["005930", "000660"]), "200": ("2차전지", ["373220", "051910"]),
+                    "300": ("인터넷", ["035420", "035720"]), "400": ("자동차", ["005380", "000270"])}
+PERIOD_DAYS = {"1개월": 21, "3개월": 63, "6개월": 125, "1년": 250, "3년": 750}
+
+
+def normalize_command(command: str) -> str:
+    return "|".join(part.strip() for part in command.strip().split("|"))
+
+
+def command_head(command: str) -> str:
+    return command.split("|")[0].upper()
+
+
+def parse_latency(spec: str):
+    """'fixed:0.3' / 'uniform:0.1,0.5' / 'lognormal:중앙값,sigma' / 'recorded' → 초 단위 샘플러 (recorded 는 None)"""
+    kind, _, args = spec.partition(":")
+    values = [float(value) for value in args.split(",") if value]
+    if kind == "recorded":
+        return None
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma)
+    raise ValueError(f"지원하지 않는 지연 분포: {spec}")
+
+
+def parse_latency_options(options) -> dict:
+    """['PRICE=lognormal:0.8,0.4', 'fixed:0.3'] → {"PRICE": 샘플러, "*": 샘플러}"""
+    samplers = {}
+    for option in options or [REPLAY_LATENCY]:
+        head, _, spec = option.rpartition("=")
+        samplers[head.upper() or "*"] = parse_latency(spec)
+    return samplers
+
+
+##### 녹화 #####
+
+class Recording:
+    """녹화 파일 묶음: 명령 → 응답 목록, 명령 종류 → 왕복 시간 목록"""
+
+    def __init__(self):
+        self.responses = {}  # 명령 → [{"data"} 또는 {"error"}]
+        self.by_head = {}    # 명령 종류 → [명령]
+        self.elapsed = {}    # 명령 종류 → [왕복 시간(초)]
+
+    def __len__(self):
+        return len(self.responses)
+
+    def add(self, entry: dict):
+        command = normalize_command(entry["cmd"])
+        head = command_head(command)
+        response = {"error": entry["error"]} if entry.get("error") is not None else {"data": entry.get("data")}
+        if command not in self.responses:
+            self.by_head.setdefault(head, []).append(command)
+        self.responses.setdefault(command, []).append(response)
+        if entry.get("elapsed") is not None and not entry.get("cached"):
+            self.elapsed.setdefault(head, []).append(float(entry["elapsed"]))
+
+    def load(self, directory):
+        for path in sorted(glob.glob(os.path.join(directory, "*.jsonl"))):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self.add(json.loads(line))
+        print(f"🎞️ 녹화 로드: {len(self.responses)}개 명령 ({', '.join(f'{h} {len(c)}' for h, c in self.by_head.items())})")
+
+    def lookup(self, command, rng):
+        """(응답, 출처) 출처는 exact / similar / None"""
+        responses = self.responses.get(command)
+        if responses:
+            return rng.choice(responses), "exact"
+        similar = [c for c in self.by_head.get(command_head(command), []) if "error" not in self.responses[c][0]]
+        if similar:
+            return self.responses[rng.choice(similar)][0], "similar"
+        return None, None
+
+
+class Recorder:
+    """녹화 파일에 한 줄씩 추가 (연결 스레드 여러 개가 씀)"""
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"bridge-{datetime.now():%Y%m%d-%H%M%S}.jsonl")
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def write(self, command, response, elapsed):
+        entry = {"cmd": normalize_command(command), "elapsed": round(elapsed, 4), "recorded_at": time.time(),
+                 "cached": elapsed < RECORD_CACHED_THRESHOLD}
+        if "error" in response:
+            entry["error"] = response["error"]
+        else:
+            entry["data"] = response.get("data")
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.count += 1
+
+
+##### 합성 데이터 #####
+
+def synthetic_members(members, base):
+    """THEME(opt90002) 응답 / 테마 인덱스 구성종목 행"""
+    return [{"종목코드": member, "종목명": SYNTHETIC_SYMBOLS.get(member, member), "현재가": base,
+             "등락기호": "2", "전일대비": 100, "등락율": 1.0, "누적거래량": 100000, "매도호가": base + 50,
+             "매도잔량": 100, "매수호가": base - 50, "매수잔량": 100, "기간수익률n": 1.0} for member in members]
+
+
+def synthetic_theme(theme_code):
+    """theme_index.ThemeIndex._theme 과 같은 모양의 테마 구성종목"""
+    name, members = SYNTHETIC_THEMES[theme_code]
+    return {
+        "테마코드": theme_code,
+        "테마명": name,
+        "그룹": {"종목코드": theme_code, "테마명": name, "종목수": len(members)},
+        "종목들": synthetic_members(members, 10000 + (sum(map(ord, theme_code)) % 90) * 1000),
+        "종목수": len(members),
+        "fetched_at": 0,
+    }
+
+
+def synthesize(command, rng):
+    """녹화가 없을 때 실제 응답과 같은 모양의 데이터"""
+    parts = command.split("|")
+    head = command_head(command)
+    code = parts[1] if len(parts) > 1 else "005930"
+    base = 10000 + (sum(map(ord, code)) % 90) * 1000
+    today = datetime.today()
+
+    def trading_days(count):
+        days, day = [], today
+        while len(days) < count:
+            if day.weekday() < 5:
+                days.append(day.strftime("%Y%m%d"))
+            day -= timedelta(days=1)
+        return days[::-1]
+
+    if head == "CODEMAP":
+        return dict(SYNTHETIC_SYMBOLS)
+    if head == "SYMBOLS":
+        return {"version": 1, "full": True, "symbols": {
+            code: {"name": name, "market": "KOSPI", "listed_date": "19900101", "listed_shares": 100000000}
+            for code, name in SYNTHETIC_SYMBOLS.items()
+        }}
+    if head == "PRICE":
+        rows, close = [], base
+        for date in trading_days(PERIOD_DAYS.get(parts[2] if len(parts) > 2 else "", 21)):
+            open_ = close
+            close = max(100, int(close * (1 + rng.gauss(0, 0.015))))
+            volume = rng.randint(100000, 5000000)
+            rows.append({"date": date, "open": open_, "high": max(open_, close) + 100, "low": min(open_, close) - 100,
+                         "close": close, "volume": volume, "amount": volume * close // 1000000})
+        return rows
+    if head == "SHORT":
+        return [{"일자": date, "종가": base + rng.randint(-500, 500), "공매도량": rng.randint(1000, 200000),
+                 "매매비중": round(rng.uniform(0.5, 8), 2), "공매도거래대금": rng.randint(10, 5000),
+                 "공매도평균가": base + rng.randint(-500, 500)} for date in trading_days(10)]
+    if head == "INST":
+        rows = []
+        for date in trading_days(10)[::-1]:
+            row = {"일자": date, **{key: rng.randint(-5000, 5000) for key in
+                                  ("개인", "외국인", "기관계", "금융투자", "보험", "투신", "기타금융", "은행", "기타법인")}}
+            rows.append(row)
+        return rows
+    if head == "THEMEGROUP":
+        stock_code = parts[4] if len(parts) > 4 else ""
+        return [{"종목코드": theme_code, "테마명": name, "종목수": len(members), "등락기호": "2",
+                 "등락율": round(rng.uniform(-3, 3), 2), "상승종목수": 1, "하락종목수": 1,
+                 "기간수익률": round(rng.uniform(-10, 10), 2), "주요종목": SYNTHETIC_SYMBOLS[members[0]]}
+                for theme_code, (name, members) in SYNTHETIC_THEMES.items()
+                if not stock_code or stock_code in members]
+    if head == "THEME":
+        _, members = SYNTHETIC_THEMES.get(code, ("", list(SYNTHETIC_SYMBOLS)[:3]))
+        return synthetic_members(members, base)
+    if head == "MINUTE":
+        return [{"체결시간": f"{today:%Y%m%d}09{minute:02d}00", "시가": base, "고가": base + 100,
+                 "저가": base - 100, "현재가": base, "거래량": rng.randint(100, 10000)} for minute in range(30)]
+    if head == "THEMESOF":
+        themes = [synthetic_theme(theme_code) for theme_code, (_, members) in SYNTHETIC_THEMES.items() if code in members]
+        return {"code": code, "date_type": THEME_INDEX_DATE_TYPE, "themes": themes, "refreshed_at": 0, "pending": 0}
+    if head == "THEMEMEMBERS":
+        return synthetic_theme(code) if code in SYNTHETIC_THEMES else None
+    if head == "TICKS":
+        return {}
+    return None
+
+
+##### 재생 서버 #####
+
+class ReplayBridge:
+    def __init__(self, recording, latency, synthetic=True, seed=None, budget=None):
+        self.recording = recording
+        self.latency = latency        # 명령 종류(또는 "*") → 샘플러, None 이면 녹화 분포
+        self.synthetic = synthetic
+        self.rng = random.Random(seed)
+        self.scheduler = TrScheduler(budget or TrBudget())
+        self._cache = {}              # 명령 → (만료 시각, 응답)
+        self._cache_lock = threading.Lock()
+
+        self.served = {"exact": 0, "similar": 0, "synthetic": 0, "missing": 0, "cached": 0}
+
+    def cache_ttl(self, head) -> float:
+        if head == "PRICE":
+            return PRICE_CACHE_TTL
+        spec = TR_SPECS.get(COMMAND_SPECS.get(head))
+        return spec.cache_ttl if spec else 0
+
+    def sample_latency(self, head) -> float:
+        sampler = self.latency.get(head, self.latency.get("*"))
+        if sampler is not None:
+            return sampler(self.rng)
+        recorded = self.recording.elapsed.get(head)
+        return self.rng.choice(recorded) if recorded else REPLAY_DEFAULT_LATENCY
+
+    def respond(self, command) -> dict:
+        """녹화 → 비슷한 녹화 → 합성 순으로 응답 프레임 본문({"data"} / {"error"})"""
+        response, source = self.recording.lookup(command, self.rng)
+        if response is None and self.synthetic:
+            data = synthesize(command, self.rng)
+            if data is not None:
+                response, source = {"data": data}, "synthetic"
+        if response is None:
+            self.served["missing"] += 1
+            return {"error": f"녹화에 없는 명령: {command}"}
+        self.served[source] += 1
+        return response
+
+    def cached(self, command):
+        with self._cache_lock:
+            entry = self._cache.get(command)
+            if entry is not None and entry[0] > time.monotonic():
+                self.served["cached"] += 1
+                return entry[1]
+        return None
+
+    def run_tr(self, command):
+        """처리 스레드: 조회 제한 토큰을 받고 TR 왕복 시간만큼 대기 후 응답"""
+        head = command_head(command)
+        self.scheduler.budget.acquire()
+        time.sleep(self.sample_latency(head))
+        response = self.respond(command)
+        ttl = self.cache_ttl(head)
+        if ttl and "error" not in response:
+            with self._cache_lock:
+                self._cache[command] = (time.monotonic() + ttl, response)
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["data"]
+
+    def status(self) -> dict:
+        status = self.scheduler.stats()
+        status["replay"] = dict(self.served, recorded_commands=len(self.recording))
+        status["metrics"] = self.scheduler.metrics()
+        return status
+
+    def dispatch(self, command, callback, priority=PRIORITY_INTERACTIVE):
+        """server.dispatch 와 같은 흐름: 로컬 명령 즉시, 캐시 적중 즉시, 나머지는 스케줄러 큐"""
+        command = normalize_command(command)
+        head = command_head(command)
+        if head == "BATCH":
+            self.dispatch_batch(command, callback, priority)
+        elif head == "STATUS":
+            callback(self.status(), None)
+        elif head in ("SUBSCRIBE", "UNSUBSCRIBE"):
+            codes = [code for code in command.split("|")[1].split(",") if code] if "|" in command else []
+            callback({"codes": codes, "ticks": {}} if head == "SUBSCRIBE" else {"codes": codes}, None)
+        elif head in LOCAL_COMMANDS:
+            response = self.respond(command)
+            callback(response.get("data"), RuntimeError(response["error"]) if "error" in response else None)
+        else:
+            response = self.cached(command)
+            if response is not None:
+                callback(response["data"], None)
+            else:
+                self.scheduler.submit(command, callback, priority)
+
+    def dispatch_batch(self, command, callback, priority):
+        parts = command.split("|")
+        if len(parts) < 3 or parts[1].upper() not in BATCH_COMMANDS:
+            callback(None, ValueError("지원되지 않는 BATCH 형식"))
+            return
+        codes = list(dict.fromkeys(code.strip() for code in parts[2].split(",") if code.strip()))
+        results = {}
+        lock = threading.Lock()
+
+        def collect(code):
+            def on_result(data, error):
+                with lock:
+                    results[code] = {"error": str(error)} if error is not None else data
+                    done = len(results) == len(codes)
+                if done:
+                    callback({code: results[code] for code in codes}, None)
+            return on_result
+
+        for code in codes:
+            self.dispatch("|".join([parts[1].upper(), code, *parts[3:]]), collect(code), priority)
+
+    def process_forever(self):
+        """server.py 메인(Qt) 스레드처럼 TR 을 하나씩 처리"""
+        while True:
+            job = self.scheduler.next_job(timeout=0.05)
+            if job is not None:
+                self.scheduler.run_job(job, self.run_tr)
+
+
+def serve_connection(conn, addr, handle):
+    """
+    연결 하나 처리. handle(command, reply, priority) 이 응답을 reply(response) 로 돌려줌
+    (프레임 방식은 연결 유지, 평문 방식은 응답 후 연결 종료 → server.py 와 같음)
+    """
+    send_lock = threading.Lock()
+
+    def send(payload):
+        with send_lock:
+            try:
+                conn.sendall(payload)
+            except OSError as e:
+                print(f"❌ 응답 전송 실패 {addr}: {e}")
+
+    try:
+        chunk = conn.recv(65536)
+        if not chunk:
+            return
+        if not is_framed(chunk):
+            done = threading.Event()
+
+            def reply_legacy(response):
+                send(json.dumps(response.get("data") if "error" not in response else response, ensure_ascii=False).encode())
+                done.set()
+
+            handle(chunk.decode(), reply_legacy, PRIORITY_INTERACTIVE)
+            done.wait()
+            return
+
+        decoder = FrameDecoder()
+        while chunk:
+            for request in decoder.feed(chunk):
+                request_id = request.get("id")
+
+                def reply(response, request_id=request_id):
+                    send(encode_frame({"id": request_id, **response}))
+
+                handle(str(request.get("cmd", "")), reply, PRIORITIES.get(request.get("priority"), PRIORITY_INTERACTIVE))
+            chunk = conn.recv(65536)
+    except (OSError, ProtocolError) as e:
+        print(f"❌ 연결 오류 {addr}: {e}")
+    finally:
+        conn.close()
+
+
+def listen(host, port, handle):
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+        # Windows 의 SO_REUSEADDR 은 실행 중인 브릿지와 같은 포트를 함께 bind 하게 하므로 배타적으로
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+    else:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  # 벤치마크 재시작 시 TIME_WAIT 포트 재사용
+    server.bind((host, port))
+    server.listen(128)
+    print(f"✅ 소켓 대기 시작 {host}:{port}")
+    while True:
+        conn, addr = server.accept()
+        threading.Thread(target=serve_connection, args=(conn, addr, handle), daemon=True).start()
+
+
+def run_replay(args):
+    recording = Recording()
+    recording.load(args.recordings)
+    budget = TrBudget(args.tr_rate, args.tr_rate_hour)
+    bridge = ReplayBridge(recording, parse_latency_options(args.latency), not args.no_synthetic, args.seed, budget)
+
+    def handle(command, reply, priority):
+        def on_result(data, error):
+            reply({"error": str(error)} if error is not None else {"data": data})
+        bridge.dispatch(command, on_result, priority)
+
+    threading.Thread(target=bridge.process_forever, name="replay-tr", daemon=True).start()
+    print(f"🎞️ 키움 브릿지 재생 서버 (TR 초당 {args.tr_rate}, 시간당 {args.tr_rate_hour})")
+    listen(args.host, args.port, handle)
+
+
+##### 녹화 프록시 #####
+
+class UpstreamBridge:
+    """실제 브릿지로 가는 프레임 연결 하나 (요청 id 로 응답 매칭, 여러 스레드가 공유)"""
+
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port))
+        self.pending = {}
+        self.ids = iter(range(1, 1 << 62))
+        self.lock = threading.Lock()
+        threading.Thread(target=self._read_loop, name="record-upstream", daemon=True).start()
+
+    def request(self, command, priority, callback):
+        with self.lock:
+            request_id = next(self.ids)
+            self.pending[request_id] = (callback, time.monotonic())
+            self.sock.sendall(encode_frame(make_request(request_id, command, priority)))
+
+    def _read_loop(self):
+        decoder = FrameDecoder()
+        while True:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                print("❌ 실제 브릿지 연결 종료")
+                os._exit(1)
+            for message in decoder.feed(chunk):
+                with self.lock:
+                    callback, started = self.pending.pop(message.get("id"), (None, None))
+                if callback:
+                    callback(message, time.monotonic() - started)
+
+
+def run_record(args):
+    host, _, port = args.upstream.partition(":")
+    upstream = UpstreamBridge(host, int(port or 9999))
+    recorder = Recorder(args.out)
+    priority_names = {value: name for name, value in PRIORITIES.items()}
+
+    def handle(command, reply, priority):
+        command = normalize_command(command)
+
+        def on_response(message, elapsed):
+            response = {key: message[key] for key in ("data", "error") if key in message}
+            if command_head(command) not in ("SUBSCRIBE", "UNSUBSCRIBE"):
+                recorder.write(command, response, elapsed)
+            reply(response)
+
+        upstream.request(command, priority_names.get(priority), on_response)
+
+    print(f"⏺️ 녹화 프록시 {args.host}:{args.port} → {args.upstream}, 저장: {recorder.path}")
+    listen(args.host, args.port, handle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="키움 브릿지 녹화 / 재생 서버")
+    sub = parser.add_subparsers(dest="mode", required=True)
+
+    replay = sub.add_parser("replay", help="녹화된 응답으로 server.py 대신 응답")
+    replay.add_argument("--recordings", default=REPLAY_RECORDINGS, help="녹화 파일(*.jsonl) 폴더")
+    replay.add_argument("--host", default=REPLAY_HOST)
+    replay.add_argument("--port", type=int, default=REPLAY_PORT)
+    replay.add_argument("--latency", action="append",
+                        help="TR 지연 분포 [명령=]recorded | fixed:초 | uniform:최소,최대 | lognormal:중앙값,sigma (여러 번 지정 가능)")
+    replay.add_argument("--tr-rate", type=float, default=TrBudget().buckets[0].rate, help="초당 TR 수")
+    replay.add_argument("--tr-rate-hour", type=float, default=TrBudget().buckets[1].capacity, help="시간당 TR 수")
+    replay.add_argument("--no-synthetic", action="store_true", help="녹화에 없는 명령은 합성하지 않고 오류 응답")
+    replay.add_argument("--seed", type=int, default=None)
+
+    record = sub.add_parser("record", help="실제 브릿지 앞 프록시로 명령 / 응답 녹화")
+    record.add_argument("--upstream", default="localhost:9999", help="실제 브릿지 host:port")
+    record.add_argument("--host", default=REPLAY_HOST)
+    record.add_argument("--port", type=int, default=9998)
+    record.add_argument("--out", default=REPLAY_RECORDINGS)
+
+    args = parser.parse_args()
+    try:
+        run_replay(args) if args.mode == "replay" else run_record(args)
+    except KeyboardInterrupt:
+        print("\n👋 종료")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,39 +1,73 @@
 ##### 키움 서버 실행 #####
 
 from kiwoom_app import KiwoomApp
-from price_collector import PriceCollector
-from short_sale_collector import ShortSaleCollector
-from theme_collector import ThemeStockCollector
-from theme_group_collector import ThemeGroupCollector
-from invest_trend_collector import  InvestorTrendCollector
+from tr_engine import TrEngine
+from base_collector import tr_round_trip
+from daily_chart import DailyChart
+from symbol_master import SymbolMaster
+from theme_index import ThemeIndex, THEME_INDEX_DATE_TYPE, normalize_code
+from real_feed import RealFeed
 from get_start_date import get_start_date 
 
+from kiwoom_protocol import FrameDecoder, ProtocolError, encode_frame, is_framed, make_response, make_event
+
+from tr_scheduler import TrScheduler, PRIORITIES, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+import collections
 import socket
+import selectors
+import threading
 import json
+import os
+import time
 
 HOST = 'localhost'
 PORT = 9999
 
-app = KiwoomApp()
-app.connect()
+app = KiwoomApp()  # 로그인(app.connect)은 소켓을 연 뒤 맨 아래에서
 
-price = PriceCollector(app.ocx, app) ## 주가 추이
-short = ShortSaleCollector(app.ocx, app) ## 공매도 현황
-theme = ThemeStockCollector(app.ocx, app) ## 테마 구성 종목
-theme_group = ThemeGroupCollector(app.ocx, app) ## 테마 그룹별
-inst = InvestorTrendCollector(app.ocx, app) ## 종목별 투자자 기관별 요청
+engine = TrEngine(app.ocx, app) ## tr_registry 의 모든 TR (공매도, 수급, 테마 ...)
+daily = DailyChart(engine) ## 주가 추이 (OHLCV 저장소)
 
-# 종목코드 → 종목명 매핑 생성
-raw_name_code_map = price.get_stock_name_code_map()
-name_code_map = {code: name for name, code in raw_name_code_map.items()}
-print(f"🔧 종목코드 매핑 생성 완료: {len(name_code_map)}개 종목")
-print(f"🔧 매핑 샘플: {list(name_code_map.items())[:5]}")
+# 종목 마스터: 디스크 스냅샷으로 바로 응답하고 로그인 후 백그라운드로 갱신
+master = SymbolMaster()
+master.load()
 
-print("✅ Kiwoom 서버 실행됨")
+# 테마 구성 인덱스: 종목 → 테마 / 테마 → 종목을 TR 없이 응답, 주기적으로 바뀐 테마만 재조회
+theme_index = ThemeIndex()
+theme_index.load()
 
-server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-server.bind((HOST, PORT))
-server.listen(5)
+# 실시간 시세: 구독 연결들이 공유하는 실시간 등록 + 종목별 최신 틱
+real_feed = RealFeed(app)
+
+def resolve_code(code_or_name):
+    """종목코드는 그대로, 종목명이면 코드로 변환"""
+    return master.code_of(code_or_name, code_or_name)
+
+# TR 요청 큐 + 조회 제한(토큰 버킷). 모든 CommRqData 는 이 예산을 거침
+scheduler = TrScheduler()
+app.tr_budget = scheduler.budget
+
+# OCX 를 쓰지 않아 네트워크 스레드에서 바로 응답하는 명령
+LOCAL_COMMANDS = {"CODEMAP", "SYMBOLS", "STATUS", "THEMESOF", "THEMEMEMBERS", "TICKS"}
+
+# 연결에 틱을 밀어주는 구독 명령 (프레임 연결 전용)
+STREAM_COMMANDS = {"SUBSCRIBE", "UNSUBSCRIBE"}
+
+# 인자 하나가 꼭 필요한 로컬 / 구독 명령 → 인자 형식 (인자 수가 틀리면 형식 오류로 응답)
+COMMAND_ARGS = {
+    "THEMESOF": "종목", "THEMEMEMBERS": "테마코드", "THEMEINDEX": "테마코드",
+    "TICKS": "종목1,종목2", "SUBSCRIBE": "종목1,종목2", "UNSUBSCRIBE": "종목1,종목2",
+}
+
+# BATCH|명령|종목1,종목2,...|나머지 인자 로 여러 종목을 한 번에 받을 수 있는 명령
+BATCH_COMMANDS = {"PRICE", "SHORT", "INST", "MINUTE"}
+BATCH_MAX_CODES = int(os.getenv("BATCH_MAX_CODES", "50"))
+
+# 연결별로 아직 보내지 못한 응답 한도 (넘으면 읽지 않는 클라이언트로 보고 연결 종료)
+SEND_BUFFER_LIMIT = int(os.getenv("SEND_BUFFER_LIMIT", str(32 * 1024 * 1024)))
+
+print("✅ Kiwoom 서버 실행됨")
 
 def receive_all(conn):
     buffer = b""
@@ -44,59 +78,465 @@ def receive_all(conn):
         buffer += part
     return buffer.decode()
 
-while True:
-    conn, addr = server.accept()
-    try:
-        msg = conn.recv(1024).decode().strip()
-        print(f"[수신된 원본 메시지] {repr(msg)}")
-        parts = [p.strip() for p in msg.split("|")]
-        print(f"[분해된 parts] {parts}")
-        print(f"[명령 분석] 구분자: {parts[0].upper()} / 길이: {len(parts)} / 전체: {parts}")
-
-        if len(parts) == 2:
-            code_or_name, label = parts
-            code = name_code_map.get(code_or_name.strip(), code_or_name.strip())
-            data = price.request_daily_chart(code, get_start_date(label))
-        
-        elif len(parts) == 4 and parts[0].upper() == "SHORT":
-            _, code_or_name, start, end = parts
-            resolved_code = name_code_map.get(code_or_name.strip(), code_or_name.strip())
-            print(f"[공매도 요청] {code_or_name} → {resolved_code}, 기간: {start} ~ {end}")
-            data = short.request_short_trend(resolved_code, start, end)
-        
-        elif len(parts) == 3 and parts[0].upper() == "THEME":
-            _, theme_code, date_type = parts
-            print(f"[테마 요청] 코드: {theme_code}, 날짜구분: {date_type}")
-            data = theme.request_theme_stocks(theme_code, date_type)
-
-        elif len(parts) == 6 and parts[0].upper() == "THEMEGROUP":
-            _, date_type, search_type, theme_name, stock_code, rank_type = parts
-            print(f"[테마그룹 요청] 날짜: {date_type}, 검색: {search_type}, 테마명: {theme_name}, 종목코드: {stock_code}, 정렬: {rank_type}")
-            data = theme_group.request_theme_groups(
-                date_type=date_type,
-                search_type=search_type,
-                theme_name=theme_name,
-                stock_code=stock_code,
-                rank_type=rank_type
+def parse_command(msg):
+    """`|` 구분 명령 → (TR 명세 이름, 파라미터). OCX 가 필요 없는 명령은 (명령, {})"""
+    parts = [p.strip() for p in msg.strip().split("|")]
+    command = parts[0].upper()
+
+    if len(parts) in (3, 4) and command == "PRICE":
+        # PRICE|code|기간[|최대 페이지 수]
+        params = {"code": resolve_code(parts[1]), "start_date": get_start_date(parts[2])}
+        if len(parts) == 4 and parts[3]:
+            params["max_pages"] = int(parts[3])
+        return "daily_chart", params
+
+    elif command == "SYMBOLS":
+        # SYMBOLS[|보유 버전] → 전체 또는 보유 버전 이후 변경분
+        since = parts[1] if len(parts) > 1 and parts[1] else None
+        return command, {"since_version": int(since) if since is not None else None}
+
+    elif len(parts) == 2 and command == "THEMESOF":
+        # THEMESOF|종목 → 인덱스에서 종목이 속한 테마와 구성종목
+        return command, {"code": resolve_code(parts[1])}
+
+    elif len(parts) == 2 and (command in STREAM_COMMANDS or command == "TICKS"):
+        # SUBSCRIBE|종목1,종목2 / UNSUBSCRIBE|... / TICKS|... (최신 틱 스냅샷)
+        codes = [normalize_code(resolve_code(code.strip())) for code in parts[1].split(",") if code.strip()]
+        if not codes:
+            raise ValueError(f"{command} 종목이 비어 있음")
+        return command, {"codes": list(dict.fromkeys(codes))}
+
+    elif len(parts) == 2 and command in ("THEMEMEMBERS", "THEMEINDEX"):
+        # THEMEMEMBERS|테마코드 → 인덱스 조회, THEMEINDEX|테마코드 → 구성종목 재조회(백그라운드)
+        return command, {"theme_code": parts[1]}
+
+    elif command in COMMAND_ARGS:
+        raise ValueError(f"{command} 인자 수 오류: {command}|{COMMAND_ARGS[command]} 형식 (인자 {len(parts) - 1}개)")
+
+    elif len(parts) == 2 and command not in LOCAL_COMMANDS:
+        code_or_name, label = parts
+        return "daily_chart", {"code": resolve_code(code_or_name), "start_date": get_start_date(label)}
+
+    elif len(parts) == 4 and command == "SHORT":
+        _, code_or_name, start, end = parts
+        return "short_trend", {"code": resolve_code(code_or_name), "start_date": start, "end_date": end}
+
+    elif len(parts) == 3 and command == "THEME":
+        _, theme_code, date_type = parts
+        return "theme_stocks", {"theme_code": theme_code, "date_type": date_type}
+
+    elif len(parts) == 6 and command == "THEMEGROUP":
+        _, date_type, search_type, theme_name, stock_code, rank_type = parts
+        return "theme_groups", {
+            "date_type": date_type,
+            "search_type": search_type,
+            "theme_name": theme_name,
+            "stock_code": stock_code,
+            "rank_type": rank_type,
+        }
+
+    elif len(parts) == 4 and command == "INST":
+        _, code_or_name, from_date, to_date = parts
+        return "investor_trend", {"code": resolve_code(code_or_name), "from_date": from_date, "to_date": to_date}
+
+    elif len(parts) == 3 and command == "MINUTE":
+        _, code_or_name, interval = parts
+        return "minute_chart", {"code": resolve_code(code_or_name), "interval": interval}
+
+    elif command in LOCAL_COMMANDS or command in ("SYMBOLREFRESH", "THEMEREFRESH"):
+        return command, {}
+
+    raise ValueError("지원되지 않는 형식")
+
+def expand_batch(msg):
+    """BATCH 명령 → [(종목, 종목별 단건 명령)] (중복 종목은 한 번만)"""
+    parts = [p.strip() for p in msg.strip().split("|")]
+    if len(parts) < 3 or parts[1].upper() not in BATCH_COMMANDS:
+        raise ValueError("지원되지 않는 BATCH 형식")
+    command, rest = parts[1].upper(), parts[3:]
+    codes = list(dict.fromkeys(code.strip() for code in parts[2].split(",") if code.strip()))
+    if not codes:
+        raise ValueError("BATCH 종목이 비어 있음")
+    if len(codes) > BATCH_MAX_CODES:
+        raise ValueError(f"BATCH 종목 수 초과: {len(codes)}개 (최대 {BATCH_MAX_CODES}개)")
+    return [(code, "|".join([command, code, *rest])) for code in codes]
+
+def handle_command(msg):
+    """`|` 구분 명령 하나를 처리하고 결과 데이터를 반환"""
+    print(f"[수신된 원본 메시지] {repr(msg.strip())}")
+    name, params = parse_command(msg)
+    print(f"[명령 분석] {name} / {params}")
+
+    if name == "CODEMAP":
+        print(f"[종목코드 맵 요청]")
+        return master.code_to_name()
+
+    elif name == "SYMBOLS":
+        return master.delta(params["since_version"])
+
+    elif name == "SYMBOLREFRESH":
+        master.update(app.get_symbol_master())
+        return {"version": master.version, "count": len(master)}
+
+    elif name == "STATUS":
+        status = scheduler.stats()
+        status["tr_cache"] = engine.stats()
+        status["theme_index"] = theme_index.stats()
+        status["real"] = real_feed.stats()
+        status["metrics"] = scheduler.metrics() + [tr_round_trip.family()]  # FastAPI /metrics 가 렌더링
+        return status
+
+    elif name == "THEMESOF":
+        return theme_index.themes_of(params["code"], master.name_of)
+
+    elif name == "THEMEMEMBERS":
+        members = theme_index.members_of(params["theme_code"], master.name_of)
+        if members is None:
+            raise ValueError(f"인덱스에 없는 테마: {params['theme_code']}")
+        return members
+
+    elif name == "TICKS":
+        return real_feed.snapshot(params["codes"])
+
+    elif name == "THEMEREFRESH":
+        groups = engine.request(
+            "theme_groups", date_type=THEME_INDEX_DATE_TYPE, search_type="0",
+            theme_name="", stock_code="", rank_type="1",
+        )
+        to_fetch = theme_index.plan(groups)
+        for theme_code in to_fetch:
+            scheduler.submit(
+                f"THEMEINDEX|{theme_code}",
+                lambda data, error, theme_code=theme_code: on_theme_index(theme_code, error),
+                PRIORITY_BACKGROUND,
             )
+        return {"themes": len(theme_index), "queued": len(to_fetch)}
 
-        elif len(parts) == 4 and parts[0].upper() == "INST":
-            _, code_or_name, from_date, to_date = parts
-            resolved_code = name_code_map.get(code_or_name.strip(), code_or_name.strip())
-            print(f"[기관 수급 요청] 종목: {code_or_name} → {resolved_code}, 기간: {from_date} ~ {to_date}")
-            data = inst.request_investor_trend(resolved_code, from_date, to_date)
+    elif name == "THEMEINDEX":
+        rows = engine.request("theme_stocks", theme_code=params["theme_code"], date_type=THEME_INDEX_DATE_TYPE)
+        theme_index.set_members(params["theme_code"], rows)
+        return {"theme_code": params["theme_code"], "members": len(rows)}
 
-        elif parts[0].upper() == "CODEMAP":
-            print(f"[종목코드 맵 요청]")
-            data = name_code_map
+    elif name == "daily_chart":
+        return daily.request_daily_chart(**params)
 
-        else:
-            raise ValueError("지원되지 않는 형식")
+    return engine.request(name, **params)
+
+def cached_result(msg):
+    """TR 없이(저장소 / TR 캐시) 응답 가능한 명령이면 결과, 아니면 None"""
+    try:
+        name, params = parse_command(msg)
+    except ValueError:
+        return None  # 형식 오류는 handle_command 에서 응답
+    if name == "daily_chart":
+        return daily.cached_daily_chart(params["code"], params["start_date"])
+    if name in engine.collectors:
+        return engine.cached(name, **params)
+    return None
+
+class ClientConnection:
+    """
+    연결별 상태: 첫 바이트로 프레임/기존 평문 방식을 판별
+    소켓은 non-blocking. send() 는 보낼 수 있는 만큼만 바로 보내고 나머지는 outbox 에 쌓아
+    네트워크 스레드가 EVENT_WRITE 때 마저 보냄 → 읽지 않는 클라이언트가 OCX / 다른 연결을 막지 않음
+    """
+
+    def __init__(self, conn, addr):
+        self.conn = conn
+        self.addr = addr
+        self.framed = None
+        self.decoder = FrameDecoder()
+        self.send_lock = threading.Lock()
+        self.outbox = bytearray()
+        self.reading = True  # 기존 방식은 요청 1건을 받으면 더 읽지 않음
+        self.close_when_sent = False  # 기존 방식: 응답을 다 보내면 닫음
+        self.failed = False  # 전송 실패 / outbox 초과 → 네트워크 스레드가 닫음
+        self.closed = False
+        self.events = 0  # selector 에 등록된 이벤트 (네트워크 스레드만 변경)
 
-        conn.send(json.dumps(data).encode())
+    def send(self, payload, close=False):
+        """메인 스레드(TR 처리), 네트워크 스레드, 실시간 전송 스레드에서 호출됨 (막히지 않음)"""
+        with self.send_lock:
+            if self.closed or self.failed:
+                return
+            self.outbox += payload
+            self.close_when_sent = self.close_when_sent or close
+            try:
+                sent_all = self.flush()
+            except OSError as e:
+                print(f"❌ 응답 전송 실패 {self.addr}: {e}")
+                self.failed = True
+                sent_all = False
+            if len(self.outbox) > SEND_BUFFER_LIMIT:
+                print(f"❌ 응답을 읽지 않는 연결 종료 {self.addr}: {len(self.outbox)}바이트 대기")
+                self.failed = True
+            if sent_all and not self.close_when_sent:
+                return
+        wake_network(self)
 
+    def flush(self):
+        """send_lock 안에서 호출. outbox 를 보낼 수 있는 만큼 보내고 다 보냈으면 True"""
+        while self.outbox:
+            try:
+                sent = self.conn.send(self.outbox)
+            except (BlockingIOError, InterruptedError):
+                return False
+            del self.outbox[:sent]
+        return True
+
+def wake_network(client):
+    """다른 스레드에서 쌓은 출력 / 종료를 네트워크 스레드가 처리하도록 깨움"""
+    pending_clients.append(client)
+    try:
+        wake_send.send(b"\0")
+    except (BlockingIOError, InterruptedError):
+        pass  # 이미 깨울 바이트가 쌓여 있음
+
+def update_interest(client):
+    """네트워크 스레드 전용: 남은 출력 / 읽기 여부에 맞춰 selector 등록을 바꾸거나 연결을 닫음"""
+    with client.send_lock:
+        if not client.failed:
+            try:
+                client.flush()
+            except OSError as e:
+                print(f"❌ 응답 전송 실패 {client.addr}: {e}")
+                client.failed = True
+        pending = bool(client.outbox)
+        done = client.failed or (client.close_when_sent and not pending)
+
+    if done:
+        close_connection(client)
+        return
+    events = (selectors.EVENT_READ if client.reading else 0) | (selectors.EVENT_WRITE if pending else 0)
+    if events == client.events:
+        return
+    if not events:
+        selector.unregister(client.conn)
+    elif not client.events:
+        selector.register(client.conn, events, client)
+    else:
+        selector.modify(client.conn, events, client)
+    client.events = events
+
+def close_connection(client):
+    """네트워크 스레드 전용"""
+    with client.send_lock:
+        if client.closed:
+            return
+        client.closed = True
+    real_feed.unsubscribe(client)
+    if client.events:
+        selector.unregister(client.conn)
+        client.events = 0
+    client.conn.close()
+
+def dispatch(command, callback, priority=PRIORITY_INTERACTIVE):
+    """OCX 가 필요 없는 명령은 즉시, 나머지는 스케줄러 큐로"""
+    head = command.strip().split("|")[0].upper()
+    if head in STREAM_COMMANDS:
+        callback(None, ValueError(f"{head} 는 프레임 연결에서만 지원"))
+        return
+
+    if head == "BATCH":
+        dispatch_batch(command, callback, priority)
+        return
+
+    if head in LOCAL_COMMANDS:
+        try:
+            callback(handle_command(command), None)
+        except Exception as e:
+            callback(None, e)
+        return
+
+    try:
+        data = cached_result(command)
     except Exception as e:
-        conn.sendall(json.dumps({"error": str(e)}, ensure_ascii=False).encode())
+        print(f"⚠️ 캐시 조회 실패, TR 로 처리: {e}")
+        data = None
+    if data is not None:
+        callback(data, None)
+    else:
+        scheduler.submit(command.strip(), callback, priority)
+
+def dispatch_batch(command, callback, priority):
+    """
+    BATCH 명령을 종목별 단건 명령으로 풀어 각각 dispatch 하고
+    모두 끝나면 {종목: 데이터} 로 한 번에 응답 (종목별 실패는 {"error": ...})
+    단건 명령과 같은 저장소 / TR 캐시 / 큐 합치기 / 조회 제한을 그대로 탐
+    """
+    try:
+        items = expand_batch(command)
+    except ValueError as e:
+        callback(None, e)
+        return
+
+    results = {}
+    lock = threading.Lock()  # 캐시 응답(네트워크 스레드)과 TR 응답(메인 스레드)이 섞여 들어옴
+
+    def collect(code):
+        def on_result(data, error):
+            with lock:
+                results[code] = {"error": str(error)} if error is not None else data
+                done = len(results) == len(items)
+            if done:
+                print(f"📦 BATCH 완료: {len(items)}종목")
+                callback({code: results[code] for code, _ in items}, None)
+        return on_result
+
+    for code, sub_command in items:
+        dispatch(sub_command, collect(code), priority)
+
+def handle_legacy(client, chunk):
+    """기존 방식: 요청 1건 처리 후 연결 종료로 응답 끝을 알림"""
+    client.reading = False
+    update_interest(client)
+
+    def reply(data, error):
+        if error is not None:
+            client.send(json.dumps({"error": str(error)}, ensure_ascii=False).encode(), close=True)
+        else:
+            client.send(json.dumps(data).encode(), close=True)
+
+    dispatch(chunk.decode(), reply)
+
+def handle_framed(client, chunk):
+    """프레임 방식: 연결을 유지하고 요청 id로 응답을 매칭"""
+    try:
+        requests = client.decoder.feed(chunk)
+    except ProtocolError as e:
+        print(f"❌ 프레임 오류 {client.addr}: {e}")
+        close_connection(client)
+        return
+
+    for request in requests:
+        request_id = request.get("id")
+        priority = PRIORITIES.get(request.get("priority"), PRIORITY_INTERACTIVE)
+
+        def reply(data, error, request_id=request_id):
+            client.send(encode_frame(make_response(request_id, data=data, error=error)))
 
-    finally:
-        conn.close()
\ No newline at end of file
+        command = str(request.get("cmd", ""))
+        if command.strip().split("|")[0].upper() in STREAM_COMMANDS:
+            try:
+                reply(handle_stream(client, command), None)
+            except Exception as e:
+                reply(None, e)
+            continue
+
+        dispatch(command, reply, priority)
+
+def handle_stream(client, command):
+    """SUBSCRIBE: 구독 추가 후 최신 틱 스냅샷 응답, 이후 틱은 {"event": "tick"} 프레임으로 전송"""
+    name, params = parse_command(command)
+    if name == "SUBSCRIBE":
+        ticks = real_feed.subscribe(
+            client, params["codes"],
+            lambda ticks: client.send(encode_frame(make_event("tick", ticks))),
+        )
+        return {"codes": params["codes"], "ticks": ticks}
+    return {"codes": real_feed.unsubscribe(client, params["codes"])}
+
+def on_readable(client):
+    try:
+        chunk = client.conn.recv(65536)
+    except OSError:
+        chunk = b""
+    if not chunk:
+        close_connection(client)
+        return
+
+    if client.framed is None:
+        client.framed = is_framed(chunk)
+
+    if client.framed:
+        handle_framed(client, chunk)
+    else:
+        handle_legacy(client, chunk)
+
+def serve_network():
+    """연결 수락, 요청 수신, 밀린 응답 전송 전담 스레드 (OCX 호출 없음)"""
+    while True:
+        for key, mask in selector.select():
+            if key.fileobj is server:
+                conn, addr = server.accept()
+                conn.setblocking(False)
+                update_interest(ClientConnection(conn, addr))
+            elif key.fileobj is wake_recv:
+                try:
+                    while wake_recv.recv(4096):
+                        pass
+                except (BlockingIOError, InterruptedError):
+                    pass
+                while pending_clients:
+                    client = pending_clients.popleft()
+                    if not client.closed:
+                        update_interest(client)
+            else:
+                client = key.data
+                try:
+                    if mask & selectors.EVENT_WRITE:
+                        update_interest(client)
+                    if mask & selectors.EVENT_READ and client.reading and not client.closed:
+                        on_readable(client)
+                except OSError as e:
+                    print(f"❌ 연결 오류 {client.addr}: {e}")
+                    close_connection(client)
+
+server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+if hasattr(socket, "SO_EXCLUSIVEADDRUSE"):
+    # Windows: 이미 실행 중인 브릿지가 있으면 두 번째 실행은 bind 에서 실패 (포트 / OCX 로그인 공유 방지)
+    server.setsockopt(socket.SOL_SOCKET, socket.SO_EXCLUSIVEADDRUSE, 1)
+server.bind((HOST, PORT))
+server.listen(128)
+server.setblocking(False)
+
+# 다른 스레드가 응답을 쌓으면 wake_send 로 select 를 깨움
+wake_recv, wake_send = socket.socketpair()
+wake_recv.setblocking(False)
+wake_send.setblocking(False)
+pending_clients = collections.deque()
+
+selector = selectors.DefaultSelector()
+selector.register(server, selectors.EVENT_READ)
+selector.register(wake_recv, selectors.EVENT_READ)
+
+threading.Thread(target=serve_network, name="kiwoom-network", daemon=True).start()
+threading.Thread(target=real_feed.run_flusher, name="kiwoom-real-flush", daemon=True).start()
+print(f"✅ 소켓 대기 시작 {HOST}:{PORT} (로그인 전에도 CODEMAP / SYMBOLS 응답)")
+
+app.connect()
+
+# 종목 마스터 갱신: 스냅샷이 없으면 바로, 있으면 사용자 요청 뒤에 백그라운드로
+def on_symbol_refresh(data, error):
+    if error is not None:
+        print(f"❌ 종목 마스터 갱신 실패: {error}")
+
+if len(master):
+    scheduler.submit("SYMBOLREFRESH", on_symbol_refresh, PRIORITY_BACKGROUND)
+else:
+    handle_command("SYMBOLREFRESH")
+
+# 테마 인덱스 갱신: THEME_INDEX_INTERVAL 마다 테마 목록을 받고 바뀐 테마만 테마별 백그라운드 작업으로 재조회
+def on_theme_index(theme_code, error):
+    if error is not None:
+        theme_index.fetch_failed(theme_code)
+        print(f"❌ 테마 {theme_code} 구성종목 갱신 실패: {error}")
+
+def on_theme_refresh(data, error):
+    if error is not None:
+        print(f"❌ 테마 인덱스 갱신 실패: {error}")
+
+def schedule_theme_refresh():
+    if theme_index.is_due():
+        theme_index.requested_at = time.time()
+        scheduler.submit("THEMEREFRESH", on_theme_refresh, PRIORITY_BACKGROUND)
+
+# 메인(Qt) 스레드: 큐에서 하나씩 꺼내 OCX 호출 (실시간 등록 / 해제도 여기서)
+while True:
+    real_feed.sync()
+    job = scheduler.next_job(timeout=0.05)
+    if job is None:
+        schedule_theme_refresh()
+        app.app.processEvents()
+        continue
+    scheduler.run_job(job, handle_command)
@@ -0,0 +1,159 @@
+##### 동일 요청 합치기 (single-flight) #####
+
+"""
+동시에 진행 중인 같은 요청을 작업 하나로 합치는 계층 (FastAPI 앱 전용)
+
+- 같은 키의 작업이 진행 중이면 새로 시작하지 않고 그 결과를 함께 기다림
+- 작업이 끝나면 키를 바로 지움 (끝난 결과의 재사용은 llm_cache / 브릿지 TR 캐시 담당)
+- 먼저 온 요청이 끊겨도(취소) 공유 작업은 끝까지 진행 (뒤에 온 요청이 계속 기다릴 수 있게)
+- 스트림: 토큰을 버퍼에 모아 뒤에 합류한 요청도 첫 토큰부터 같이 받음
+- 사용처: 라우트(@coalesce), 키움 브릿지 명령(kiwoom_client), LLM 생성(ollama_client)
+
+    @app.get("/price/{code}")
+    @coalesce("price", code=resolve_code)
+    async def get_price(code: str, period: str = "1개월", stream: bool = False): ...
+"""
+
+import asyncio
+import functools
+import json
+
+from pydantic import BaseModel
+
+
+class _SharedStream:
+    """업스트림 토큰을 한 번만 읽어 버퍼에 쌓고 여러 구독자에게 처음부터 전달"""
+
+    def __init__(self, tokens):
+        self.parts = []
+        self.done = False
+        self.error = None
+        self._changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(tokens))
+
+    async def _pump(self, tokens):
+        try:
+            async for token in tokens:
+                self.parts.append(token)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def follow(self):
+        index = 0
+        while True:
+            while index < len(self.parts):
+                yield self.parts[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}    # 키 → 진행 중인 Task
+        self._streams = {}  # 키 → 진행 중인 _SharedStream
+
+        self.leaders = 0    # 실제로 시작한 작업 수
+        self.shared = 0     # 진행 중인 작업에 합류한 요청 수
+
+    async def do(self, key, make_coro):
+        """key 로 진행 중인 작업이 있으면 합류, 없으면 make_coro() 를 시작하고 결과 반환"""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(make_coro())
+            self._calls[key] = task
+            task.add_done_callback(functools.partial(self._forget, self._calls, key))
+            self.leaders += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def stream(self, key, make_tokens):
+        """key 로 진행 중인 스트림이 있으면 합류, 없으면 make_tokens() 를 시작 (토큰 async generator 반환)"""
+        shared = self._streams.get(key)
+        if shared is None:
+            shared = _SharedStream(make_tokens())
+            self._streams[key] = shared
+            shared.task.add_done_callback(functools.partial(self._forget, self._streams, key))
+            self.leaders += 1
+        else:
+            self.shared += 1
+        return shared.follow()
+
+    @staticmethod
+    def _forget(calls, key, task):
+        entry = calls.get(key)
+        if entry is task or getattr(entry, "task", None) is task:
+            del calls[key]
+        if not task.cancelled():
+            task.exception()  # 기다리던 요청이 모두 끊겼을 때 예외 로그 억제
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "shared": self.shared,
+        }
+
+
+# 앱 전체가 공유하는 single-flight
+flights = SingleFlight()
+
+
+# 목록 필드 → 항목마다 적용할 정규화 규칙 이름 (BatchRequest.codes 의 각 종목에 code 규칙)
+LIST_FIELDS = {"codes": "code"}
+
+
+def _normalize(value, normalizers, name=None):
+    if isinstance(value, BaseModel):
+        value = value.model_dump()
+    if isinstance(value, dict):
+        return {key: _normalize(item, normalizers, key) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item, normalizers, LIST_FIELDS.get(name, name)) for item in value]
+    if isinstance(value, str):
+        value = value.strip()
+        if name and name.endswith("date"):
+            value = value.replace("-", "")
+    if name in normalizers and value:
+        value = normalizers[name](value)
+    return value
+
+
+def flight_key(endpoint: str, params: dict, **normalizers) -> tuple:
+    """엔드포인트 + 정규화한 파라미터 (normalizers: 파라미터 이름 → 정규화 함수, 예: code=종목명→종목코드)"""
+    normalized = _normalize(params, normalizers)
+    return endpoint, json.dumps(normalized, ensure_ascii=False, sort_keys=True, default=str)
+
+
+def _is_stream(params) -> bool:
+    return any(
+        (name == "stream" and value is True) or getattr(value, "stream", False) is True
+        for name, value in params.items()
+    )
+
+
+def coalesce(endpoint: str, **normalizers):
+    """
+    라우트 데코레이터: 같은 엔드포인트 + 정규화한 파라미터의 동시 요청은 핸들러를 한 번만 실행하고
+    같은 응답을 공유. stream=True 요청은 클라이언트별 SSE 라서 합치지 않음 (LLM 스트림은 ollama_client 에서 합침)
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        async def wrapper(**params):
+            if _is_stream(params):
+                return await handler(**params)
+            return await flights.do(flight_key(endpoint, params, **normalizers), lambda: handler(**params))
+        return wrapper
+    return decorator
@@ -0,0 +1,48 @@
+##### Server-Sent Events 응답 #####
+
+"""
+데이터는 먼저 보내고 LLM 토큰은 생성되는 대로 흘려보내는 SSE 응답
+
+이벤트 순서
+- event: data  → 엔드포인트의 구조화된 데이터 (summary 제외)
+- event: token → {"token": "..."} (Ollama 가 만든 토큰마다)
+- event: done  → {"summary": 전체 텍스트}
+"""
+
+import json
+
+from fastapi.responses import StreamingResponse
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # 프록시 버퍼링 방지
+}
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_response(payload: dict, tokens, fallback: str = "") -> StreamingResponse:
+    """payload 를 즉시 보내고 tokens(async iterator)를 이어서 스트리밍
+
+    tokens 가 None 이거나 LLM 이 실패/빈 응답이면 fallback 문장을 한 번에 보낸다.
+    """
+    async def events():
+        yield sse_event("data", payload)
+        parts = []
+        try:
+            if tokens is not None:
+                async for token in tokens:
+                    parts.append(token)
+                    yield sse_event("token", {"token": token})
+        except Exception as e:
+            print(f"❌ LLM 스트리밍 실패: {e}")
+        summary = "".join(parts).strip()
+        if not summary and fallback:
+            summary = fallback
+            yield sse_event("token", {"token": fallback})
+        yield sse_event("done", {"summary": summary})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
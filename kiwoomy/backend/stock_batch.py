@@ -0,0 +1,137 @@
+##### 여러 종목 일괄 조회 #####
+
+"""
+포트폴리오 화면처럼 여러 종목을 한 번에 보여줄 때 쓰는 일괄 조회 도우미
+
+- 키움 브릿지에는 BATCH 명령 한 번만 보냄 (kiwoom_client.get_*_batch)
+- 종목별로 간단한 요약 수치(overview)를 계산해 LLM 없이도 바로 표시 가능
+- summarize=True 일 때만 전체 종목을 묶은 프롬프트 하나로 LLM 요약 한 번
+"""
+
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from stock_symbols import symbols, normalize_code
+
+
+class BatchRequest(BaseModel):
+    codes: List[str]
+    period: Optional[str] = "1개월"      # 주가
+    start_date: Optional[str] = None     # 공매도 / 수급 (YYYY-MM-DD 또는 YYYYMMDD)
+    end_date: Optional[str] = None
+    summarize: Optional[bool] = False
+
+
+def normalize_codes(codes) -> list:
+    """6자리 종목코드로 정규화하고 중복 제거 (요청 순서 유지)"""
+    return list(dict.fromkeys(normalize_code(code) for code in codes if str(code).strip()))
+
+
+def batch_dates(start_date=None, end_date=None, days=10):
+    """YYYYMMDD 시작 / 종료일. 없으면 최근 days 일"""
+    if not start_date or not end_date:
+        return (datetime.today() - timedelta(days=days)).strftime("%Y%m%d"), datetime.today().strftime("%Y%m%d")
+    return start_date.replace("-", ""), end_date.replace("-", "")
+
+
+def price_overview(rows):
+    if not rows:
+        return None
+    oldest, latest = rows[0], rows[-1]
+    change = latest["close"] - oldest["close"]
+    return {
+        "start_date": oldest["date"],
+        "end_date": latest["date"],
+        "start_close": oldest["close"],
+        "close": latest["close"],
+        "change": change,
+        "change_pct": round(change / oldest["close"] * 100, 2) if oldest["close"] else 0,
+        "volume": latest["volume"],
+    }
+
+
+def short_overview(rows):
+    if not rows:
+        return None
+    latest = rows[-1]
+    ratios = [row.get("매매비중", 0.0) for row in rows]
+    return {
+        "start_date": rows[0].get("일자"),
+        "end_date": latest.get("일자"),
+        "short_volume": latest.get("공매도량", 0),
+        "short_ratio": latest.get("매매비중", 0.0),
+        "avg_short_ratio": round(sum(ratios) / len(ratios), 2),
+    }
+
+
+def invest_overview(rows):
+    if not rows:
+        return None
+    return {
+        "start_date": rows[-1].get("일자"),
+        "end_date": rows[0].get("일자"),
+        **{key: sum(row.get(key, 0) for row in rows) for key in ("개인", "외국인", "기관계")},
+    }
+
+
+OVERVIEWS = {
+    "price": price_overview,
+    "short": short_overview,
+    "invest": invest_overview,
+}
+
+
+def build_items(kind, codes, data_by_code) -> list:
+    """BATCH 응답 → [{"code", "name", "data", "overview"} 또는 {"code", "name", "error"}]"""
+    items = []
+    for code in codes:
+        data = data_by_code.get(code)
+        item = {"code": code, "name": symbols.name_of(code, code)}
+        if data is None:
+            item["error"] = "데이터를 가져올 수 없습니다."
+        elif isinstance(data, dict) and "error" in data:
+            item["error"] = data["error"]
+        else:
+            item["data"] = data
+            item["overview"] = OVERVIEWS[kind](data)
+        items.append(item)
+    return items
+
+
+def _overview_line(kind, name, overview):
+    if kind == "price":
+        return (f"- {name}: {overview['start_close']:,}원 → {overview['close']:,}원 "
+                f"({overview['change_pct']:+.2f}%)")
+    if kind == "short":
+        return (f"- {name}: 최근 공매도량 {overview['short_volume']:,}주, "
+                f"매매비중 {overview['short_ratio']:.2f}% (평균 {overview['avg_short_ratio']:.2f}%)")
+    return (f"- {name}: 개인 {overview['개인']:+,}, 외국인 {overview['외국인']:+,}, "
+            f"기관 {overview['기관계']:+,} (백만원, 순매수 합계)")
+
+
+KIND_LABELS = {"price": "주가 추이", "short": "공매도 현황", "invest": "투자자 수급"}
+
+
+def make_batch_prompt(kind, items) -> str:
+    """종목별 전체 데이터 대신 요약 수치 한 줄씩만 넣은 포트폴리오 요약 프롬프트"""
+    lines = [_overview_line(kind, item["name"], item["overview"]) for item in items if item.get("overview")]
+    return (
+        f"다음은 보유 종목들의 {KIND_LABELS[kind]} 요약입니다.\n"
+        + "\n".join(lines)
+        + "\n종목 전체의 흐름과 눈에 띄는 종목을 친근하고 이해하기 쉽게 짧게 설명해주세요. "
+        "종목을 언급할 때는 한글 종목명만 사용하고 종목코드는 사용하지 마세요."
+    )
+
+
+def make_batch_fallback(kind, items) -> str:
+    """LLM 을 쓸 수 없을 때의 기본 요약"""
+    ok = [item for item in items if item.get("overview")]
+    if kind == "price" and ok:
+        best = max(ok, key=lambda item: item["overview"]["change_pct"])
+        worst = min(ok, key=lambda item: item["overview"]["change_pct"])
+        return (f"{len(ok)}개 종목의 주가를 조회했습니다. 가장 많이 오른 종목은 {best['name']}"
+                f"({best['overview']['change_pct']:+.2f}%), 가장 많이 내린 종목은 {worst['name']}"
+                f"({worst['overview']['change_pct']:+.2f}%)입니다.")
+    return f"{len(ok)}개 종목의 {KIND_LABELS[kind]} 데이터를 조회했습니다."
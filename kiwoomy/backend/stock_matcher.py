@@ -0,0 +1,145 @@
+##### 메시지 속 종목명 찾기 (Aho-Corasick) #####
+
+"""
+종목명 / 별칭 / 종목코드 전체로 Aho-Corasick 오토마톤을 한 번 만들어 두고,
+사용자 메시지를 한 번 훑어서 언급된 종목을 모두 찾는다.
+
+- 겹치는 후보는 더 긴 키워드를 우선 ("삼성" 보다 "삼성전자")
+- 심볼 테이블 버전이 바뀔 때만 오토마톤을 다시 만든다
+"""
+
+from collections import deque
+
+from stock_symbols import symbols
+
+# 자주 쓰는 줄임말 → 정식 종목명
+STOCK_ALIASES = {
+    "삼전": "삼성전자",
+    "하이닉스": "SK하이닉스",
+    "하닉": "SK하이닉스",
+    "엘지전자": "LG전자",
+    "엘지화학": "LG화학",
+    "엘지엔솔": "LG에너지솔루션",
+    "현차": "현대차",
+    "네이버": "NAVER",
+    "카뱅": "카카오뱅크",
+    "셀트": "셀트리온",
+    "포스코": "POSCO홀딩스",
+}
+
+
+class StockNameMatcher:
+    def __init__(self, keywords: dict):
+        """keywords: {키워드: (종목명, 종목코드)}"""
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        self.keywords = []
+
+        for keyword, target in keywords.items():
+            keyword = keyword.strip()
+            if keyword:
+                self._add(keyword.lower(), keyword, target)
+        self._build()
+
+    def _add(self, pattern, keyword, target):
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+            node = nxt
+        self.output[node].append(len(self.keywords))
+        self.keywords.append((len(pattern), keyword, target))
+
+    def _build(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.output[nxt] = self.output[nxt] + self.output[self.fail[nxt]]
+
+    def find_all(self, text: str) -> list:
+        """겹침 포함 모든 매치: [(시작, 끝, 키워드, (종목명, 종목코드)), ...]"""
+        matches = []
+        node = 0
+        lowered = text.lower()
+        for i, ch in enumerate(lowered):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for idx in self.output[node]:
+                length, keyword, target = self.keywords[idx]
+                start = i - length + 1
+                if keyword.isdigit() and not _is_isolated_number(lowered, start, i + 1):
+                    continue
+                matches.append((start, i + 1, keyword, target))
+        return matches
+
+    def find(self, text: str) -> list:
+        """겹치지 않는 매치만, 긴 키워드 우선으로 고른 뒤 문장 순서대로 반환"""
+        chosen = []
+        taken = set()
+        for start, end, keyword, target in sorted(self.find_all(text), key=lambda m: (m[0] - m[1], m[0])):
+            span = range(start, end)
+            if not taken.isdisjoint(span):
+                continue
+            taken.update(span)
+            chosen.append((start, end, keyword, target))
+        return sorted(chosen)
+
+
+def _is_isolated_number(text, start, end):
+    """종목코드는 더 긴 숫자열의 일부가 아닐 때만 인정"""
+    before = text[start - 1] if start > 0 else ""
+    after = text[end] if end < len(text) else ""
+    return not before.isdigit() and not after.isdigit()
+
+
+_matcher = None
+_matcher_key = None
+
+
+def get_matcher(table=symbols) -> StockNameMatcher:
+    """심볼 테이블 버전이 바뀐 경우에만 오토마톤 재생성"""
+    global _matcher, _matcher_key
+    if _matcher is None or _matcher_key != (id(table), table.version):
+        keywords = {}
+        for code, name in table.code_to_name.items():
+            keywords[code] = (name, code)
+        for alias, name in STOCK_ALIASES.items():
+            code = table.code_of(name)
+            if code:
+                keywords[alias] = (name, code)
+        for name, code in table.name_to_code.items():
+            keywords[name] = (name, code)
+        _matcher = StockNameMatcher(keywords)
+        _matcher_key = (id(table), table.version)
+    return _matcher
+
+
+def find_stocks(text: str, table=symbols) -> list:
+    """메시지에 언급된 종목 [(종목명, 종목코드), ...] (문장 순서, 중복 제거)"""
+    found = []
+    for _, _, _, target in get_matcher(table).find(text):
+        if target not in found:
+            found.append(target)
+    return found
+
+
+def match_stock(text: str, table=symbols):
+    """가장 길게 매치된 종목 하나 (종목명, 종목코드) 또는 None"""
+    matches = get_matcher(table).find(text)
+    if not matches:
+        return None
+    start, end, _, target = max(matches, key=lambda m: (m[1] - m[0], -m[0]))
+    return target
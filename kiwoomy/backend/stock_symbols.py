@@ -0,0 +1,146 @@
+##### 종목코드 ↔ 종목명 심볼 테이블 #####
+
+"""
+브릿지의 종목 마스터(SYMBOLS)를 받아 양방향 dict 로 보관하는 프로세스 내 캐시
+
+- code_to_name / name_to_code 모두 O(1) 조회
+- 종목코드는 6자리로 정규화 ("5930" → "005930", "A005930" → "005930")
+- TTL 이 지나면 기존 데이터를 계속 쓰면서 백그라운드에서 갱신
+- 갱신 시 보유한 마스터 버전을 보내 변경분만 받음 (SYMBOLS 미지원 브릿지는 CODEMAP 사용)
+"""
+
+import asyncio
+import os
+import time
+
+from kiwoom_client import get_stock_name_code_map, get_symbol_master
+from metrics import span
+
+SYMBOL_TTL = float(os.getenv("SYMBOL_TTL", "21600"))  # 6시간
+
+
+def normalize_code(code) -> str:
+    code = str(code).strip()
+    if len(code) == 7 and code[0] in "AaJj" and code[1:].isdigit():
+        code = code[1:]
+    return code.zfill(6) if code.isdigit() else code
+
+
+def is_stock_code(value) -> bool:
+    value = normalize_code(value)
+    return len(value) == 6 and value.isdigit()
+
+
+class SymbolTable:
+    def __init__(self, loader=get_symbol_master, fallback=get_stock_name_code_map, ttl=SYMBOL_TTL):
+        self.loader = loader
+        self.fallback = fallback
+        self.ttl = ttl
+        self.code_to_name = {}
+        self.name_to_code = {}
+        self.records = {}  # code → {"name", "market", "listed_date", "listed_shares"}
+        self.master_version = None  # 브릿지 종목 마스터 버전
+        self.loaded_at = None
+        self.version = 0  # 내용이 바뀔 때마다 증가
+        self._refresh_task = None
+        self._lock = None  # 실행 중인 이벤트 루프에서 처음 쓸 때 생성
+
+    def __len__(self):
+        return len(self.code_to_name)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.ttl
+
+    def load(self, raw_map: dict) -> bool:
+        """CODEMAP 응답을 반영. 방향({코드: 이름} / {이름: 코드})은 자동 판별"""
+        if not raw_map:
+            return False
+
+        first_key = next(iter(raw_map))
+        if is_stock_code(first_key):
+            pairs = raw_map.items()
+        else:
+            pairs = ((code, name) for name, code in raw_map.items())
+
+        code_to_name = {}
+        name_to_code = {}
+        for code, name in pairs:
+            code = normalize_code(code)
+            name = str(name).strip()
+            if not code or not name:
+                continue
+            code_to_name[code] = name
+            name_to_code.setdefault(name, code)
+
+        self.loaded_at = time.monotonic()
+        if code_to_name == self.code_to_name:
+            return False
+        self.code_to_name = code_to_name
+        self.name_to_code = name_to_code
+        self.version += 1
+        return True
+
+    def apply_master(self, payload: dict) -> bool:
+        """SYMBOLS 응답(전체 또는 변경분) 반영"""
+        if payload.get("full"):
+            records = payload.get("symbols", {})
+        else:
+            records = dict(self.records)
+            records.update(payload.get("upserts", {}))
+            for code in payload.get("removed", []):
+                records.pop(code, None)
+
+        self.master_version = payload.get("version")
+        self.records = {normalize_code(code): record for code, record in records.items()}
+        changed = self.load({code: record["name"] for code, record in self.records.items()})
+        self.loaded_at = time.monotonic()
+        return changed
+
+    async def refresh(self) -> bool:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            payload = await self.loader(self.master_version)
+            if payload:
+                changed = self.apply_master(payload)
+            else:
+                changed = self.load(await self.fallback())
+            if self.code_to_name:
+                print(f"🔧 종목코드 맵 갱신: {len(self.code_to_name)}개 종목 (마스터 v{self.master_version}, 변경: {changed})")
+            return changed
+
+    async def ensure_loaded(self):
+        """최초 1회는 직접 로드, 이후에는 만료 시 백그라운드 갱신만 예약"""
+        if not self.code_to_name:
+            with span("codemap"):
+                await self.refresh()
+        elif self.is_stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    def info(self, code, default=None):
+        """종목 마스터 레코드 (시장, 상장일, 상장주식수 포함)"""
+        return self.records.get(normalize_code(code), default)
+
+    def name_of(self, code, default=None):
+        return self.code_to_name.get(normalize_code(code), default)
+
+    def code_of(self, name_or_code, default=None):
+        """종목명 또는 종목코드 → 6자리 종목코드"""
+        value = str(name_or_code).strip()
+        code = self.name_to_code.get(value)
+        if code:
+            return code
+        code = normalize_code(value)
+        if code in self.code_to_name:
+            return code
+        return default
+
+
+# 앱 전체가 공유하는 심볼 테이블
+symbols = SymbolTable()
+
+
+def resolve_code(name_or_code) -> str:
+    """종목명 / 종목코드 → 6자리 종목코드 (모르는 값은 정규화만)"""
+    return symbols.code_of(name_or_code) or normalize_code(name_or_code)
@@ -0,0 +1,137 @@
+##### 종목 마스터 스냅샷 #####
+
+"""
+종목코드 / 종목명 / 시장 / 상장 정보를 버전과 함께 디스크에 보관하는 스냅샷
+
+- 서버 기동 시 디스크에서 바로 읽어 로그인 전에도 CODEMAP / SYMBOLS 응답 가능
+- 로그인 후 OCX 마스터 조회로 새로 만든 내용과 비교해 바뀐 경우에만 버전 증가
+- 최근 변경 이력을 남겨 두고, 이전 버전을 가진 클라이언트에는 변경분(delta)만 전달
+"""
+
+import json
+import os
+import threading
+import time
+
+SYMBOL_MASTER_PATH = os.getenv(
+    "SYMBOL_MASTER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "symbol_master.json"),
+)
+SYMBOL_MASTER_HISTORY = int(os.getenv("SYMBOL_MASTER_HISTORY", "50"))
+
+
+class SymbolMaster:
+    def __init__(self, path=SYMBOL_MASTER_PATH, history=SYMBOL_MASTER_HISTORY):
+        self.path = path
+        self.history = history
+        self.version = 0
+        self.built_at = None
+        self.symbols = {}   # code → {"name", "market", "listed_date", "listed_shares"}
+        self.changes = []   # [{"version", "upserts": [code], "removed": [code]}] (오래된 순)
+        self._name_index = {}  # 종목명 → 종목코드
+        self._lock = threading.Lock()  # 갱신(메인 스레드)과 조회(네트워크 스레드) 보호
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def load(self) -> bool:
+        """디스크 스냅샷 읽기. 없거나 깨졌으면 False"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 종목 마스터 스냅샷 없음: {e}")
+            return False
+        with self._lock:
+            self.version = snapshot.get("version", 0)
+            self.built_at = snapshot.get("built_at")
+            self.symbols = snapshot.get("symbols", {})
+            self.changes = snapshot.get("changes", [])
+            self._reindex()
+        print(f"🔧 종목 마스터 스냅샷 로드: v{self.version}, {len(self.symbols)}개 종목")
+        return bool(self.symbols)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            snapshot = {
+                "version": self.version,
+                "built_at": self.built_at,
+                "symbols": self.symbols,
+                "changes": self.changes,
+            }
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def update(self, symbols: dict) -> bool:
+        """새로 조회한 마스터 반영. 바뀐 종목이 있으면 버전을 올리고 저장"""
+        if not symbols:
+            return False
+        upserts = [code for code, record in symbols.items() if self.symbols.get(code) != record]
+        removed = [code for code in self.symbols if code not in symbols]
+        if not upserts and not removed:
+            # 바뀐 게 없으면 버전 / 스냅샷 파일을 그대로 둠 (클라이언트가 빈 변경분을 새 버전으로 받지 않도록)
+            self.built_at = time.time()
+            return False
+
+        with self._lock:
+            self.built_at = time.time()
+            self.version += 1
+            self.symbols = symbols
+            self.changes.append({"version": self.version, "upserts": upserts, "removed": removed})
+            self.changes = self.changes[-self.history:]
+            self._reindex()
+        self.save()
+        print(f"🔧 종목 마스터 갱신: v{self.version} (추가/변경 {len(upserts)}, 삭제 {len(removed)})")
+        return True
+
+    def _reindex(self):
+        name_index = {}
+        for code, record in self.symbols.items():
+            name_index.setdefault(record["name"], code)
+        self._name_index = name_index
+
+    def code_of(self, name_or_code, default=None):
+        """종목코드는 그대로, 종목명이면 코드로 변환"""
+        if name_or_code in self.symbols:
+            return name_or_code
+        return self._name_index.get(name_or_code, default)
+
+    def name_of(self, code, default=None):
+        record = self.symbols.get(code)
+        return record["name"] if record else default
+
+    def code_to_name(self) -> dict:
+        with self._lock:
+            return {code: record["name"] for code, record in self.symbols.items()}
+
+    def delta(self, since_version=None) -> dict:
+        """
+        since_version 이후 변경분. 이력이 남아 있지 않거나 since_version 이 없으면 전체
+        - 전체: {"version", "full": True, "symbols": {...}}
+        - 변경분: {"version", "full": False, "upserts": {...}, "removed": [...]}
+        """
+        with self._lock:
+            changes = [change for change in self.changes if since_version is not None and change["version"] > since_version]
+            contiguous = (
+                since_version is not None
+                and since_version <= self.version
+                and (since_version == self.version or (changes and changes[0]["version"] == since_version + 1))
+            )
+            if not contiguous:
+                return {"version": self.version, "full": True, "symbols": dict(self.symbols)}
+
+            upserts, removed = set(), set()
+            for change in changes:
+                upserts.update(change["upserts"])
+                upserts.difference_update(change["removed"])
+                removed.difference_update(change["upserts"])
+                removed.update(change["removed"])
+            return {
+                "version": self.version,
+                "full": False,
+                "upserts": {code: self.symbols[code] for code in upserts if code in self.symbols},
+                "removed": sorted(removed),
+            }
@@ -0,0 +1,13 @@
+##### 단위 테스트 공통 설정 #####
+
+"""
+backend 모듈은 패키지가 아니라 평면 모듈이므로 backend 디렉터리를 import 경로에 추가
+(PyQt / 키움 OCX / Ollama 없이 도는 순수 Python 로직만 테스트)
+
+    cd kiwoomy/backend && python -m pytest -q
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
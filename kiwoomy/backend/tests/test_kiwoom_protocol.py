@@ -0,0 +1,47 @@
+import pytest
+
+import kiwoom_protocol
+from kiwoom_protocol import FrameDecoder, ProtocolError, HEADER, encode_frame, is_framed, make_request, make_response
+
+
+def test_frames_round_trip_in_one_chunk():
+    data = encode_frame(make_request(1, "PRICE|005930|1개월")) + encode_frame(make_response(2, data={"가": 1}))
+    assert FrameDecoder().feed(data) == [
+        {"id": 1, "cmd": "PRICE|005930|1개월"},
+        {"id": 2, "data": {"가": 1}},
+    ]
+
+
+def test_partial_frames_are_buffered_until_complete():
+    data = encode_frame(make_request(7, "STATUS", "background"))
+    decoder = FrameDecoder()
+    for i in range(len(data) - 1):
+        assert decoder.feed(data[i:i + 1]) == []
+    assert decoder.feed(data[-1:]) == [{"id": 7, "cmd": "STATUS", "priority": "background"}]
+    assert decoder.buffer == bytearray()
+
+
+def test_oversized_length_header_is_rejected():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(HEADER.pack(kiwoom_protocol.MAX_FRAME_SIZE + 1))
+
+
+def test_invalid_json_body_is_rejected():
+    with pytest.raises(ProtocolError):
+        FrameDecoder().feed(HEADER.pack(3) + b"{x}")
+
+
+def test_encode_rejects_oversized_body(monkeypatch):
+    monkeypatch.setattr(kiwoom_protocol, "MAX_FRAME_SIZE", 8)
+    with pytest.raises(ProtocolError):
+        encode_frame(make_request(1, "PRICE|005930|1개월"))
+
+
+def test_first_byte_separates_frames_from_legacy_requests():
+    assert is_framed(encode_frame(make_request(1, "CODEMAP")))
+    assert not is_framed("PRICE|005930|1개월".encode())
+    assert not is_framed(b"")
+
+
+def test_error_response_carries_message_only():
+    assert make_response(3, data=[1], error=ValueError("형식 오류")) == {"id": 3, "error": "형식 오류"}
@@ -0,0 +1,67 @@
+import types
+from datetime import datetime
+
+import pytest
+
+import llm_cache
+from llm_cache import LLMResponseCache, make_key, seconds_until_refresh
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(llm_cache, "time", types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def test_key_depends_on_model_system_and_prompt():
+    assert make_key("m", None, "질문") == make_key("m", "", "질문")
+    assert make_key("m", None, "질문") != make_key("n", None, "질문")
+    assert make_key("m", None, [{"role": "user", "content": "질문"}]) != make_key("m", None, "질문")
+
+
+def test_seconds_until_refresh_wraps_to_next_day(monkeypatch):
+    monkeypatch.setattr(llm_cache, "MARKET_REFRESH_TIME", "16:00")
+    assert seconds_until_refresh(datetime(2024, 1, 2, 15, 0)) == 3600
+    assert seconds_until_refresh(datetime(2024, 1, 2, 16, 0)) == 24 * 3600
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = LLMResponseCache(max_size=2, cache_dir="")
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"  # a 를 최근 사용으로
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = LLMResponseCache(max_size=4, cache_dir="", max_ttl=60)
+    cache.set("a", "A")
+    clock.now += 59
+    assert cache.get("a") == "A"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_empty_values_are_not_cached(clock):
+    cache = LLMResponseCache(cache_dir="")
+    cache.set("a", "")
+    assert len(cache) == 0
+
+
+def test_disk_tier_survives_a_new_instance(clock, tmp_path):
+    LLMResponseCache(cache_dir=str(tmp_path), max_ttl=60).set("a", "응답")
+
+    cache = LLMResponseCache(cache_dir=str(tmp_path), max_ttl=60)
+    assert cache.get("a") == "응답"
+    assert cache.get("a") == "응답"  # 두 번째는 메모리에서
+    assert (cache.stats()["disk_hits"], cache.stats()["hits"]) == (1, 1)
+
+    clock.now += 61
+    assert LLMResponseCache(cache_dir=str(tmp_path), max_ttl=60).get("a") is None
+    assert not (tmp_path / "a.json").exists()
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from ohlcv_store import OhlcvStore, COLUMNS
+
+
+def make_rows(dates, close_base=100):
+    """날짜 오름차순 컬럼 dict (종가 = close_base + 순번)"""
+    rows = {column: np.arange(close_base, close_base + len(dates)) for column in COLUMNS}
+    rows["date"] = np.array(dates)
+    return rows
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OhlcvStore(str(tmp_path))
+
+
+def test_replace_and_read_slice(store):
+    store.replace("005930", make_rows([20240102, 20240103, 20240104]), history_from="20240102")
+
+    columns = store.read("005930", "20240103", "20240103")
+    assert columns["date"].tolist() == [20240103]
+    assert columns["close"].tolist() == [101]
+    assert store.first_date("005930") == "20240102"
+    assert store.last_date("005930") == "20240104"
+    assert store.covers("005930", "20240102")
+    assert not store.covers("005930", "20240101")
+
+
+def test_append_overwrites_last_row_and_adds_new_rows(store):
+    store.replace("005930", make_rows([20240102, 20240103]), history_from="20240102")
+    # 마지막 저장일(0103) 장중 봉 갱신 + 새 날짜 두 개
+    store.append("005930", make_rows([20240103, 20240104, 20240105], close_base=200))
+
+    columns = store.read("005930", "20240101")
+    assert columns["date"].tolist() == [20240102, 20240103, 20240104, 20240105]
+    assert columns["close"].tolist() == [100, 200, 201, 202]
+    assert columns["amount"].tolist() == [100, 200, 201, 202]
+    assert store.rows("005930") == 4
+
+
+def test_append_rejects_older_rows(store):
+    store.replace("005930", make_rows([20240102, 20240103]), history_from="20240102")
+    with pytest.raises(ValueError):
+        store.append("005930", make_rows([20240101]))
+
+
+def test_append_truncates_columns_written_before_a_crash(store, tmp_path):
+    store.replace("005930", make_rows([20240102, 20240103]), history_from="20240102")
+    # meta 갱신 전에 죽은 쓰기: 컬럼 파일에만 행이 남아 있음
+    for column, dtype in COLUMNS.items():
+        with open(tmp_path / "005930" / f"{column}.bin", "ab") as f:
+            np.asarray([99999999], dtype=dtype).tofile(f)
+
+    store.append("005930", make_rows([20240104], close_base=300))
+
+    reopened = OhlcvStore(str(tmp_path))
+    columns = reopened.read("005930", "20240101")
+    assert columns["date"].tolist() == [20240102, 20240103, 20240104]
+    assert columns["close"].tolist() == [100, 101, 300]
+
+
+def test_prepend_keeps_only_older_rows(store):
+    store.replace("005930", make_rows([20240103, 20240104]), history_from="20240103")
+    store.prepend("005930", make_rows([20240101, 20240102, 20240103], close_base=50), history_from="20240101")
+
+    columns = store.read("005930", "20240101")
+    assert columns["date"].tolist() == [20240101, 20240102, 20240103, 20240104]
+    assert columns["close"].tolist() == [50, 51, 100, 101]
+    assert store.covers("005930", "20240101")
+
+
+def test_tail_returns_last_rows(store):
+    store.replace("005930", make_rows([20240102, 20240103, 20240104]), history_from="20240102")
+    assert store.tail("005930", 2)["date"].tolist() == [20240103, 20240104]
+    assert store.tail("000660", 2)["date"].tolist() == []
+
+
+def test_meta_with_other_columns_is_treated_as_empty(store, tmp_path):
+    store.replace("005930", make_rows([20240102]), history_from="20240102")
+    (tmp_path / "005930" / "meta.json").write_text('{"rows": 1, "columns": ["date", "close"]}', encoding="utf-8")
+
+    assert OhlcvStore(str(tmp_path)).rows("005930") == 0
@@ -0,0 +1,56 @@
+from datetime import date, timedelta
+
+import prompt_builder
+from prompt_builder import compose_prompt, estimate_tokens, price_stats, price_table, render_table, sample_rows
+
+
+def make_rows(count):
+    return [
+        {"date": (date(2024, 1, 1) + timedelta(days=i)).strftime("%Y%m%d"), "close": 1000 + 10 * i, "volume": 100 + i, "amount": 1}
+        for i in range(count)
+    ]
+
+
+def test_estimate_tokens_counts_hangul_and_digits_per_char():
+    assert estimate_tokens("삼성전자") == 5
+    assert estimate_tokens("2024") == 5
+    assert estimate_tokens("abcdef") == 3
+
+
+def test_sample_rows_keeps_first_and_last():
+    body = list(range(100))
+    picked = sample_rows(body, 5)
+    assert picked[0] == 0 and picked[-1] == 99
+    assert len(picked) == 5
+    assert sample_rows(body[:3], 5) == [0, 1, 2]
+    assert sample_rows(body, 1) == [99]
+
+
+def test_render_table_fits_the_budget():
+    table = price_table(make_rows(60))
+    text = render_table(table, 200)
+    assert text.startswith("📈 추이 표 (전체 60행 중")
+    assert estimate_tokens(text) <= 200 + 10  # 제목 줄 정도만 넘을 수 있음
+    assert render_table(table, 10) == ""
+    assert render_table(table, 100000).count("\n") == prompt_builder.PROMPT_TABLE_MAX_ROWS + 2
+
+
+def test_compose_prompt_uses_the_model_budget(monkeypatch):
+    rows = make_rows(60)
+    monkeypatch.setattr(prompt_builder, "token_budget", lambda model=None: 100000)
+    full = compose_prompt("질문", price_stats(rows), price_table(rows), "끝")
+    monkeypatch.setattr(prompt_builder, "token_budget", lambda model=None: 50)
+    small = compose_prompt("질문", price_stats(rows), price_table(rows), "끝")
+
+    assert "📈 추이 표" in full
+    assert "📈 추이 표" not in small
+    assert small.startswith("질문\n📊 요약 통계:\n- 기간: 2024-01-01") and small.endswith("끝")
+
+
+def test_price_stats_summarizes_the_period():
+    lines = price_stats(make_rows(60)[::-1])  # 최신순으로 와도 오름차순으로 계산
+    assert lines[0].startswith("- 기간: 2024-01-01")
+    assert "시작가 1,000원 → 현재가 1,590원 (+59.00%)" in lines[1]
+    assert any(line.startswith("- 이동평균: 5일 1,570원") for line in lines)
+    assert any("최대낙폭(MDD) 0.00%" in line for line in lines)
+    assert price_stats([]) == []
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+import single_flight
+from single_flight import SingleFlight, coalesce, flight_key
+
+
+def test_flight_key_normalizes_params():
+    upper = str.upper
+    assert flight_key("price", {"code": " abc ", "period": "1개월"}, code=upper) == \
+        flight_key("price", {"period": "1개월", "code": "ABC"}, code=upper)
+    assert flight_key("short", {"start_date": "2024-01-02"}) == flight_key("short", {"start_date": "20240102"})
+
+
+def test_flight_key_applies_code_rule_to_codes_items_only():
+    key = flight_key("batch", {"codes": ["abc", "def"], "name": "abc"}, code=str.upper)
+    assert key == ("batch", '{"codes": ["ABC", "DEF"], "name": "abc"}')
+
+
+def test_concurrent_calls_share_one_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.01)
+        return "결과"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["결과"] * 3
+    assert runs == [1]
+    assert flights.stats() == {"in_flight": 0, "leaders": 1, "shared": 2}
+
+
+def test_finished_key_starts_a_new_run():
+    flights = SingleFlight()
+    runs = []
+
+    async def work():
+        runs.append(1)
+        return len(runs)
+
+    async def main():
+        return [await flights.do("key", work), await flights.do("key", work)]
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "결과"
+
+    async def main():
+        leader = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(main()) == "결과"
+
+
+def test_error_reaches_every_caller():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError("조회 실패")
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", work) for _ in range(2)), return_exceptions=True)
+
+    assert [str(error) for error in asyncio.run(main())] == ["조회 실패", "조회 실패"]
+
+
+def test_late_stream_follower_gets_every_token():
+    flights = SingleFlight()
+
+    async def tokens():
+        for token in ("삼성", "전자", "는"):
+            yield token
+            await asyncio.sleep(0.01)
+
+    async def collect(stream):
+        return [token async for token in stream]
+
+    async def main():
+        first = asyncio.ensure_future(collect(flights.stream("key", tokens)))
+        await asyncio.sleep(0.015)  # 첫 토큰이 나간 뒤 합류
+        second = await collect(flights.stream("key", tokens))
+        return await first, second
+
+    first, second = asyncio.run(main())
+    assert first == second == ["삼성", "전자", "는"]
+    assert flights.stats()["leaders"] == 1
+
+
+def test_coalesce_skips_stream_requests(monkeypatch):
+    monkeypatch.setattr(single_flight, "flights", SingleFlight())
+    runs = []
+
+    @coalesce("price", code=str.upper)
+    async def handler(code: str, stream: bool = False):
+        runs.append(code)
+        await asyncio.sleep(0.01)
+        return code
+
+    async def main():
+        return await asyncio.gather(
+            handler(code="abc"), handler(code="ABC"),
+            handler(code="abc", stream=True), handler(code="abc", stream=True),
+        )
+
+    assert asyncio.run(main()) == ["abc", "abc", "abc", "abc"]
+    assert len(runs) == 3  # 합친 요청 1번 + 스트림 2번
+    assert single_flight.flights.stats()["shared"] == 1
@@ -0,0 +1,45 @@
+import pytest
+
+from stock_matcher import StockNameMatcher, find_stocks, match_stock
+from stock_symbols import SymbolTable
+
+SAMSUNG = ("삼성전자", "005930")
+SAMSUNG_SDI = ("삼성SDI", "006400")
+HYNIX = ("SK하이닉스", "000660")
+
+
+@pytest.fixture
+def table():
+    table = SymbolTable()
+    table.load({"005930": "삼성전자", "006400": "삼성SDI", "000660": "SK하이닉스", "035420": "NAVER"})
+    return table
+
+
+def test_longest_keyword_wins_over_overlap():
+    matcher = StockNameMatcher({"삼성": ("삼성", "000000"), "삼성전자": SAMSUNG})
+    assert [target for _, _, _, target in matcher.find("삼성전자 주가 알려줘")] == [SAMSUNG]
+    assert len(matcher.find_all("삼성전자")) == 2
+
+
+def test_matches_are_returned_in_sentence_order(table):
+    assert find_stocks("sk하이닉스랑 삼성전자, 삼성SDI 비교해줘", table) == [HYNIX, SAMSUNG, SAMSUNG_SDI]
+
+
+def test_code_inside_a_longer_number_is_ignored(table):
+    assert find_stocks("주문번호 1005930 확인", table) == []
+    assert find_stocks("005930 시세", table) == [SAMSUNG]
+
+
+def test_aliases_resolve_to_listed_names(table):
+    assert find_stocks("삼전 하닉 네이버", table) == [SAMSUNG, HYNIX, ("NAVER", "035420")]
+
+
+def test_match_stock_prefers_the_longest_match(table):
+    assert match_stock("삼전 말고 SK하이닉스", table) == HYNIX
+    assert match_stock("날씨 어때", table) is None
+
+
+def test_matcher_is_rebuilt_when_table_changes(table):
+    assert find_stocks("카카오 어때", table) == []
+    table.load({"005930": "삼성전자", "035720": "카카오"})
+    assert find_stocks("카카오 어때", table) == [("카카오", "035720")]
@@ -0,0 +1,116 @@
+import types
+
+import pytest
+
+import tr_scheduler
+from tr_scheduler import TrScheduler, TrBudget, TokenBucket, PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE
+
+
+class FakeClock:
+    """tr_scheduler.time 대역: sleep 하면 시계만 넘어감
+    (실제 시계처럼 최소 1us 씩은 흐르게 해서 부동소수 오차로 남는 아주 작은 대기에도 멈추지 않음)"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        seconds = max(seconds, 1e-6)
+        self.now += seconds
+        self.slept += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tr_scheduler, "time", types.SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+
+def run_all(scheduler, handler):
+    ran = []
+    while True:
+        job = scheduler.next_job(timeout=0)
+        if job is None:
+            return ran
+        ran.append(job.command)
+        scheduler.run_job(job, handler)
+
+
+def test_interactive_jobs_run_before_background():
+    scheduler = TrScheduler()
+    scheduler.submit("THEMEREFRESH", lambda data, error: None, PRIORITY_BACKGROUND)
+    scheduler.submit("PRICE|005930|1개월", lambda data, error: None)
+
+    assert run_all(scheduler, lambda command: command) == ["PRICE|005930|1개월", "THEMEREFRESH"]
+
+
+def test_same_pending_command_runs_once_for_every_caller():
+    scheduler = TrScheduler()
+    results = []
+    for _ in range(3):
+        scheduler.submit("SHORT|005930|20240101|20240131", lambda data, error: results.append(data))
+
+    assert run_all(scheduler, lambda command: "ok") == ["SHORT|005930|20240101|20240131"]
+    assert results == ["ok", "ok", "ok"]
+    assert scheduler.stats()["coalesced"] == 2
+
+
+def test_interactive_caller_promotes_a_background_job():
+    scheduler = TrScheduler()
+    scheduler.submit("THEMEINDEX|100", lambda data, error: None, PRIORITY_BACKGROUND)
+    scheduler.submit("THEMEINDEX|200", lambda data, error: None, PRIORITY_BACKGROUND)
+    scheduler.submit("THEMEINDEX|200", lambda data, error: None, PRIORITY_INTERACTIVE)
+
+    assert scheduler.queue_depth() == {"interactive": 1, "background": 1}
+    assert run_all(scheduler, lambda command: None) == ["THEMEINDEX|200", "THEMEINDEX|100"]
+
+
+def test_handler_error_reaches_every_callback():
+    scheduler = TrScheduler()
+    errors = []
+    for _ in range(2):
+        scheduler.submit("INST|005930|20240101|20240131", lambda data, error: errors.append(error))
+
+    def fail(command):
+        raise ValueError("조회 실패")
+
+    run_all(scheduler, fail)
+    assert [str(error) for error in errors] == ["조회 실패", "조회 실패"]
+    assert scheduler.stats()["failed"] == 1
+
+
+def test_next_job_times_out_on_empty_queue():
+    assert TrScheduler().next_job(timeout=0.01) is None
+
+
+def test_token_bucket_refills_at_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2)
+    bucket.take()
+    bucket.take()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    clock.now += 0.5
+    assert bucket.wait_time() == 0.0
+
+
+def test_budget_waits_for_the_per_second_limit(clock):
+    budget = TrBudget(per_sec=5, per_hour=1000)
+    for _ in range(5):
+        budget.acquire()
+    assert clock.slept == 0.0
+
+    budget.acquire()
+    assert clock.slept == pytest.approx(0.2, abs=1e-3)
+    assert budget.acquired == 6
+
+
+def test_budget_waits_for_the_per_hour_limit(clock):
+    budget = TrBudget(per_sec=100, per_hour=3)
+    for _ in range(3):
+        budget.acquire()
+    budget.acquire()
+    # 시간당 3건 → 토큰 하나에 1200초
+    assert clock.slept == pytest.approx(1200, rel=0.01)
@@ -0,0 +1,190 @@
+##### 테마 구성 인덱스 #####
+
+"""
+종목 → 테마, 테마 → 구성종목 양방향 인덱스 (디스크 스냅샷)
+
+- 갱신: 전체 테마 목록(opt90001) 한 번 받고, 새 테마 / 종목수가 바뀐 테마 /
+  THEME_INDEX_MAX_AGE 가 지난 테마만 구성종목(opt90002) 재조회
+- 재조회는 테마 하나당 백그라운드 작업 하나로 나눠 사용자 요청 사이사이에 처리
+- 조회(네트워크 스레드)는 메모리 dict 만 보므로 TR 없이 바로 응답
+- 구성종목은 opt90002 행 그대로 보관 (THEME_INDEX_DATE_TYPE 기준 현재가 / 등락율 / 기간수익률).
+  응답의 date_type 으로 호출자가 같은 날짜구분일 때만 인덱스를 쓰도록 함
+"""
+
+import json
+import os
+import threading
+import time
+
+THEME_INDEX_PATH = os.getenv(
+    "THEME_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "theme_index.json"),
+)
+THEME_INDEX_INTERVAL = float(os.getenv("THEME_INDEX_INTERVAL", "3600"))   # 테마 목록 갱신 주기(초)
+THEME_INDEX_MAX_AGE = float(os.getenv("THEME_INDEX_MAX_AGE", "86400"))    # 구성종목 최대 보관 시간(초)
+THEME_INDEX_MAX_FETCH = int(os.getenv("THEME_INDEX_MAX_FETCH", "50"))     # 갱신 1회당 재조회 테마 수
+THEME_INDEX_DATE_TYPE = os.getenv("THEME_INDEX_DATE_TYPE", "1")           # opt90001 / opt90002 날짜구분
+
+
+def normalize_code(code) -> str:
+    """A005930 / 5930 → 005930 (stock_symbols.normalize_code 와 같은 규칙, 브릿지 전용)"""
+    code = str(code).strip()
+    if len(code) == 7 and code[0] in "AaJj" and code[1:].isdigit():
+        code = code[1:]
+    return code.zfill(6) if code.isdigit() else code
+
+
+class ThemeIndex:
+    def __init__(self, path=THEME_INDEX_PATH, interval=THEME_INDEX_INTERVAL,
+                 max_age=THEME_INDEX_MAX_AGE, max_fetch=THEME_INDEX_MAX_FETCH, date_type=THEME_INDEX_DATE_TYPE):
+        self.path = path
+        self.date_type = date_type
+        self.interval = interval
+        self.max_age = max_age
+        self.max_fetch = max_fetch
+        self.refreshed_at = 0   # 마지막 테마 목록 갱신 시각
+        self.requested_at = 0   # 마지막 갱신 요청 시각 (실패해도 주기마다 한 번만 재시도)
+        # 테마코드 → {"group": opt90001 행, "members": [opt90002 행] 또는 None, "fetched_at"}
+        self.themes = {}
+        self.pending = set()    # 구성종목 재조회 대기 중인 테마코드
+        self._stock_themes = {}  # 종목코드 → [테마코드]
+        self._lock = threading.Lock()  # 갱신(메인 스레드)과 조회(네트워크 스레드) 보호
+
+    def __len__(self):
+        return len(self.themes)
+
+    def load(self) -> bool:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 테마 인덱스 스냅샷 없음: {e}")
+            return False
+        with self._lock:
+            self.refreshed_at = snapshot.get("refreshed_at", 0)
+            self.themes = snapshot.get("themes", {})
+            self._reindex()
+        print(f"🔧 테마 인덱스 스냅샷 로드: {len(self.themes)}개 테마, {len(self._stock_themes)}개 종목")
+        return bool(self.themes)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with self._lock:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"refreshed_at": self.refreshed_at, "themes": self.themes}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def is_due(self) -> bool:
+        return time.time() - max(self.refreshed_at, self.requested_at) >= self.interval
+
+    def plan(self, groups: list) -> list:
+        """
+        전체 테마 목록 반영 후 구성종목을 다시 받아야 할 테마코드 목록 반환
+        (새 테마 / 종목수 변경 → 오래된 순, 최대 max_fetch 개)
+        """
+        now = time.time()
+        listed = {}
+        for group in groups:
+            theme_code = str(group.get("종목코드", "")).strip()  # opt90001 첫 컬럼에 테마코드가 들어옴
+            if theme_code:
+                listed[theme_code] = dict(group)  # TR 캐시 행과 분리
+        if not listed:
+            # 빈 응답(조회 실패 / 장애)으로 인덱스 전체를 지우지 않음. 다음 주기에 다시 시도
+            print("⚠️ 테마 목록이 비어 있어 인덱스 갱신 건너뜀")
+            return []
+
+        changed, stale = [], []
+        with self._lock:
+            for theme_code in list(self.themes):
+                if theme_code not in listed:
+                    del self.themes[theme_code]
+                    self.pending.discard(theme_code)
+            for theme_code, group in listed.items():
+                entry = self.themes.setdefault(theme_code, {"group": group, "members": None, "fetched_at": 0})
+                if entry["members"] is None or entry["group"].get("종목수") != group.get("종목수"):
+                    changed.append(theme_code)
+                elif now - entry["fetched_at"] >= self.max_age:
+                    stale.append(theme_code)
+                entry["group"] = group
+            stale.sort(key=lambda theme_code: self.themes[theme_code]["fetched_at"])
+            to_fetch = [code for code in changed + stale if code not in self.pending][:self.max_fetch]
+            self.pending.update(to_fetch)
+            self.refreshed_at = now
+            self._reindex()
+        self.save()
+        print(f"🔧 테마 목록 갱신: {len(listed)}개 테마 (변경 {len(changed)}, 오래됨 {len(stale)}, 재조회 {len(to_fetch)})")
+        return to_fetch
+
+    def set_members(self, theme_code, rows: list):
+        """opt90002 구성종목 결과 반영"""
+        members = []
+        for row in rows:
+            code = normalize_code(row.get("종목코드", ""))
+            if code:
+                members.append({**row, "종목코드": code, "종목명": row.get("종목명", "").strip()})
+        with self._lock:
+            self.pending.discard(theme_code)
+            entry = self.themes.get(theme_code)
+            if entry is None:
+                return
+            entry["members"] = members
+            entry["fetched_at"] = time.time()
+            self._reindex()
+        if not self.pending:
+            self.save()
+
+    def fetch_failed(self, theme_code):
+        """재조회 실패: 대기 목록에서 빼 다음 갱신 때 다시 계획되도록"""
+        with self._lock:
+            self.pending.discard(theme_code)
+
+    def _reindex(self):
+        stock_themes = {}
+        for theme_code, entry in self.themes.items():
+            for member in entry["members"] or []:
+                stock_themes.setdefault(member["종목코드"], []).append(theme_code)
+        self._stock_themes = stock_themes
+
+    def _theme(self, theme_code, name_of=None):
+        entry = self.themes[theme_code]
+        members = [
+            {**member, "종목명": member["종목명"] or (name_of and name_of(member["종목코드"])) or member["종목코드"]}
+            for member in entry["members"] or []
+        ]
+        return {
+            "테마코드": theme_code,
+            "테마명": entry["group"].get("테마명", ""),
+            "그룹": entry["group"],
+            "종목들": members,
+            "종목수": len(members),
+            "fetched_at": entry["fetched_at"],
+        }
+
+    def themes_of(self, code, name_of=None) -> dict:
+        """종목이 속한 테마와 각 테마의 구성종목 (name_of: 종목명이 비어 있을 때 쓸 종목코드 → 종목명 함수)"""
+        code = normalize_code(code)
+        with self._lock:
+            return {
+                "code": code,
+                "date_type": self.date_type,
+                "themes": [self._theme(theme_code, name_of) for theme_code in self._stock_themes.get(code, [])],
+                "refreshed_at": self.refreshed_at,
+                "pending": len(self.pending),
+            }
+
+    def members_of(self, theme_code, name_of=None):
+        """테마 구성종목. 모르는 테마면 None"""
+        with self._lock:
+            if theme_code not in self.themes:
+                return None
+            return self._theme(theme_code, name_of)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "themes": len(self.themes),
+                "stocks": len(self._stock_themes),
+                "pending": len(self.pending),
+                "refreshed_at": self.refreshed_at,
+            }
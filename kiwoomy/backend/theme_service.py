@@ -0,0 +1,258 @@
+##### 종목 테마 분석 서비스 #####
+
+"""
+종목이 속한 테마 조회 + LLM 요약을 라우트(/stock-theme)와 채팅(/chat) 양쪽에서
+같은 프로세스 안에서 바로 호출하기 위한 서비스 계층
+
+- 테마 데이터: 브릿지 테마 인덱스(TR 없음) → 없으면 THEMEGROUP + THEME 동시 조회
+  (인덱스는 요청과 같은 날짜구분이고 구성종목 행이 THEME 응답과 같은 필드일 때만 사용)
+- 완성된 테마 데이터는 (종목, 날짜구분) 별로 THEME_SERVICE_TTL 초 공유 캐시
+  (마감 시간 안에 못 받은 테마가 있는 부분 결과는 캐시하지 않음)
+- 요약은 ollama 의 LLM 캐시를 그대로 공유
+
+    data = await theme_service.analyze("005930")
+    summary, ready = await theme_service.summarize(data)
+"""
+
+import asyncio
+import os
+import time
+
+from kiwoom_client import kiwoom, get_stock_themes
+from ollama_client import ollama
+from stock_symbols import symbols, normalize_code
+
+THEME_FANOUT_CONCURRENCY = int(os.getenv("THEME_FANOUT_CONCURRENCY", "3"))  # 동시 THEME 요청 수
+THEME_FANOUT_DEADLINE = float(os.getenv("THEME_FANOUT_DEADLINE", "10"))     # 테마 상세 조회 마감(초)
+THEME_SUMMARY_DEADLINE = float(os.getenv("THEME_SUMMARY_DEADLINE", "20"))   # LLM 요약 대기 한도(초)
+THEME_SERVICE_TTL = float(os.getenv("THEME_SERVICE_TTL", "60"))             # 테마 데이터 공유 캐시(초)
+
+# THEME(opt90002) 구성종목 행의 필드. 인덱스 행에 모두 있어야 실시간 조회 대신 인덱스를 씀
+THEME_MEMBER_FIELDS = {"종목코드", "종목명", "현재가", "등락기호", "전일대비", "등락율", "누적거래량",
+                       "매도호가", "매도잔량", "매수호가", "매수잔량", "기간수익률n"}
+
+
+def theme_code_of(theme_group):
+    """테마 그룹 행에서 테마코드 추출"""
+    theme_code = (
+        theme_group.get("테마코드")
+        or theme_group.get("종목코드")  # 실제로는 여기에 테마코드가 들어옴
+        or theme_group.get("code")
+        or theme_group.get("CODE")
+    )
+    return str(theme_code or "").strip()
+
+
+def index_usable(indexed, date_type) -> bool:
+    """THEMESOF 응답을 요청 대신 쓸 수 있는지 (같은 날짜구분 + 구성종목 행 필드가 THEME 응답과 같음)"""
+    if not indexed.get("themes") or indexed.get("date_type") != date_type:
+        return False
+    return all(THEME_MEMBER_FIELDS <= stock.keys() for theme in indexed["themes"] for stock in theme["종목들"])
+
+
+def select_top_groups(theme_groups):
+    """상위 3개 테마만 추림 (반도체 테마 우선)"""
+    priority = [g for g in theme_groups if "반도체" in g.get("테마명", "")]
+    others   = [g for g in theme_groups if g not in priority]
+    return (priority[:3] + others)[:3]
+
+
+async def fetch_theme_details(theme_groups, date_type):
+    """
+    테마 상세(THEME)를 동시에 조회 (THEME_FANOUT_CONCURRENCY 개씩, 같은 테마코드는 한 번만)
+    THEME_FANOUT_DEADLINE 안에 끝난 테마만 돌려주고, 못 끝낸 테마명은 pending 으로 반환
+    """
+    groups = {}
+    for theme_group in theme_groups:
+        theme_code = theme_code_of(theme_group)
+        if theme_code and theme_code not in groups:
+            groups[theme_code] = theme_group.get("테마명", "").strip()
+
+    semaphore = asyncio.Semaphore(THEME_FANOUT_CONCURRENCY)
+
+    async def fetch(theme_code, theme_name):
+        async with semaphore:
+            theme_detail = await kiwoom.request(f"THEME|{theme_code}|{date_type}")
+        if not isinstance(theme_detail, list) or not theme_detail:
+            return None
+        theme_detail = [dict(stock) for stock in theme_detail]  # 응답 행은 합류한 요청 / TR 캐시와 공유
+        for stock in theme_detail:
+            stock_code = stock.get("종목코드", "")
+            if stock_code:
+                stock["종목명"] = symbols.name_of(stock_code, stock_code)
+                stock["종목코드"] = normalize_code(stock_code)
+        return {
+            "테마코드": theme_code,
+            "테마명": theme_name,
+            "종목들": theme_detail,
+            "종목수": len(theme_detail)
+        }
+
+    tasks = {theme_code: asyncio.create_task(fetch(theme_code, theme_name)) for theme_code, theme_name in groups.items()}
+    if not tasks:
+        return [], []
+    await asyncio.wait(tasks.values(), timeout=THEME_FANOUT_DEADLINE)
+
+    theme_stocks, pending_themes = [], []
+    for theme_code, task in tasks.items():  # 테마 그룹 순서 유지
+        if not task.done():
+            task.cancel()
+            pending_themes.append(groups[theme_code])
+            print(f"⏰ 테마 {groups[theme_code]} 상세 조회 마감 시간 초과")
+        elif task.exception() is not None:
+            print(f"❌ 테마 {groups[theme_code]} 상세 조회 실패: {task.exception()}")
+        elif task.result():
+            theme_stocks.append(task.result())
+    return theme_stocks, pending_themes
+
+
+def make_theme_prompt(data):
+    stock_name, code = data["stock_name"], data["code"]
+
+    # 프롬프트용 테마 요약 생성
+    theme_summary = []
+    allowed_names = []  # 끝난 테마가 없어도 프롬프트를 만들 수 있도록
+    for theme in data["theme_stocks"]:
+        stock_names = []
+        for stock in theme["종목들"][:5]:
+            stock_name_detail = stock.get("종목명", "")
+            if stock_name_detail:
+                stock_names.append(stock_name_detail)
+
+        print(f"🔍 테마 '{theme['테마명']}' 종목들: {stock_names}")
+        allowed_names.extend(name for name in stock_names if name not in allowed_names)
+
+        theme_summary.append({
+            "테마명": theme["테마명"],
+            "종목수": theme["종목수"],
+            "주요종목": stock_names
+        })
+
+    return f"""
+다음은 {stock_name}(종목코드: {code})이 속한 테마 정보입니다.
+친근하고 자연스러운 한국어로 자세하게 분석해주세요.
+
+⚠️ 중요: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고,
+종목코드({code})는 절대 사용하지 마세요!
+
+허용 종목 리스트: {', '.join(allowed_names)}
+
+📊 테마 정보 요약:
+{theme_summary}
+
+다음 내용을 포함해서 자연스럽게 설명해주세요:
+1. {stock_name}이 속한 테마들의 특징과 의미
+2. 같은 테마에 속한 주요 종목들과의 연관성
+3. 테마 투자 관점에서의 인사이트
+4. 투자자들에게 도움이 되는 조언
+
+친근하고 이해하기 쉽게 설명해주세요. 이모티콘도 적절히 사용하고,
+실제 투자에 도움이 되는 구체적인 조언을 포함해주세요.
+
+⚠️ 다시 한 번 강조: 종목을 언급할 때는 반드시 "{stock_name}"이라는 한글 종목명만 사용하고,
+종목코드({code})는 절대 사용하지 마세요!
+"""
+
+
+def make_theme_fallback(data):
+    return f"{data['stock_name']}이 속한 테마 정보를 분석했습니다. 총 {len(data['theme_stocks'])}개의 테마에 속해 있으며, 각 테마별로 다양한 관련 종목들이 있습니다."
+
+
+class ThemeService:
+    def __init__(self, ttl=THEME_SERVICE_TTL):
+        self.ttl = ttl
+        self._cache = {}  # (종목코드, 날짜구분) → (만료 시각, 테마 데이터)
+
+        self.hits = 0
+        self.misses = 0
+
+    async def analyze(self, code, date_type="5") -> dict:
+        """종목이 속한 테마와 구성종목 (응답 dict 는 캐시와 공유하므로 수정하지 말 것)"""
+        await symbols.ensure_loaded()
+        code = normalize_code(code)
+
+        key = (code, date_type)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.time():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+
+        stock_name = symbols.name_of(code, code)
+
+        # 디버깅: 종목코드 매핑 상태 확인
+        print(f"🔍 종목코드 매핑 상태: {code} -> {stock_name}")
+        print(f"🔍 매핑 테이블 크기: {len(symbols)}")
+
+        # 1단계: 테마 인덱스(브릿지 메모리, TR 없음)에서 종목이 속한 테마와 구성종목 조회
+        indexed = await get_stock_themes(code)
+        if index_usable(indexed, date_type):
+            source = "index"
+            themes = {theme["테마코드"]: theme for theme in indexed["themes"]}
+            top_groups = select_top_groups([theme["그룹"] for theme in indexed["themes"]])
+            theme_stocks = [
+                {field: themes[theme_code_of(group)][field] for field in ("테마코드", "테마명", "종목들", "종목수")}
+                for group in top_groups
+            ]
+            pending_themes = []
+        else:
+            # 인덱스가 아직 없거나 모르는 종목 / 다른 날짜구분: 종목코드로 테마 그룹 검색 후 테마 상세 조회
+            source = "live"
+            msg = f"THEMEGROUP|{date_type}|1||{code}|1"  # search_type=1 (종목코드 검색)
+            print(f"📤 종목 테마 검색 메시지: {msg}")
+            theme_groups = await kiwoom.request(msg)
+
+            print(f"🔍 종목 테마 그룹 응답: {theme_groups}")
+
+            top_groups = select_top_groups(theme_groups)
+            theme_stocks, pending_themes = await fetch_theme_details(top_groups, date_type)
+
+        data = {
+            "code": code,
+            "stock_name": stock_name,
+            "date_type": date_type,
+            "theme_groups": top_groups,
+            "theme_stocks": theme_stocks,
+            "source": source,                   # index: 테마 인덱스, live: THEMEGROUP / THEME 조회
+            "partial": bool(pending_themes),    # 마감 시간 안에 못 받은 테마가 있음
+            "pending_themes": pending_themes
+        }
+        if not pending_themes:
+            self._prune()
+            self._cache[key] = (time.time() + self.ttl, data)
+        return data
+
+    def _prune(self):
+        now = time.time()
+        for key in [key for key, (expires_at, _) in self._cache.items() if expires_at <= now]:
+            del self._cache[key]
+
+    def stream_summary(self, data):
+        """SSE 용 요약 토큰 스트림"""
+        return ollama.stream_generate(make_theme_prompt(data), cache=True)
+
+    async def summarize(self, data, deadline=THEME_SUMMARY_DEADLINE):
+        """
+        LLM 요약을 deadline 초까지만 기다림. 시간이 넘으면 기본 요약으로 먼저 응답하고
+        생성은 백그라운드로 계속해 LLM 캐시에 저장 (같은 요청을 다시 하면 바로 요약이 나옴)
+        반환: (요약, 완료 여부)
+        """
+        fallback = make_theme_fallback(data)
+        task = asyncio.ensure_future(ollama.generate(make_theme_prompt(data), cache=True))
+        try:
+            summary = await asyncio.wait_for(asyncio.shield(task), deadline)
+            return summary or fallback, True
+        except asyncio.TimeoutError:
+            print(f"⏰ LLM 요약 {deadline}s 초과, 테마 데이터 먼저 응답")
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())  # 백그라운드 예외 로그 억제
+            return fallback, False
+        except Exception as e:
+            print(f"LLM 요약 생성 실패: {e}")
+            return fallback, False
+
+    def stats(self) -> dict:
+        return {"entries": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+# 앱 전체가 공유하는 서비스
+theme_service = ThemeService()
@@ -0,0 +1,119 @@
+##### 공통 TR 엔진 #####
+
+"""
+tr_registry.TR_SPECS 의 명세 하나당 TrCollector 하나를 만들어
+요청 → 연속조회 → 타입 변환 → 후처리 → 캐시를 한 곳에서 처리
+(스키마에 dtype 이 있으면 결과는 dict 리스트 대신 NumPy 구조화 배열)
+
+    engine = TrEngine(app.ocx, app)
+    engine.request("short_trend", code="005930", start_date="20240101", end_date="20240131")
+"""
+
+import time
+
+import numpy as np
+
+from base_collector import BaseCollector
+from tr_registry import TR_SPECS
+
+
+class TrCollector(BaseCollector):
+    def __init__(self, ocx, app, spec):
+        self.spec = spec
+        self.rqname = spec.rqname
+        self.trcode = spec.trcode
+        self.screen_no = spec.screen_no
+        self.schema = spec.schema
+        super().__init__(ocx, app)
+        self._page = []
+        self._cache = {}  # 파라미터 → (만료 시각, 행 리스트)
+
+        self.has_more = False  # 마지막 호출이 페이지가 남은 채로 끝났는지
+
+        self.hits = 0
+        self.misses = 0
+
+    def _cache_key(self, params):
+        return tuple(sorted(params.items()))
+
+    def cached(self, **params):
+        """캐시에 유효한 결과가 있으면 반환, 없으면 None"""
+        entry = self._cache.get(self._cache_key(params))
+        if entry is not None and entry[0] > time.time():
+            self.hits += 1
+            return entry[1].copy()
+        return None
+
+    def request(self, stop=None, max_pages=None, max_rows=None, **params) -> list:
+        """
+        stop(page) 가 True 를 돌려주면 남은 페이지가 있어도 연속조회 중단
+        (page 는 방금 받은 페이지의 행 리스트, 응답 순서 그대로)
+        max_pages / max_rows: 이번 호출의 페이지 / 행 예산 (없으면 명세 기본값)
+        """
+        max_pages = max_pages or self.spec.max_pages
+        max_rows = max_rows or self.spec.max_rows
+
+        if self.spec.cache_ttl:
+            cached = self.cached(**params)
+            if cached is not None:
+                return cached
+            self.misses += 1
+
+        inputs = self.spec.format_inputs(params)
+        pages = []
+        row_count = 0
+        prev_next = 0
+        while True:
+            self.set_inputs(inputs)
+            self.comm_rq_data(prev_next)
+            pages.append(self._page)
+            row_count += len(self._page)
+
+            if not self.spec.paging or self.prev_next != 2:
+                break
+            if stop and stop(self._page):
+                break
+            if (max_pages and len(pages) >= max_pages) or (max_rows and row_count >= max_rows):
+                print(f"⚠️ {self.trcode} 조회 예산 도달: {len(pages)}페이지 / {row_count}행")
+                break
+            prev_next = 2
+
+        self.has_more = self.spec.paging and self.prev_next == 2
+        rows = self._join(pages)
+        if max_rows:
+            rows = rows[:max_rows]
+        if self.spec.reverse:
+            rows = rows[::-1]
+        if self.spec.post:
+            rows = self.spec.post(rows, params)
+
+        if self.spec.cache_ttl:
+            self._cache[self._cache_key(params)] = (time.time() + self.spec.cache_ttl, rows)
+        return rows.copy()
+
+    def _join(self, pages):
+        if self.schema.dtype is not None:
+            return np.concatenate(pages) if pages else self.schema.empty()
+        return [row for page in pages for row in page]
+
+    def on_receive(self, trcode, rqname, recordname):
+        self._page = self.read_rows(trcode, rqname)
+        print(f"📥 {self.trcode} 수신: {len(self._page)}행")
+
+
+class TrEngine:
+    def __init__(self, ocx, app, specs=TR_SPECS):
+        self.collectors = {name: TrCollector(ocx, app, spec) for name, spec in specs.items()}
+
+    def request(self, name, stop=None, max_pages=None, max_rows=None, **params) -> list:
+        return self.collectors[name].request(stop=stop, max_pages=max_pages, max_rows=max_rows, **params)
+
+    def cached(self, name, **params):
+        return self.collectors[name].cached(**params)
+
+    def stats(self) -> dict:
+        return {
+            name: {"hits": collector.hits, "misses": collector.misses}
+            for name, collector in self.collectors.items()
+            if collector.spec.cache_ttl
+        }
@@ -0,0 +1,80 @@
+##### TR 출력 필드 스키마 #####
+
+"""
+TR 반복 데이터(멀티 레코드)를 한 번에 꺼내 dict 행으로 변환하기 위한 선언적 스키마
+
+- columns: GetCommDataEx 가 돌려주는 2차원 배열의 컬럼 순서 (KOA Studio 출력 순서)
+- fields: 결과에 담을 필드. KOA 필드명, 결과 키, 변환 함수
+- 변환은 행을 만들 때 한 번만 수행 (이후 문자열 가공 불필요)
+- dtype 을 주면 dict 리스트 대신 페이지 단위 NumPy 구조화 배열로 반환 (필드 key 가 컬럼명)
+"""
+
+import numpy as np
+
+
+def text(value) -> str:
+    return str(value).strip()
+
+
+def integer(value) -> int:
+    """'+0001234', '-56', '1,234' → int. 빈 값은 0"""
+    value = str(value).strip().replace(",", "")
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+
+def price(value) -> int:
+    """등락 부호가 붙는 가격 필드 → 절댓값"""
+    return abs(integer(value))
+
+
+def number(value) -> float:
+    """'+1.25', '-0.30%' → float. 빈 값은 0.0"""
+    value = str(value).strip().replace(",", "").replace("%", "")
+    return float(value) if value else 0.0
+
+
+class Field:
+    def __init__(self, name, convert=text, key=None):
+        self.name = name          # KOA 필드명
+        self.convert = convert
+        self.key = key or name    # 결과 dict 키
+
+
+class TrSchema:
+    def __init__(self, record_name, columns, fields, dtype=None):
+        self.record_name = record_name
+        self.columns = tuple(columns)
+        self.fields = tuple(fields)
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        # 출력 필드별 GetCommDataEx 컬럼 위치
+        self.positions = tuple(self.columns.index(field.name) for field in self.fields)
+        self.width = len(self.columns)
+
+    def _build(self, records) -> list:
+        """변환된 값 튜플 리스트 → dict 행 리스트 또는 구조화 배열"""
+        if self.dtype is not None:
+            return np.array(records, dtype=self.dtype)
+        keys = [field.key for field in self.fields]
+        return [dict(zip(keys, record)) for record in records]
+
+    def convert_table(self, table):
+        """GetCommDataEx 결과(행 리스트) → 변환된 행"""
+        return self._build([
+            tuple(field.convert(raw[pos]) for field, pos in zip(self.fields, self.positions))
+            for raw in table
+        ])
+
+    def convert_rows(self, rows):
+        """필드명 → 원시 문자열 dict 리스트 (GetCommData 경로) → 변환된 행"""
+        return self._build([
+            tuple(field.convert(values[field.name]) for field in self.fields)
+            for values in rows
+        ])
+
+    def empty(self):
+        return self._build([])
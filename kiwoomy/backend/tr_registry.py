@@ -0,0 +1,170 @@
+##### TR 명세 레지스트리 #####
+
+"""
+키움 TR 별 요청 입력 / 출력 필드 / 페이징 / 캐시 규칙을 선언적으로 정의
+
+새 데이터 피드는 여기에 TrSpec 하나만 추가하면 tr_engine.TrEngine 이
+요청, 연속조회, 타입 변환, 캐시까지 처리한다.
+"""
+
+import os
+
+from ohlcv_store import COLUMNS
+from tr_fields import Field, TrSchema, integer, number, price
+
+
+# 연속조회 TR 한 번 호출에 쓸 수 있는 기본 페이지 예산
+TR_MAX_PAGES = int(os.getenv("TR_MAX_PAGES", "20"))
+
+
+class TrSpec:
+    def __init__(self, name, trcode, rqname, screen_no, schema, inputs,
+                 paging=False, reverse=False, cache_ttl=0, post=None,
+                 max_pages=TR_MAX_PAGES, max_rows=None):
+        self.name = name
+        self.trcode = trcode
+        self.rqname = rqname
+        self.screen_no = screen_no
+        self.schema = schema
+        self.inputs = inputs        # KOA 입력명 → 값 템플릿 ("{code}" 처럼 파라미터 치환)
+        self.paging = paging        # prev_next == 2 이면 다음 페이지 계속 요청
+        self.reverse = reverse      # 최신순 응답을 날짜 오름차순으로 뒤집음
+        self.cache_ttl = cache_ttl  # 같은 파라미터 결과 재사용 시간(초), 0 이면 캐시 안 함
+        self.post = post            # post(rows, params) → rows 후처리
+        self.max_pages = max_pages  # 호출당 최대 페이지 수 (연속조회 TR)
+        self.max_rows = max_rows    # 호출당 최대 행 수, None 이면 제한 없음
+
+    def format_inputs(self, params: dict) -> dict:
+        return {name: template.format(**params) for name, template in self.inputs.items()}
+
+
+def within_dates(start_key, end_key, field="일자"):
+    """params[start_key] <= row[field] <= params[end_key] 인 행만 남기는 후처리"""
+    def post(rows, params):
+        filtered = [row for row in rows if params[start_key] <= row[field] <= params[end_key]]
+        if len(filtered) < len(rows):
+            print(f"⚠️ 기간 외 데이터 {len(rows) - len(filtered)}개 제거됨")
+        return filtered
+    return post
+
+
+DAILY_CHART_COLUMNS = ["종목코드", "현재가", "거래량", "거래대금", "일자", "시가", "고가", "저가",
+                       "수정주가구분", "수정비율", "대업종구분", "소업종구분", "종목정보", "수정주가이벤트", "전일종가"]
+
+MINUTE_CHART_COLUMNS = ["현재가", "거래량", "체결시간", "시가", "고가", "저가",
+                        "수정주가구분", "수정비율", "대업종구분", "소업종구분", "종목정보", "수정주가이벤트", "전일종가"]
+
+TR_SPECS = {spec.name: spec for spec in [
+    # 주식일봉차트조회: 페이지마다 OHLCV 저장소와 같은 구조화 배열로 변환
+    # (캐시는 저장소가 대신하므로 두지 않음)
+    TrSpec(
+        "daily_chart", "opt10081", "opt10081_req", "0101",
+        TrSchema("주식일봉차트조회", DAILY_CHART_COLUMNS, [
+            Field("일자", integer, key="date"),
+            Field("시가", price, key="open"),
+            Field("고가", price, key="high"),
+            Field("저가", price, key="low"),
+            Field("현재가", price, key="close"),
+            Field("거래량", integer, key="volume"),
+            Field("거래대금", integer, key="amount"),
+        ], dtype=list(COLUMNS.items())),
+        inputs={"종목코드": "{code}", "기준일자": "{base_date}", "수정주가구분": "1"},
+        paging=True,
+    ),
+    # 공매도추이
+    TrSpec(
+        "short_trend", "opt10014", "opt10014_req", "0102",
+        TrSchema("공매도추이",
+                 ["일자", "종가", "전일대비기호", "전일대비", "등락율", "거래량",
+                  "공매도량", "매매비중", "공매도거래대금", "공매도평균가"], [
+            Field("일자"),
+            Field("종가", price),
+            Field("공매도량", integer),
+            Field("매매비중", number),
+            Field("공매도거래대금", integer),
+            Field("공매도평균가", price),
+        ]),
+        inputs={"종목코드": "{code}", "시간구분": "1", "시작일자": "{start_date}", "종료일자": "{end_date}"},
+        reverse=True,
+        cache_ttl=300,
+    ),
+    # 종목별투자자기관별 (금액, 순매수, 단주)
+    TrSpec(
+        "investor_trend", "opt10059", "rq_opt10059", "0107",
+        TrSchema("종목별투자자기관별",
+                 ["일자", "현재가", "대비기호", "전일대비", "등락율", "누적거래량", "누적거래대금",
+                  "개인투자자", "외국인투자자", "기관계", "금융투자", "보험", "투신", "기타금융",
+                  "은행", "연기금등", "사모펀드", "국가", "기타법인", "내외국인"], [
+            Field("일자"),
+            Field("개인투자자", integer, key="개인"),
+            Field("외국인투자자", integer, key="외국인"),
+            Field("기관계", integer),
+            Field("금융투자", integer),
+            Field("보험", integer),
+            Field("투신", integer),
+            Field("기타금융", integer),
+            Field("은행", integer),
+            Field("기타법인", integer),
+        ]),
+        inputs={"일자": "{to_date}", "종목코드": "{code}", "금액수량구분": "1", "매매구분": "0", "단위구분": "1"},
+        cache_ttl=300,
+        post=within_dates("from_date", "to_date"),
+    ),
+    # 테마그룹별 (첫 컬럼 "종목코드" 에는 테마코드가 들어옴)
+    TrSpec(
+        "theme_groups", "opt90001", "opt90001_req", "0104",
+        TrSchema("테마그룹별",
+                 ["종목코드", "테마명", "종목수", "등락기호", "등락율",
+                  "상승종목수", "하락종목수", "기간수익률", "주요종목"], [
+            Field("종목코드"),
+            Field("테마명"),
+            Field("종목수", integer),
+            Field("등락기호"),
+            Field("등락율", number),
+            Field("상승종목수", integer),
+            Field("하락종목수", integer),
+            Field("기간수익률", number),
+            Field("주요종목"),
+        ]),
+        inputs={"검색구분": "{search_type}", "종목코드": "{stock_code}", "날짜구분": "{date_type}",
+                "테마명": "{theme_name}", "등락수익구분": "{rank_type}"},
+        cache_ttl=60,
+    ),
+    # 테마구성종목
+    TrSpec(
+        "theme_stocks", "opt90002", "opt90002_req", "0103",
+        TrSchema("테마구성종목",
+                 ["종목코드", "종목명", "현재가", "등락기호", "전일대비", "등락율", "누적거래량",
+                  "매도호가", "매도잔량", "매수호가", "매수잔량", "기간수익률n"], [
+            Field("종목코드"),
+            Field("종목명"),
+            Field("현재가", price),
+            Field("등락기호"),
+            Field("전일대비", integer),
+            Field("등락율", number),
+            Field("누적거래량", integer),
+            Field("매도호가", price),
+            Field("매도잔량", integer),
+            Field("매수호가", price),
+            Field("매수잔량", integer),
+            Field("기간수익률n", number),
+        ]),
+        inputs={"날짜구분": "{date_type}", "종목코드": "{theme_code}"},
+        cache_ttl=60,
+    ),
+    # 주식분봉차트조회 (틱범위: 1, 3, 5, 10, 15, 30, 45, 60 분)
+    TrSpec(
+        "minute_chart", "opt10080", "opt10080_req", "0105",
+        TrSchema("주식분봉차트조회", MINUTE_CHART_COLUMNS, [
+            Field("체결시간"),
+            Field("시가", price),
+            Field("고가", price),
+            Field("저가", price),
+            Field("현재가", price),
+            Field("거래량", integer),
+        ]),
+        inputs={"종목코드": "{code}", "틱범위": "{interval}", "수정주가구분": "1"},
+        reverse=True,
+        cache_ttl=30,
+    ),
+]}
@@ -0,0 +1,197 @@
+##### TR 요청 스케줄러 #####
+
+"""
+키움 OCX 앞단의 요청 큐
+
+- 네트워크 스레드는 요청을 큐에 넣기만 하고, OCX 호출은 메인(Qt) 스레드가 하나씩 처리
+- 우선순위: 사용자 요청(interactive) > 백그라운드 프리페치(background)
+- 아직 시작하지 않은 동일 명령은 하나로 합쳐서 한 번만 실행 (coalescing)
+- TR 호출마다 토큰 버킷(초당 / 시간당)으로 키움 조회 제한을 지킴
+- 명령별 큐 대기 / 처리 시간 히스토그램 (STATUS 의 metrics 로 노출)
+"""
+
+import heapq
+import itertools
+import os
+import threading
+import time
+
+from metrics import Histogram
+
+TR_RATE_PER_SEC = float(os.getenv("TR_RATE_PER_SEC", "5"))
+TR_RATE_PER_HOUR = float(os.getenv("TR_RATE_PER_HOUR", "1000"))
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITIES = {"interactive": PRIORITY_INTERACTIVE, "background": PRIORITY_BACKGROUND}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self) -> float:
+        """토큰 1개를 쓸 수 있을 때까지 남은 초 (0 이면 즉시 가능)"""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self):
+        self._refill()
+        self.tokens -= 1
+
+
+class TrBudget:
+    """초당 / 시간당 두 버킷을 모두 만족할 때만 TR 을 허용"""
+
+    def __init__(self, per_sec=TR_RATE_PER_SEC, per_hour=TR_RATE_PER_HOUR):
+        self.buckets = [
+            TokenBucket(per_sec, per_sec),
+            TokenBucket(per_hour / 3600.0, per_hour),
+        ]
+        self.acquired = 0
+        self.throttled_seconds = 0.0
+
+    def acquire(self, idle=None):
+        """토큰을 얻을 때까지 대기. idle 은 기다리는 동안 호출할 함수 (Qt 이벤트 처리 등)"""
+        while True:
+            wait = max(bucket.wait_time() for bucket in self.buckets)
+            if wait <= 0:
+                break
+            self.throttled_seconds += min(wait, 0.05)
+            if idle:
+                idle()
+            time.sleep(min(wait, 0.05))
+        for bucket in self.buckets:
+            bucket.take()
+        self.acquired += 1
+
+    def stats(self) -> dict:
+        for bucket in self.buckets:
+            bucket._refill()
+        return {
+            "acquired": self.acquired,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "tokens_per_sec": round(self.buckets[0].tokens, 2),
+            "tokens_per_hour": round(self.buckets[1].tokens, 2),
+        }
+
+
+def command_name(command: str) -> str:
+    """'PRICE|005930|1개월' → 'PRICE' (메트릭 라벨용)"""
+    return command.strip().split("|")[0].upper()
+
+
+class Job:
+    def __init__(self, command: str, priority: int):
+        self.command = command
+        self.priority = priority
+        self.callbacks = []
+        self.started = False
+        self.enqueued_at = time.monotonic()
+
+
+class TrScheduler:
+    def __init__(self, budget: TrBudget = None):
+        self.budget = budget or TrBudget()
+        self._heap = []
+        self._pending = {}  # command → 아직 시작 안 한 Job
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+        self.submitted = 0
+        self.coalesced = 0
+        self.processed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+
+        self.queue_wait = Histogram("tr_queue_wait_seconds", "TR 요청이 큐에서 기다린 시간(초)", ("cmd",))
+        self.run_time = Histogram("tr_run_seconds", "TR 명령 처리 시간(초, 연속조회 / 조회 제한 대기 포함)", ("cmd", "result"))
+
+    def submit(self, command: str, callback, priority: int = PRIORITY_INTERACTIVE):
+        """callback(data, error) 는 처리가 끝나면 메인 스레드에서 호출됨"""
+        with self._cond:
+            self.submitted += 1
+            job = self._pending.get(command)
+            if job is not None:
+                self.coalesced += 1
+                job.callbacks.append(callback)
+                if priority < job.priority:
+                    # 더 급한 요청이 합쳐지면 우선순위를 올려 다시 넣음 (이전 항목은 꺼낼 때 무시)
+                    job.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._seq), job))
+                return
+
+            job = Job(command, priority)
+            job.callbacks.append(callback)
+            self._pending[command] = job
+            heapq.heappush(self._heap, (priority, next(self._seq), job))
+            self._cond.notify()
+
+    def next_job(self, timeout: float = None):
+        with self._cond:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while True:
+                while self._heap:
+                    priority, _, job = heapq.heappop(self._heap)
+                    if job.started or priority != job.priority:
+                        continue
+                    job.started = True
+                    self._pending.pop(job.command, None)
+                    return job
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def run_job(self, job: Job, handler):
+        """메인 스레드에서 job 하나 실행 후 합쳐진 모든 요청자에게 결과 전달"""
+        started = time.monotonic()
+        cmd = command_name(job.command)
+        self.total_wait += started - job.enqueued_at
+        self.queue_wait.observe(started - job.enqueued_at, cmd=cmd)
+        data, error = None, None
+        try:
+            data = handler(job.command)
+        except Exception as e:
+            error = e
+            self.failed += 1
+        self.processed += 1
+        self.run_time.observe(time.monotonic() - started, cmd=cmd, result="error" if error is not None else "ok")
+        for callback in job.callbacks:
+            try:
+                callback(data, error)
+            except Exception as e:
+                print(f"❌ 응답 전달 실패: {e}")
+
+    def queue_depth(self) -> dict:
+        with self._cond:
+            depth = {name: 0 for name in PRIORITIES}
+            for job in self._pending.values():
+                for name, value in PRIORITIES.items():
+                    if job.priority == value:
+                        depth[name] += 1
+            return depth
+
+    def metrics(self) -> list:
+        return [self.queue_wait.family(), self.run_time.family()]
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth(),
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "processed": self.processed,
+            "failed": self.failed,
+            "avg_wait_seconds": round(self.total_wait / self.processed, 4) if self.processed else 0.0,
+            "tr_budget": self.budget.stats(),
+        }